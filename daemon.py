@@ -1,10 +1,18 @@
 # daemon.py
 
+import os
 import time
-from queue import Queue
+from queue import Empty
+from rw_backend.core.bounded_queue import BoundedQueue, DROP_OLDEST, COALESCE_LATEST, BLOCK
+from rw_backend.core.event_bus import EventBus
 from rw_backend.simulators.lmu.collector import LMUCollector
+from rw_backend.simulators.lmu.collector_process import LMUCollectorProcess
+from rw_backend.simulators.lmu.recording import SessionRecorder, RecordingTee
+from rw_backend.simulators.lmu.replay import ReplayCollector
 from rw_backend.generators.event_generator import EventGenerator
-from rw_backend.database.manager import connect_db, close_db, initialize_database
+from rw_backend.database.manager import connect_db, close_db, initialize_database, configure_database, format_lock_waits, WRITER
+from rw_backend.database.writer import PersistenceWriter
+from rw_backend.database.retention import RetentionJob
 from rw_backend.handlers.session_handler import SessionHandler
 from rw_backend.handlers.stint_handler import StintHandler
 from rw_backend.handlers.lap_handler import LapHandler
@@ -12,49 +20,191 @@ from rw_backend.handlers.live_data_handler import LiveDataHandler
 from rw_backend.handlers.telemetry_handler import TelemetryHandler
 from rw_backend.core.events import TelemetryUpdate, SessionEnded
 from rw_backend.core.live_data_server import LiveDataServer
+from rw_backend.core.latency import tracer, format_snapshot
+
+# Queue bounds. Only frames and TelemetryUpdates are ever dropped when a queue
+# is full; lifecycle events always get through. Policies can be overridden with
+# RACEWORKSHOP_FRAME_QUEUE_POLICY / RACEWORKSHOP_EVENT_QUEUE_POLICY.
+FRAME_QUEUE_SIZE = 256
+EVENT_QUEUE_SIZE = 512
+QUEUE_STATS_INTERVAL = 60.0
+# How long shutdown waits for the event generator (and its setup lookups).
+GENERATOR_JOIN_TIMEOUT = 10.0
+
+def _is_telemetry_update(event):
+    return isinstance(event, TelemetryUpdate)
+
+def _print_queue_stats(*queues):
+    for queue in queues:
+        if isinstance(queue, BoundedQueue):
+            stats = queue.stats()
+            print(f"[Daemon] {queue.name}: depth {stats['depth']}, high water {stats['high_water']}, "
+                  f"dropped {stats['dropped']} ({queue.policy})", flush=True)
+
+def _print_handler_stats(event_bus):
+    for s in event_bus.stats():
+        if s['calls']:
+            print(f"[Daemon] {s['handler']} ({s['event']}): {s['calls']} calls, "
+                  f"avg {s['avg_ms']:.3f} ms, max {s['max_ms']:.2f} ms", flush=True)
+
+def _print_database_stats():
+    print(f"[Daemon] Database: {format_lock_waits()}", flush=True)
+
+def _print_latency_stats():
+    if tracer.enabled:
+        for line in format_snapshot(tracer.snapshot()):
+            print(f"[Daemon] {line}", flush=True)
+
+def _recording_path() -> str | None:
+    """With RACEWORKSHOP_RECORD_DIR set, every collected frame is recorded to a .rwrec file there."""
+    record_dir = os.getenv("RACEWORKSHOP_RECORD_DIR")
+    if not record_dir:
+        return None
+    os.makedirs(record_dir, exist_ok=True)
+    return os.path.join(record_dir, f"session-{time.strftime('%Y%m%d-%H%M%S')}.rwrec")
+
+def _replay_speed() -> float | None:
+    """RACEWORKSHOP_REPLAY_SPEED is a multiple of real time, or "max"."""
+    speed = os.getenv("RACEWORKSHOP_REPLAY_SPEED", "1")
+    return None if speed == "max" else float(speed)
+
+def _replay_drained(collector, event_generator, event_queue) -> bool:
+    return (collector.finished.is_set()
+            and event_generator.frames_processed >= collector.frames_sent
+            and event_queue.empty())
 
 def run_daemon():
     print("[Daemon] Starting background process with Event-Driven Architecture...", flush=True)
+    configure_database(WRITER)
     initialize_database()
     connect_db()
-    raw_data_queue = Queue()
-    event_queue = Queue()
+    # RACEWORKSHOP_REPLAY plays a .rwrec recording through the pipeline instead
+    # of reading the sim. Replays never drop frames; they wait for the handlers.
+    replay_path = os.getenv("RACEWORKSHOP_REPLAY")
+    event_queue = BoundedQueue(
+        EVENT_QUEUE_SIZE,
+        policy=os.getenv("RACEWORKSHOP_EVENT_QUEUE_POLICY", BLOCK if replay_path else DROP_OLDEST),
+        droppable=_is_telemetry_update,
+        name="event_queue",
+    )
     live_data_server = LiveDataServer()
     
+    # Handlers hand their database writes to this thread, so dispatch never
+    # waits on SQLite. Records come back as Futures the next write can chain on.
+    writer = PersistenceWriter()
+    writer.start()
+    # Thins and drops old lap telemetry in the background; RACEWORKSHOP_RETENTION=0 turns it off.
+    retention_job = None
+    if os.getenv("RACEWORKSHOP_RETENTION", "1") != "0":
+        retention_job = RetentionJob(writer)
+        retention_job.start()
+
     # --- CHANGE START: Pass event_queue to handlers ---
-    session_handler = SessionHandler()
+    session_handler = SessionHandler(writer)
     # StintHandler and LapHandler now need access to the event queue to chain events.
-    stint_handler = StintHandler(session_handler, event_queue)
-    lap_handler = LapHandler(stint_handler, event_queue)
+    stint_handler = StintHandler(session_handler, event_queue, writer)
+    lap_handler = LapHandler(stint_handler, event_queue, writer)
     live_data_handler = LiveDataHandler(live_data_server, session_handler, lap_handler)
-    telemetry_handler = TelemetryHandler()
+    telemetry_handler = TelemetryHandler(lap_handler, writer)
+    # Laps a killed daemon was recording are written before anything new.
+    telemetry_handler.recover()
 
-    handlers = [session_handler, stint_handler, lap_handler, live_data_handler, telemetry_handler]
+    # Handlers receive only the event types they subscribe to. For each event
+    # type they run in registration order, so a handler must be registered
+    # after the handlers whose state it reads: sessions before stints, stints
+    # before laps, and the lap record before the live view and telemetry use it.
+    event_bus = EventBus()
+    for handler in (session_handler, stint_handler, lap_handler, live_data_handler, telemetry_handler):
+        event_bus.register(handler)
     # --- CHANGE END ---
     
-    collector = LMUCollector(raw_data_queue=raw_data_queue)
-    event_generator = EventGenerator(raw_data_queue=raw_data_queue, event_queue=event_queue)
+    record_path = None if replay_path else _recording_path()
+    recorder = None
+    if record_path:
+        print(f"[Daemon] Recording frames to {record_path}", flush=True)
+
+    # The collector can run in its own process so shared memory sampling never
+    # waits on this process's GIL; frames then arrive through a shared memory ring,
+    # which bounds itself by overwriting the oldest slots.
+    if replay_path:
+        raw_data_queue = BoundedQueue(FRAME_QUEUE_SIZE, policy=BLOCK, name="raw_data_queue")
+        collector = ReplayCollector(raw_data_queue, replay_path, speed=_replay_speed())
+    elif os.getenv("RACEWORKSHOP_COLLECTOR_PROCESS") == "1":
+        collector = LMUCollectorProcess(record_path=record_path)
+        raw_data_queue = collector.frames
+    else:
+        raw_data_queue = BoundedQueue(
+            FRAME_QUEUE_SIZE,
+            policy=os.getenv("RACEWORKSHOP_FRAME_QUEUE_POLICY", COALESCE_LATEST),
+            name="raw_data_queue",
+        )
+        collector_output = raw_data_queue
+        if record_path:
+            recorder = SessionRecorder(record_path)
+            collector_output = RecordingTee(raw_data_queue, recorder)
+        collector = LMUCollector(raw_data_queue=collector_output)
+    event_generator = EventGenerator(raw_data_queue=raw_data_queue, event_queue=event_queue, writer=writer)
     
     collector.start()
     event_generator.start()
     live_data_server.start()
     
     print("[Daemon] Event bus running. Monitoring for events...", flush=True)
+    next_stats_at = time.monotonic() + QUEUE_STATS_INTERVAL
+    last_dispatch_at = time.monotonic()
     try:
         while True:
-            event = event_queue.get()
-            if not isinstance(event, TelemetryUpdate):
+            try:
+                event = event_queue.get(timeout=1.0)
+            except Empty:
+                if replay_path and _replay_drained(collector, event_generator, event_queue):
+                    elapsed = last_dispatch_at - collector.started_at
+                    print(f"[Daemon] Replay processed end to end: {collector.frames_sent} frames in {elapsed:.1f}s "
+                          f"({collector.frames_sent / max(elapsed, 1e-9):.0f} frames/s).", flush=True)
+                    break
+                continue
+            if time.monotonic() >= next_stats_at:
+                _print_queue_stats(raw_data_queue, event_queue)
+                _print_handler_stats(event_bus)
+                _print_latency_stats()
+                _print_database_stats()
+                next_stats_at = time.monotonic() + QUEUE_STATS_INTERVAL
+            if isinstance(event, TelemetryUpdate):
+                dispatch_started = time.perf_counter()
+                tracer.record("event_queue", dispatch_started - event.queued_at)
+                event_bus.publish(event)
+                tracer.record("dispatch", time.perf_counter() - dispatch_started)
+            else:
                 print(f"[{time.strftime('%H:%M:%S')}] EVENT DISPATCH: {type(event).__name__}", flush=True)
-            for handler in handlers:
-                handler.handle_event(event)
+                event_bus.publish(event)
+            last_dispatch_at = time.monotonic()
     except KeyboardInterrupt:
         print("\n[Daemon] Shutdown signal received.", flush=True)
     finally:
         collector.stop()
+        if recorder:
+            recorder.close()
+        # Nothing drains the queues any more, so producers waiting for room
+        # under the block policy are released rather than left hanging.
+        for queue in (raw_data_queue, event_queue):
+            if isinstance(queue, BoundedQueue):
+                queue.close()
         event_generator.stop()
-        final_event = SessionEnded()
-        for handler in handlers:
-            handler.handle_event(final_event)
+        # Its setup lookups finish as it exits, and their results are written
+        # by the writer, so it has to be gone before the writer stops.
+        event_generator.join(timeout=GENERATOR_JOIN_TIMEOUT)
+        if event_generator.is_alive():
+            print(f"[Daemon] WARNING: Event generator still running after {GENERATOR_JOIN_TIMEOUT:.0f}s; "
+                  "setups it is still looking up will not be saved.", flush=True)
+        event_bus.publish(SessionEnded())
+        _print_queue_stats(raw_data_queue, event_queue)
+        _print_handler_stats(event_bus)
+        _print_latency_stats()
+        _print_database_stats()
+        if retention_job:
+            retention_job.stop()
+        # Runs the writes still queued, including the session close above.
+        writer.stop()
         close_db()
         print("[Daemon] Services shut down. Exiting.", flush=True)
 
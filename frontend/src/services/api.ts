@@ -11,6 +11,8 @@ import type {
     Simulator,
     LapTelemetryData,
     LapComparisonData,
+    TelemetryResponseOptions,
+    LapAlignmentOptions,
     TrackViewStats,
     CarViewStats,
     SetupViewStats,
@@ -29,8 +31,10 @@ declare global {
                 getModuleDashboardStats: (simulatorId: number) => Promise<string>;
                 getSessionHistory: (filters: SessionFilters) => Promise<string>;
                 getSessionDetail: (sessionId: number) => Promise<string | null>;
-                getLapTelemetry: (lapId: number) => Promise<string>;
-                compareLaps: (lapId1: number, lapId2: number) => Promise<string>;
+                getLapTelemetry: (lapId: number, options?: TelemetryResponseOptions) => Promise<string>;
+                compareLaps: (lapId1: number, lapId2: number, options?: TelemetryResponseOptions) => Promise<string>;
+                compareLapsAligned: (lapIds: number[], options?: LapAlignmentOptions) => Promise<string>;
+                getTelemetryCacheStats: () => Promise<string>;
                 // Race Engineer endpoints
                 getTrackViewStats: () => Promise<string>;
                 getCarViewStats: () => Promise<string>;
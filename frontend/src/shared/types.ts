@@ -342,6 +342,83 @@ export interface TrackPathPoint {
     y: number;
 }
 
+// Column-oriented telemetry (getLapTelemetry / compareLaps with { version: 2 }).
+// With encoding 'base64' every array is a base64 little-endian Float32 buffer.
+// `channels` takes channel names and groups; 'trackpath' asks for the map.
+export type TelemetryChannelGroup = 'overview' | 'engine' | 'tires' | 'brakes' | 'rideHeight' | 'context' | 'all';
+
+export interface TelemetryResponseOptions {
+    version?: 1 | 2;
+    encoding?: 'json' | 'base64';
+    points?: number;                             // thin every series to at most this many samples
+    window?: [number | null, number | null];     // lap distance range in metres
+    channels?: (TelemetryChannelGroup | 'trackpath' | string)[];   // default 'all' for version 1, else 'overview'
+}
+
+export interface TelemetrySeriesMeta {
+    channel: string;
+    key: string;        // where the series sits in a version 1 response
+    corner?: 'fl' | 'fr' | 'rl' | 'rr';
+    label: string;
+    stepped: boolean;
+    colors: string[];   // one per lap
+}
+
+export type TelemetryColumn = (number | null)[] | string;
+
+export interface LapTelemetryColumns {
+    lapId: number;
+    sampleCount: number;
+    distance?: TelemetryColumn;                    // shared by every series...
+    distances?: Record<string, TelemetryColumn>;   // ...or one per series when thinned to `points`
+    channels: Record<string, TelemetryColumn>;
+    trackpath: { x: TelemetryColumn; y: TelemetryColumn; distance?: TelemetryColumn } | null;
+}
+
+export interface ColumnarTelemetryData {
+    version: 2;
+    encoding: 'json' | 'base64';
+    points: number | null;
+    window: [number | null, number | null] | null;
+    channels: string[];
+    series: TelemetrySeriesMeta[];
+    laps: LapTelemetryColumns[];
+}
+
+// compareLapsAligned: every lap resampled onto one distance grid. Grid
+// position k sits at start + k * step metres; `delta` (seconds, positive when
+// slower) and `differences` are measured against the reference lap and are
+// null for the reference itself.
+export interface LapAlignmentOptions {
+    encoding?: 'json' | 'base64';
+    points?: number;                             // grid size (default 2000)
+    step?: number;                               // grid spacing in metres, instead of points
+    window?: [number | null, number | null];
+    reference?: number;                          // lap id; default the first lap
+    channels?: (TelemetryChannelGroup | string)[];   // default 'overview'
+}
+
+export interface AlignedLap {
+    lapId: number;
+    lapNumber: number | null;
+    lapTime: number | null;
+    channels: Record<string, TelemetryColumn>;
+    delta: TelemetryColumn | null;
+    differences: Record<string, TelemetryColumn> | null;
+}
+
+export interface AlignedLapComparison {
+    version: 2;
+    encoding: 'json' | 'base64';
+    reference: number | null;
+    grid: { start: number; step: number; count: number };
+    window: [number | null, number | null] | null;
+    channels: string[];
+    series: TelemetrySeriesMeta[];
+    laps: AlignedLap[];
+    missing: number[];                           // laps without telemetry
+}
+
 export interface LapTelemetryData {
     telemetry: {
         // Core telemetry channels
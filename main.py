@@ -5,13 +5,16 @@ import os
 import sys
 import subprocess
 from rw_backend.core.api_bridge import ApiBridge
-from rw_backend.database.manager import initialize_database
+from rw_backend.database.manager import initialize_database, configure_database, READER
+from rw_backend.api.telemetry_cache import telemetry_cache, format_stats
 
 daemon_process = None
 
 def main():
     global daemon_process
     initialize_database()
+    # The daemon owns the writes; the UI's connections only read.
+    configure_database(READER)
 
     print("[Main] Launching background daemon process...", flush=True)
     try:
@@ -44,6 +47,7 @@ def main():
     window = webview.create_window('RaceWorkshop', url, js_api=api_bridge, width=1600, height=1200, min_size=(1024, 768))
     
     def on_closing():
+        print(f"[Main] Telemetry cache: {format_stats(telemetry_cache.stats())}.", flush=True)
         print("[Main] Window is closing. Terminating daemon process...", flush=True)
         if daemon_process:
             daemon_process.terminate()
@@ -2,8 +2,11 @@
 
 import json
 # --- CHANGE START: Import the new detail mapper ---
-from rw_backend.database.models import Session, Track, Car, Simulator
+from rw_backend.database.models import Session, Stint, Lap, Track, Car, Simulator
 from rw_backend.dtos.session_dtos import map_session_to_summary_dto, map_session_to_detail_dto
+from rw_backend.database.shards import delete_session
+from rw_backend.database.manager import writable
+from rw_backend.api.telemetry_cache import telemetry_cache
 # --- CHANGE END ---
 
 class SessionApi:
@@ -44,4 +47,22 @@ class SessionApi:
             # --- CHANGE END ---
         except Exception as e:
             print(f"Error fetching session detail: {e}", flush=True)
-            return json.dumps(None)
\ No newline at end of file
+            return json.dumps(None)
+
+    def deleteSession(self, sessionId):
+        """
+        Deletes a session with its stints, laps and telemetry. The telemetry
+        is a per-session shard file, so this is a row delete plus an unlink.
+        """
+        print(f"API CALL: deleteSession for session {sessionId}", flush=True)
+        try:
+            session_id = int(sessionId)
+            lap_ids = [lap_id for (lap_id,) in Lap.select(Lap.id).join(Stint).where(Stint.session == session_id).tuples()]
+            # The UI's connections are read-only; this is its one deliberate write.
+            with writable():
+                freed = delete_session(session_id)
+            telemetry_cache.invalidate(lap_ids)
+            return json.dumps({'deleted': True, 'telemetryBytesFreed': freed})
+        except Exception as e:
+            print(f"Error deleting session: {e}", flush=True)
+            return json.dumps({'deleted': False})
@@ -1,376 +1,448 @@
 # rw_backend/api/telemetry_api.py
 
+import base64
 import json
-from rw_backend.database.models import LapTelemetry
+import operator
+import sys
+from array import array
+from rw_backend.database.lap_channels import load_lap_channels
+from rw_backend.database.models import Lap
+from rw_backend.services.chart_downsampling import MIN_POINTS, chart_path, chart_series, window_bounds
+from rw_backend.services.lap_comparison import TIME_CHANNEL, compare_laps
+from rw_backend.api.telemetry_cache import telemetry_cache
+
+# Response formats, picked with options={'version': ...}:
+#   1  (default) one {'x': distance, 'y': value} object per sample and series,
+#      the shape the current frontend draws from.
+#   2  column-oriented: the series metadata once, then per lap one distance
+#      array and one array per channel, as JSON lists or, with
+#      options={'encoding': 'base64'}, base64 little-endian Float32 buffers
+#      (new Float32Array(bytes) in the browser).
+#
+# Either version also takes options={'points': n} to thin every series to at
+# most n samples (about the chart's width in pixels) and {'window': [start,
+# end]} to return only that stretch of the lap, in metres; zooming in asks
+# for a narrower window at the same point count. See chart_downsampling.py.
+#
+# options={'channels': [...]} limits a response to some channels, named one
+# by one or by group (CHANNEL_GROUPS, plus 'trackpath' for the map); only
+# those are read from the lap and built. Version 1 responses default to
+# 'all', the shape the current frontend expects; version 2 and aligned
+# comparisons default to 'overview', the lap view's first chart, with other
+# groups fetched when they are opened.
+#
+# compareLapsAligned returns any number of laps resampled onto one distance
+# grid (see lap_comparison.py), always column-oriented: the grid is given as
+# start, step and count instead of a distance array, and every lap but the
+# reference carries its delta-time trace and per-channel differences.
+RESPONSE_VERSIONS = (1, 2)
+JSON_ENCODING = "json"
+BASE64_ENCODING = "base64"
+
+# Chart series the UI expects: (response key, channel, label, stepped).
+SERIES = (
+    ('speed', 'speed', 'Speed', False),
+    ('throttle', 'throttle', 'Throttle', False),
+    ('brake', 'brake', 'Brake', False),
+    ('rpm', 'rpm', 'RPM', False),
+    ('gear', 'gear', 'Gear', True),
+    ('steering', 'steering', 'Steering', False),
+    ('fuelLevel', 'fuel_level', 'Fuel Level', False),
+)
+# Per-corner series: (response key, channel prefix, label).
+CORNER_SERIES = (
+    ('tirePressure', 'tire_pressure', 'Tire Pressure'),
+    ('tireWear', 'tire_wear', 'Tire Wear'),
+    ('tireTemp', 'tire_temp', 'Tire Temp'),
+    ('brakeTemp', 'brake_temp', 'Brake Temp'),
+    ('rideHeight', 'ride_height', 'Ride Height'),
+)
+CORNER_COLORS = {'fl': '#28a745', 'fr': '#17a2b8', 'rl': '#ffc107', 'rr': '#dc3545'}
+# Session context series: (response key, channel, label, color).
+CONTEXT_SERIES = (
+    ('timeIntoLap', 'time_into_lap', 'Time Into Lap', '#6f42c1'),
+    ('estimatedLapTime', 'estimated_lap_time', 'Estimated Lap Time', '#fd7e14'),
+    ('trackEdge', 'track_edge', 'Track Edge', '#0dcaf0'),
+)
+# Main channel colors; in a comparison the second lap gets its own set.
+LAP_COLORS = {'speed': '#007BFF', 'throttle': '#198754', 'brake': '#DC3545', 'rpm': '#6f42c1',
+              'gear': '#fd7e14', 'steering': '#0dcaf0', 'fuelLevel': '#FF6B35'}
+SECOND_LAP_COLORS = {'speed': '#FF6B35', 'throttle': '#FFD700', 'brake': '#FF69B4', 'rpm': '#00CED1',
+                     'gear': '#32CD32', 'steering': '#9370DB', 'fuelLevel': '#FF6B35'}
+# Laps after the second are told apart by one color across their channels.
+EXTRA_LAP_COLORS = ('#20c997', '#e83e8c', '#6610f2', '#adb5bd', '#795548', '#b5a000')
+
+def _v1_number(value):
+    """
+    A channel value for a version 1 point. Channels are stored as float32,
+    which json writes widened to a double (0.1 as 0.10000000149011612);
+    seven significant digits are all a float32 holds.
+    """
+    return float(f'{value:.7g}') if isinstance(value, float) else value
+
+def _series(label, color, dist, values, stepped=False) -> dict:
+    series = {'label': label, 'data': [], 'borderColor': color, 'interpolate': True}
+    if stepped:
+        series['stepped'] = True
+    if values is not None:
+        series['data'] = [{'x': _v1_number(x), 'y': _v1_number(y)} for x, y in zip(dist, values)]
+    return series
+
+def _build_lap_telemetry(columns, colors, points=None, window=None, channels=None,
+                         with_trackpath=True) -> tuple[dict, list]:
+    """
+    Builds the BFF (Backend for Frontend) telemetry and track path from a lap's
+    channel arrays; `columns` is None for a lap without telemetry. Only the
+    series of `channels` (default all) are built.
+    """
+    channels = SERIES_CHANNELS if channels is None else channels
+    view = chart_series(columns, channels, points, window, STEPPED_CHANNELS) if columns else {}
+    channel = lambda name: view.get(name, (None, None))
+
+    telemetry = {}
+    for key, name, label, stepped in SERIES:
+        if name in channels:
+            telemetry[key] = _series(label, colors[key], *channel(name), stepped)
+    for key, prefix, label in CORNER_SERIES:
+        corners = {
+            corner: _series(f"{label} {corner.upper()}", color, *channel(f"{prefix}_{corner}"))
+            for corner, color in CORNER_COLORS.items() if f"{prefix}_{corner}" in channels
+        }
+        if corners:
+            telemetry[key] = corners
+    for key, name, label, color in CONTEXT_SERIES:
+        if name in channels:
+            telemetry[key] = _series(label, color, *channel(name))
+
+    trackpath = []
+    if columns and with_trackpath:
+        # Use Z for the 2D map's Y-axis
+        trackpath = [{'distance': _v1_number(d), 'x': _v1_number(-x), 'y': _v1_number(z)}
+                     for d, x, z in zip(*chart_path(columns, points, window))]
+    return telemetry, trackpath
+
+def _response_options(options, default_channels: str | None = None) -> dict:
+    """
+    The version, encoding, points, window and channels asked for; `options`
+    is a dict (or its JSON) or None.
+    """
+    if isinstance(options, str):
+        options = json.loads(options)
+    options = options or {}
+    version = int(options.get('version', 1))
+    encoding = options.get('encoding', JSON_ENCODING)
+    if version not in RESPONSE_VERSIONS:
+        raise ValueError(f"Unknown telemetry response version {version}.")
+    if encoding not in (JSON_ENCODING, BASE64_ENCODING):
+        raise ValueError(f"Unknown telemetry encoding '{encoding}'.")
+    points = options.get('points')
+    if points is not None:
+        points = int(points)
+        if points < MIN_POINTS:
+            raise ValueError(f"At least {MIN_POINTS} points are needed, got {points}.")
+    window = options.get('window')
+    if window is not None:
+        start, end = (None if edge is None else float(edge) for edge in window)
+        if start is not None and end is not None and start >= end:
+            raise ValueError(f"Empty telemetry window {window}.")
+        window = (start, end)
+    default_channels = default_channels or ('all' if version == 1 else OVERVIEW)
+    channels, trackpath = _resolve_channels(options.get('channels', default_channels))
+    return {'version': version, 'encoding': encoding, 'points': points, 'window': window,
+            'channels': channels, 'trackpath': trackpath}
+
+def _resolve_channels(names) -> tuple[tuple, bool]:
+    """The series channels (in SERIES_CHANNELS order) named by channel or group, and whether the track path is."""
+    if isinstance(names, str):
+        names = [names]
+    wanted = set()
+    for name in names:
+        if name in CHANNEL_GROUPS:
+            wanted.update(CHANNEL_GROUPS[name])
+        elif name in SERIES_CHANNELS or name == TRACKPATH:
+            wanted.add(name)
+        else:
+            raise ValueError(f"Unknown telemetry channel or group '{name}'.")
+    return tuple(name for name in SERIES_CHANNELS if name in wanted), TRACKPATH in wanted
+
+def _lap_channels_needed(options: dict) -> tuple:
+    """The stored channels a response reads."""
+    return (*options['channels'], *(('pos_x', 'pos_z') if options['trackpath'] else ()))
+
+def _series_meta(color_sets, channels=None) -> list[dict]:
+    """
+    Every chart series (of `channels`, default all) once: its channel, where
+    it sits in a version 1 response (key, and corner for per-corner series),
+    label, whether it is stepped, and one color per lap.
+    """
+    meta = []
+    for key, name, label, stepped in SERIES:
+        meta.append({'channel': name, 'key': key, 'label': label, 'stepped': stepped,
+                     'colors': [colors[key] for colors in color_sets]})
+    for key, prefix, label in CORNER_SERIES:
+        for corner, color in CORNER_COLORS.items():
+            meta.append({'channel': f"{prefix}_{corner}", 'key': key, 'corner': corner,
+                         'label': f"{label} {corner.upper()}", 'stepped': False, 'colors': [color] * len(color_sets)})
+    for key, name, label, color in CONTEXT_SERIES:
+        meta.append({'channel': name, 'key': key, 'label': label, 'stepped': False,
+                     'colors': [color] * len(color_sets)})
+    if channels is not None:
+        meta = [entry for entry in meta if entry['channel'] in channels]
+    return meta
+
+def _lap_colors(count: int) -> list[dict]:
+    """One color set per lap of a comparison."""
+    extra = [dict.fromkeys(LAP_COLORS, EXTRA_LAP_COLORS[i % len(EXTRA_LAP_COLORS)]) for i in range(max(0, count - 2))]
+    return [LAP_COLORS, SECOND_LAP_COLORS, *extra][:count]
+
+SERIES_CHANNELS = tuple(entry['channel'] for entry in _series_meta([LAP_COLORS]))
+STEPPED_CHANNELS = {name for _, name, _, stepped in SERIES if stepped}
+
+TRACKPATH = 'trackpath'
+OVERVIEW = 'overview'
+# Groups options={'channels': [...]} can name; the lap view opens on 'overview'.
+CHANNEL_GROUPS = {
+    OVERVIEW: ('speed', 'throttle', 'brake', 'gear', 'steering', TRACKPATH),
+    'engine': ('rpm', 'fuel_level'),
+    'tires': tuple(f"{prefix}_{corner}" for prefix in ('tire_pressure', 'tire_wear', 'tire_temp')
+                   for corner in CORNER_COLORS),
+    'brakes': tuple(f"brake_temp_{corner}" for corner in CORNER_COLORS),
+    'rideHeight': tuple(f"ride_height_{corner}" for corner in CORNER_COLORS),
+    'context': tuple(name for _, name, _, _ in CONTEXT_SERIES),
+    'all': (*SERIES_CHANNELS, TRACKPATH),
+}
+
+def _encode(values: array, encoding: str):
+    if encoding == BASE64_ENCODING:
+        floats = values if values.typecode == 'f' else array('f', values)
+        if sys.byteorder == 'big':
+            floats = array('f', floats)
+            floats.byteswap()
+        return base64.b64encode(floats.tobytes()).decode('ascii')
+    values = values.tolist()
+    # JSON has no NaN; missing samples go out as null.
+    if any(value != value for value in values):
+        values = [None if value != value else value for value in values]
+    return values
+
+def _build_lap_columns(lap_id: int, columns, encoding: str, points=None, window=None,
+                       channels=SERIES_CHANNELS, with_trackpath=True) -> dict:
+    """
+    One lap of a version 2 response; `columns` is None for a lap without
+    telemetry. Every series shares one distance array, except when thinned
+    to `points`: each series then keeps its own samples, so `distances`
+    holds one array per channel and the track path carries its own.
+    """
+    if not columns:
+        columns = {name: array('f') for name in ('lap_dist', 'pos_x', 'pos_z', *channels)}
+    view = chart_series(columns, channels, points, window, STEPPED_CHANNELS)
+    lap = {
+        'lapId': lap_id,
+        'sampleCount': len(columns['lap_dist']),
+        'channels': {name: _encode(values, encoding) for name, (_, values) in view.items()},
+        'trackpath': None,
+    }
+    if points is None:
+        lo, hi = window_bounds(columns['lap_dist'], *(window or (None, None)))
+        lap['distance'] = _encode(columns['lap_dist'][lo:hi], encoding)
+    else:
+        lap['distances'] = {name: _encode(dist, encoding) for name, (dist, _) in view.items()}
+    if with_trackpath:
+        path_dist, path_x, path_z = chart_path(columns, points, window)
+        # Use Z for the 2D map's Y-axis
+        lap['trackpath'] = {'x': _encode(array('f', map(operator.neg, path_x)), encoding),
+                            'y': _encode(path_z, encoding)}
+        if points is not None:
+            lap['trackpath']['distance'] = _encode(path_dist, encoding)
+    return lap
+
+def _columnar_response(laps, color_sets, options: dict) -> str:
+    """A version 2 response for (lap id, channel columns) pairs."""
+    encoding, points, window = options['encoding'], options['points'], options['window']
+    channels, trackpath = options['channels'], options['trackpath']
+    return json.dumps({
+        'version': 2,
+        'encoding': encoding,
+        'points': points,
+        'window': window,
+        'channels': list(channels),
+        'series': _series_meta(color_sets, channels),
+        'laps': [_build_lap_columns(lap_id, columns, encoding, points, window, channels, trackpath)
+                 for lap_id, columns in laps],
+    })
+
+def _comparison_options(options) -> dict:
+    """
+    The response options of compareLapsAligned, plus the grid `step` in
+    metres (which overrides `points`, the grid size) and the `reference` lap.
+    """
+    if isinstance(options, str):
+        options = json.loads(options)
+    options = dict(options or {})
+    step = options.pop('step', None)
+    reference = options.pop('reference', None)
+    options.pop('version', None)
+    options = _response_options(options, default_channels=OVERVIEW)
+    if step is not None:
+        step = float(step)
+        if not step > 0:
+            raise ValueError(f"The grid step must be positive, got {step}.")
+    options['step'] = step
+    options['reference'] = None if reference is None else int(reference)
+    return options
+
+def _aligned_response(lap_ids: list[int], options: dict) -> str:
+    """The compareLapsAligned response for `lap_ids`; laps without telemetry are listed under 'missing'."""
+    encoding = options['encoding']
+    reference = lap_ids[0] if options['reference'] is None else options['reference']
+    if reference not in lap_ids:
+        raise ValueError(f"Reference lap {reference} is not one of the compared laps.")
+    channels = options['channels']
+    laps = [(lap_id, load_lap_channels(lap_id, (*channels, TIME_CHANNEL))) for lap_id in lap_ids]
+    aligned = [(lap_id, columns) for lap_id, columns in laps if columns and len(columns['lap_dist']) > 1]
+    ids = [lap_id for lap_id, _ in aligned]
+    if reference not in ids:
+        raise ValueError(f"Reference lap {reference} has no telemetry.")
+    comparison = compare_laps([columns for _, columns in aligned], channels, STEPPED_CHANNELS,
+                              ids.index(reference), options['points'], options['step'], options['window'])
+    records = {lap.id: lap for lap in Lap.select().where(Lap.id.in_(ids))}
+
+    response_laps = []
+    for i, lap_id in enumerate(ids):
+        record = records.get(lap_id)
+        lap = {
+            'lapId': lap_id,
+            'lapNumber': record.lap_number if record else None,
+            'lapTime': record.lap_time if record else None,
+            'channels': {name: _encode(values, encoding) for name, values in comparison['channels'][i].items()},
+            'delta': None,
+            'differences': None,
+        }
+        if lap_id != reference:
+            lap['delta'] = _encode(comparison['deltas'][i], encoding)
+            lap['differences'] = {name: _encode(values, encoding)
+                                  for name, values in comparison['differences'][i].items()}
+        response_laps.append(lap)
+    return json.dumps({
+        'version': 2,
+        'encoding': encoding,
+        'reference': reference,
+        'grid': {'start': comparison['start'], 'step': comparison['step'], 'count': comparison['count']},
+        'window': options['window'],
+        'channels': list(channels),
+        'series': _series_meta(_lap_colors(len(ids)), channels),
+        'laps': response_laps,
+        'missing': [lap_id for lap_id in lap_ids if lap_id not in ids],
+    })
+
+def _lap_response(lap_id: int, options: dict) -> str:
+    """The getLapTelemetry response for one lap."""
+    # One record per lap: the channels come back as typed arrays.
+    columns = load_lap_channels(lap_id, _lap_channels_needed(options))
+    if not columns:
+        print(f"No telemetry data found for lap_id: {lap_id}", flush=True)
+    if options['version'] == 2:
+        return _columnar_response([(lap_id, columns)], [LAP_COLORS], options)
+
+    telemetry, trackpath = _build_lap_telemetry(columns, LAP_COLORS, options['points'], options['window'],
+                                                options['channels'], options['trackpath'])
+    return json.dumps({'telemetry': telemetry, 'trackpath': trackpath})
+
+def _comparison_response(lap_ids: list[int], options: dict) -> str:
+    """The compareLaps response for two laps."""
+    needed = _lap_channels_needed(options)
+    if options['version'] == 2:
+        laps = [(lap_id, load_lap_channels(lap_id, needed)) for lap_id in lap_ids]
+        return _columnar_response(laps, [LAP_COLORS, SECOND_LAP_COLORS], options)
+
+    response_data = {}
+    for key, lap_id, colors in zip(('lap1', 'lap2'), lap_ids, (LAP_COLORS, SECOND_LAP_COLORS)):
+        columns = load_lap_channels(lap_id, needed)
+        telemetry, trackpath = _build_lap_telemetry(columns, colors, options['points'], options['window'],
+                                                    options['channels'], options['trackpath'])
+        response_data[key] = {'lapId': lap_id, 'telemetry': telemetry, 'trackpath': trackpath}
+        if not columns:
+            print(f"No telemetry data found for lap_id: {lap_id}", flush=True)
+    return json.dumps(response_data)
+
+def _empty_response(options, version_1: dict) -> str:
+    """The empty response for an error, in the version asked for if that can be told."""
+    try:
+        options = _response_options(options)
+    except (ValueError, TypeError):
+        options = {'version': 1}
+    if options['version'] == 2:
+        return json.dumps({'version': 2, 'encoding': options['encoding'], 'points': options['points'],
+                           'window': options['window'], 'channels': list(options['channels']),
+                           'series': [], 'laps': []})
+    return json.dumps(version_1)
+
+def _empty_aligned_response(options) -> str:
+    """The empty compareLapsAligned response for an error, with the options asked for if they can be read."""
+    try:
+        options = _comparison_options(options)
+    except (ValueError, TypeError):
+        options = _comparison_options(None)
+    return json.dumps({'version': 2, 'encoding': options['encoding'], 'reference': None,
+                       'grid': {'start': 0.0, 'step': 0.0, 'count': 0}, 'window': options['window'],
+                       'channels': list(options['channels']), 'series': [], 'laps': [], 'missing': []})
 
 class TelemetryApi:
-    def getLapTelemetry(self, lapId):
+    def getLapTelemetry(self, lapId, options=None):
         """
         Fetches all telemetry for a given lap and transforms it into the
-        BFF (Backend for Frontend) JSON structure the UI expects.
+        BFF (Backend for Frontend) JSON structure the UI expects, or into the
+        column-oriented one with options={'version': 2}.
         """
         print(f"API CALL: getLapTelemetry for lap {lapId}", flush=True)
         try:
             lap_id_int = int(lapId)
-
-            query = (LapTelemetry
-                     .select()
-                     .where(LapTelemetry.lap == lap_id_int)
-                     .order_by(LapTelemetry.lap_dist)
-                     .dicts())
-
-            # Initialize the final JSON structure with separate keys
-            response_data = {
-                'telemetry': {
-                    'speed':    {'label': 'Speed', 'data': [], 'borderColor': '#007BFF', 'interpolate': True},
-                    'throttle': {'label': 'Throttle', 'data': [], 'borderColor': '#198754', 'interpolate': True},
-                    'brake':    {'label': 'Brake', 'data': [], 'borderColor': '#DC3545', 'interpolate': True},
-                    'rpm':      {'label': 'RPM', 'data': [], 'borderColor': '#6f42c1', 'interpolate': True},
-                    'gear':     {'label': 'Gear', 'data': [], 'borderColor': '#fd7e14', 'interpolate': True, 'stepped': True},
-                    'steering': {'label': 'Steering', 'data': [], 'borderColor': '#0dcaf0', 'interpolate': True},
-                    'fuelLevel': {'label': 'Fuel Level', 'data': [], 'borderColor': '#FF6B35', 'interpolate': True},
-                    'tirePressure': {
-                        'fl': {'label': 'Tire Pressure FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                        'fr': {'label': 'Tire Pressure FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                        'rl': {'label': 'Tire Pressure RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                        'rr': {'label': 'Tire Pressure RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                    },
-                    'tireWear': {
-                        'fl': {'label': 'Tire Wear FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                        'fr': {'label': 'Tire Wear FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                        'rl': {'label': 'Tire Wear RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                        'rr': {'label': 'Tire Wear RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                    },
-                    'tireTemp': {
-                        'fl': {'label': 'Tire Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                        'fr': {'label': 'Tire Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                        'rl': {'label': 'Tire Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                        'rr': {'label': 'Tire Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                    },
-                    'brakeTemp': {
-                        'fl': {'label': 'Brake Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                        'fr': {'label': 'Brake Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                        'rl': {'label': 'Brake Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                        'rr': {'label': 'Brake Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                    },
-                    'rideHeight': {
-                        'fl': {'label': 'Ride Height FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                        'fr': {'label': 'Ride Height FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                        'rl': {'label': 'Ride Height RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                        'rr': {'label': 'Ride Height RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                    },
-                    'timeIntoLap': {'label': 'Time Into Lap', 'data': [], 'borderColor': '#6f42c1', 'interpolate': True},
-                    'estimatedLapTime': {'label': 'Estimated Lap Time', 'data': [], 'borderColor': '#fd7e14', 'interpolate': True},
-                    'trackEdge': {'label': 'Track Edge', 'data': [], 'borderColor': '#0dcaf0', 'interpolate': True},
-                },
-                'trackpath': []
-            }
-
-            # Fetch all rows from the database in one go
-            all_rows = list(query)
-
-            # Efficiently build the data arrays
-            for row in all_rows:
-                dist = row['lap_dist']
-                
-                # Append to telemetry channels
-                response_data['telemetry']['speed']['data'].append({'x': dist, 'y': row['speed']})
-                response_data['telemetry']['throttle']['data'].append({'x': dist, 'y': row['throttle']})
-                response_data['telemetry']['brake']['data'].append({'x': dist, 'y': row['brake']})
-                response_data['telemetry']['rpm']['data'].append({'x': dist, 'y': row['rpm']})
-                response_data['telemetry']['gear']['data'].append({'x': dist, 'y': row['gear']})
-                response_data['telemetry']['steering']['data'].append({'x': dist, 'y': row['steering']})
-                response_data['telemetry']['fuelLevel']['data'].append({'x': dist, 'y': row['fuel_level']})
-                
-                # Tire pressures
-                response_data['telemetry']['tirePressure']['fl']['data'].append({'x': dist, 'y': row['tire_pressure_fl']})
-                response_data['telemetry']['tirePressure']['fr']['data'].append({'x': dist, 'y': row['tire_pressure_fr']})
-                response_data['telemetry']['tirePressure']['rl']['data'].append({'x': dist, 'y': row['tire_pressure_rl']})
-                response_data['telemetry']['tirePressure']['rr']['data'].append({'x': dist, 'y': row['tire_pressure_rr']})
-                
-                # Tire wear
-                response_data['telemetry']['tireWear']['fl']['data'].append({'x': dist, 'y': row['tire_wear_fl']})
-                response_data['telemetry']['tireWear']['fr']['data'].append({'x': dist, 'y': row['tire_wear_fr']})
-                response_data['telemetry']['tireWear']['rl']['data'].append({'x': dist, 'y': row['tire_wear_rl']})
-                response_data['telemetry']['tireWear']['rr']['data'].append({'x': dist, 'y': row['tire_wear_rr']})
-                
-                # Tire temps
-                response_data['telemetry']['tireTemp']['fl']['data'].append({'x': dist, 'y': row['tire_temp_fl']})
-                response_data['telemetry']['tireTemp']['fr']['data'].append({'x': dist, 'y': row['tire_temp_fr']})
-                response_data['telemetry']['tireTemp']['rl']['data'].append({'x': dist, 'y': row['tire_temp_rl']})
-                response_data['telemetry']['tireTemp']['rr']['data'].append({'x': dist, 'y': row['tire_temp_rr']})
-                
-                # Brake temps
-                response_data['telemetry']['brakeTemp']['fl']['data'].append({'x': dist, 'y': row['brake_temp_fl']})
-                response_data['telemetry']['brakeTemp']['fr']['data'].append({'x': dist, 'y': row['brake_temp_fr']})
-                response_data['telemetry']['brakeTemp']['rl']['data'].append({'x': dist, 'y': row['brake_temp_rl']})
-                response_data['telemetry']['brakeTemp']['rr']['data'].append({'x': dist, 'y': row['brake_temp_rr']})
-                
-                # Ride height
-                response_data['telemetry']['rideHeight']['fl']['data'].append({'x': dist, 'y': row['ride_height_fl']})
-                response_data['telemetry']['rideHeight']['fr']['data'].append({'x': dist, 'y': row['ride_height_fr']})
-                response_data['telemetry']['rideHeight']['rl']['data'].append({'x': dist, 'y': row['ride_height_rl']})
-                response_data['telemetry']['rideHeight']['rr']['data'].append({'x': dist, 'y': row['ride_height_rr']})
-                
-                # Session context fields
-                response_data['telemetry']['timeIntoLap']['data'].append({'x': dist, 'y': row['time_into_lap']})
-                response_data['telemetry']['estimatedLapTime']['data'].append({'x': dist, 'y': row['estimated_lap_time']})
-                response_data['telemetry']['trackEdge']['data'].append({'x': dist, 'y': row['track_edge']})
-
-                # Append to the track path
-                response_data['trackpath'].append({
-                    'distance': dist,
-                    'x': -row['pos_x'],
-                    'y': row['pos_z'] # Use Z for the 2D map's Y-axis
-                })
-
-            if not all_rows:
-                print(f"No telemetry data found for lap_id: {lap_id_int}", flush=True)
-            
-            return json.dumps(response_data)
+            options = _response_options(options)
+            return telemetry_cache.get(('lap', lap_id_int, *sorted(options.items())), [lap_id_int],
+                                       lambda: _lap_response(lap_id_int, options))
 
         except Exception as e:
             print(f"Error fetching lap telemetry: {e}", flush=True)
-            return json.dumps({'telemetry': {}, 'trackpath': []}) # Return empty valid structure on error
+            return _empty_response(options, {'telemetry': {}, 'trackpath': []}) # Return empty valid structure on error
 
-    def compareLaps(self, lapId1, lapId2):
+    def compareLaps(self, lapId1, lapId2, options=None):
         """
-        Fetches telemetry data for two laps and returns them in a comparison format.
+        Fetches telemetry data for two laps and returns them in a comparison
+        format; options={'version': 2} gives the column-oriented one.
         """
         print(f"API CALL: compareLaps for laps {lapId1} and {lapId2}", flush=True)
         try:
-            lap_id_1_int = int(lapId1)
-            lap_id_2_int = int(lapId2)
-
-            # Fetch data for both laps
-            query1 = (LapTelemetry
-                     .select()
-                     .where(LapTelemetry.lap == lap_id_1_int)
-                     .order_by(LapTelemetry.lap_dist)
-                     .dicts())
-            
-            query2 = (LapTelemetry
-                     .select()
-                     .where(LapTelemetry.lap == lap_id_2_int)
-                     .order_by(LapTelemetry.lap_dist)
-                     .dicts())
-
-            # Initialize the comparison response structure
-            response_data = {
-                'lap1': {
-                    'lapId': lap_id_1_int,
-                    'telemetry': {
-                        'speed':    {'label': 'Speed', 'data': [], 'borderColor': '#007BFF', 'interpolate': True},
-                        'throttle': {'label': 'Throttle', 'data': [], 'borderColor': '#198754', 'interpolate': True},
-                        'brake':    {'label': 'Brake', 'data': [], 'borderColor': '#DC3545', 'interpolate': True},
-                        'rpm':      {'label': 'RPM', 'data': [], 'borderColor': '#6f42c1', 'interpolate': True},
-                        'gear':     {'label': 'Gear', 'data': [], 'borderColor': '#fd7e14', 'interpolate': True, 'stepped': True},
-                        'steering': {'label': 'Steering', 'data': [], 'borderColor': '#0dcaf0', 'interpolate': True},
-                        'fuelLevel': {'label': 'Fuel Level', 'data': [], 'borderColor': '#FF6B35', 'interpolate': True},
-                        'tirePressure': {
-                            'fl': {'label': 'Tire Pressure FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Pressure FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Pressure RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Pressure RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'tireWear': {
-                            'fl': {'label': 'Tire Wear FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Wear FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Wear RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Wear RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'tireTemp': {
-                            'fl': {'label': 'Tire Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'brakeTemp': {
-                            'fl': {'label': 'Brake Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Brake Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Brake Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Brake Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'rideHeight': {
-                            'fl': {'label': 'Ride Height FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Ride Height FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Ride Height RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Ride Height RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'timeIntoLap': {'label': 'Time Into Lap', 'data': [], 'borderColor': '#6f42c1', 'interpolate': True},
-                        'estimatedLapTime': {'label': 'Estimated Lap Time', 'data': [], 'borderColor': '#fd7e14', 'interpolate': True},
-                        'trackEdge': {'label': 'Track Edge', 'data': [], 'borderColor': '#0dcaf0', 'interpolate': True},
-                    },
-                    'trackpath': []
-                },
-                'lap2': {
-                    'lapId': lap_id_2_int,
-                    'telemetry': {
-                        'speed':    {'label': 'Speed', 'data': [], 'borderColor': '#FF6B35', 'interpolate': True},
-                        'throttle': {'label': 'Throttle', 'data': [], 'borderColor': '#FFD700', 'interpolate': True},
-                        'brake':    {'label': 'Brake', 'data': [], 'borderColor': '#FF69B4', 'interpolate': True},
-                        'rpm':      {'label': 'RPM', 'data': [], 'borderColor': '#00CED1', 'interpolate': True},
-                        'gear':     {'label': 'Gear', 'data': [], 'borderColor': '#32CD32', 'interpolate': True, 'stepped': True},
-                        'steering': {'label': 'Steering', 'data': [], 'borderColor': '#9370DB', 'interpolate': True},
-                        'fuelLevel': {'label': 'Fuel Level', 'data': [], 'borderColor': '#FF6B35', 'interpolate': True},
-                        'tirePressure': {
-                            'fl': {'label': 'Tire Pressure FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Pressure FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Pressure RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Pressure RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'tireWear': {
-                            'fl': {'label': 'Tire Wear FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Wear FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Wear RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Wear RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'tireTemp': {
-                            'fl': {'label': 'Tire Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Tire Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Tire Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Tire Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'brakeTemp': {
-                            'fl': {'label': 'Brake Temp FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Brake Temp FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Brake Temp RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Brake Temp RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'rideHeight': {
-                            'fl': {'label': 'Ride Height FL', 'data': [], 'borderColor': '#28a745', 'interpolate': True},
-                            'fr': {'label': 'Ride Height FR', 'data': [], 'borderColor': '#17a2b8', 'interpolate': True},
-                            'rl': {'label': 'Ride Height RL', 'data': [], 'borderColor': '#ffc107', 'interpolate': True},
-                            'rr': {'label': 'Ride Height RR', 'data': [], 'borderColor': '#dc3545', 'interpolate': True}
-                        },
-                        'timeIntoLap': {'label': 'Time Into Lap', 'data': [], 'borderColor': '#6f42c1', 'interpolate': True},
-                        'estimatedLapTime': {'label': 'Estimated Lap Time', 'data': [], 'borderColor': '#fd7e14', 'interpolate': True},
-                        'trackEdge': {'label': 'Track Edge', 'data': [], 'borderColor': '#0dcaf0', 'interpolate': True},
-                    },
-                    'trackpath': []
-                }
-            }
-
-            # Process lap 1 data
-            all_rows_1 = list(query1)
-            for row in all_rows_1:
-                dist = row['lap_dist']
-                
-                # Append to telemetry channels for lap 1
-                response_data['lap1']['telemetry']['speed']['data'].append({'x': dist, 'y': row['speed']})
-                response_data['lap1']['telemetry']['throttle']['data'].append({'x': dist, 'y': row['throttle']})
-                response_data['lap1']['telemetry']['brake']['data'].append({'x': dist, 'y': row['brake']})
-                response_data['lap1']['telemetry']['rpm']['data'].append({'x': dist, 'y': row['rpm']})
-                response_data['lap1']['telemetry']['gear']['data'].append({'x': dist, 'y': row['gear']})
-                response_data['lap1']['telemetry']['steering']['data'].append({'x': dist, 'y': row['steering']})
-                response_data['lap1']['telemetry']['fuelLevel']['data'].append({'x': dist, 'y': row['fuel_level']})
-                
-                # Tire pressures
-                response_data['lap1']['telemetry']['tirePressure']['fl']['data'].append({'x': dist, 'y': row['tire_pressure_fl']})
-                response_data['lap1']['telemetry']['tirePressure']['fr']['data'].append({'x': dist, 'y': row['tire_pressure_fr']})
-                response_data['lap1']['telemetry']['tirePressure']['rl']['data'].append({'x': dist, 'y': row['tire_pressure_rl']})
-                response_data['lap1']['telemetry']['tirePressure']['rr']['data'].append({'x': dist, 'y': row['tire_pressure_rr']})
-                
-                # Tire wear
-                response_data['lap1']['telemetry']['tireWear']['fl']['data'].append({'x': dist, 'y': row['tire_wear_fl']})
-                response_data['lap1']['telemetry']['tireWear']['fr']['data'].append({'x': dist, 'y': row['tire_wear_fr']})
-                response_data['lap1']['telemetry']['tireWear']['rl']['data'].append({'x': dist, 'y': row['tire_wear_rl']})
-                response_data['lap1']['telemetry']['tireWear']['rr']['data'].append({'x': dist, 'y': row['tire_wear_rr']})
-                
-                # Tire temps
-                response_data['lap1']['telemetry']['tireTemp']['fl']['data'].append({'x': dist, 'y': row['tire_temp_fl']})
-                response_data['lap1']['telemetry']['tireTemp']['fr']['data'].append({'x': dist, 'y': row['tire_temp_fr']})
-                response_data['lap1']['telemetry']['tireTemp']['rl']['data'].append({'x': dist, 'y': row['tire_temp_rl']})
-                response_data['lap1']['telemetry']['tireTemp']['rr']['data'].append({'x': dist, 'y': row['tire_temp_rr']})
-                
-                # Brake temps
-                response_data['lap1']['telemetry']['brakeTemp']['fl']['data'].append({'x': dist, 'y': row['brake_temp_fl']})
-                response_data['lap1']['telemetry']['brakeTemp']['fr']['data'].append({'x': dist, 'y': row['brake_temp_fr']})
-                response_data['lap1']['telemetry']['brakeTemp']['rl']['data'].append({'x': dist, 'y': row['brake_temp_rl']})
-                response_data['lap1']['telemetry']['brakeTemp']['rr']['data'].append({'x': dist, 'y': row['brake_temp_rr']})
-                
-                # Ride height
-                response_data['lap1']['telemetry']['rideHeight']['fl']['data'].append({'x': dist, 'y': row['ride_height_fl']})
-                response_data['lap1']['telemetry']['rideHeight']['fr']['data'].append({'x': dist, 'y': row['ride_height_fr']})
-                response_data['lap1']['telemetry']['rideHeight']['rl']['data'].append({'x': dist, 'y': row['ride_height_rl']})
-                response_data['lap1']['telemetry']['rideHeight']['rr']['data'].append({'x': dist, 'y': row['ride_height_rr']})
-                
-                # Session context fields
-                response_data['lap1']['telemetry']['timeIntoLap']['data'].append({'x': dist, 'y': row['time_into_lap']})
-                response_data['lap1']['telemetry']['estimatedLapTime']['data'].append({'x': dist, 'y': row['estimated_lap_time']})
-                response_data['lap1']['telemetry']['trackEdge']['data'].append({'x': dist, 'y': row['track_edge']})
-
-                # Append to track path for lap 1
-                response_data['lap1']['trackpath'].append({
-                    'distance': dist,
-                    'x': -row['pos_x'],
-                    'y': row['pos_z']
-                })
-
-            # Process lap 2 data
-            all_rows_2 = list(query2)
-            for row in all_rows_2:
-                dist = row['lap_dist']
-                
-                # Append to telemetry channels for lap 2
-                response_data['lap2']['telemetry']['speed']['data'].append({'x': dist, 'y': row['speed']})
-                response_data['lap2']['telemetry']['throttle']['data'].append({'x': dist, 'y': row['throttle']})
-                response_data['lap2']['telemetry']['brake']['data'].append({'x': dist, 'y': row['brake']})
-                response_data['lap2']['telemetry']['rpm']['data'].append({'x': dist, 'y': row['rpm']})
-                response_data['lap2']['telemetry']['gear']['data'].append({'x': dist, 'y': row['gear']})
-                response_data['lap2']['telemetry']['steering']['data'].append({'x': dist, 'y': row['steering']})
-                response_data['lap2']['telemetry']['fuelLevel']['data'].append({'x': dist, 'y': row['fuel_level']})
-                
-                # Tire pressures
-                response_data['lap2']['telemetry']['tirePressure']['fl']['data'].append({'x': dist, 'y': row['tire_pressure_fl']})
-                response_data['lap2']['telemetry']['tirePressure']['fr']['data'].append({'x': dist, 'y': row['tire_pressure_fr']})
-                response_data['lap2']['telemetry']['tirePressure']['rl']['data'].append({'x': dist, 'y': row['tire_pressure_rl']})
-                response_data['lap2']['telemetry']['tirePressure']['rr']['data'].append({'x': dist, 'y': row['tire_pressure_rr']})
-                
-                # Tire wear
-                response_data['lap2']['telemetry']['tireWear']['fl']['data'].append({'x': dist, 'y': row['tire_wear_fl']})
-                response_data['lap2']['telemetry']['tireWear']['fr']['data'].append({'x': dist, 'y': row['tire_wear_fr']})
-                response_data['lap2']['telemetry']['tireWear']['rl']['data'].append({'x': dist, 'y': row['tire_wear_rl']})
-                response_data['lap2']['telemetry']['tireWear']['rr']['data'].append({'x': dist, 'y': row['tire_wear_rr']})
-                
-                # Tire temps
-                response_data['lap2']['telemetry']['tireTemp']['fl']['data'].append({'x': dist, 'y': row['tire_temp_fl']})
-                response_data['lap2']['telemetry']['tireTemp']['fr']['data'].append({'x': dist, 'y': row['tire_temp_fr']})
-                response_data['lap2']['telemetry']['tireTemp']['rl']['data'].append({'x': dist, 'y': row['tire_temp_rl']})
-                response_data['lap2']['telemetry']['tireTemp']['rr']['data'].append({'x': dist, 'y': row['tire_temp_rr']})
-                
-                # Brake temps
-                response_data['lap2']['telemetry']['brakeTemp']['fl']['data'].append({'x': dist, 'y': row['brake_temp_fl']})
-                response_data['lap2']['telemetry']['brakeTemp']['fr']['data'].append({'x': dist, 'y': row['brake_temp_fr']})
-                response_data['lap2']['telemetry']['brakeTemp']['rl']['data'].append({'x': dist, 'y': row['brake_temp_rl']})
-                response_data['lap2']['telemetry']['brakeTemp']['rr']['data'].append({'x': dist, 'y': row['brake_temp_rr']})
-                
-                # Ride height
-                response_data['lap2']['telemetry']['rideHeight']['fl']['data'].append({'x': dist, 'y': row['ride_height_fl']})
-                response_data['lap2']['telemetry']['rideHeight']['fr']['data'].append({'x': dist, 'y': row['ride_height_fr']})
-                response_data['lap2']['telemetry']['rideHeight']['rl']['data'].append({'x': dist, 'y': row['ride_height_rl']})
-                response_data['lap2']['telemetry']['rideHeight']['rr']['data'].append({'x': dist, 'y': row['ride_height_rr']})
-                
-                # Session context fields
-                response_data['lap2']['telemetry']['timeIntoLap']['data'].append({'x': dist, 'y': row['time_into_lap']})
-                response_data['lap2']['telemetry']['estimatedLapTime']['data'].append({'x': dist, 'y': row['estimated_lap_time']})
-                response_data['lap2']['telemetry']['trackEdge']['data'].append({'x': dist, 'y': row['track_edge']})
-
-                # Append to track path for lap 2
-                response_data['lap2']['trackpath'].append({
-                    'distance': dist,
-                    'x': -row['pos_x'],
-                    'y': row['pos_z']
-                })
-
-            if not all_rows_1:
-                print(f"No telemetry data found for lap_id: {lap_id_1_int}", flush=True)
-            if not all_rows_2:
-                print(f"No telemetry data found for lap_id: {lap_id_2_int}", flush=True)
-            
-            return json.dumps(response_data)
+            lap_ids = [int(lapId1), int(lapId2)]
+            options = _response_options(options)
+            return telemetry_cache.get(('comparison', *lap_ids, *sorted(options.items())), lap_ids,
+                                       lambda: _comparison_response(lap_ids, options))
 
         except Exception as e:
             print(f"Error comparing laps: {e}", flush=True)
-            return json.dumps({'lap1': {'lapId': lapId1, 'telemetry': {}, 'trackpath': []}, 
-                             'lap2': {'lapId': lapId2, 'telemetry': {}, 'trackpath': []}})
\ No newline at end of file
+            return _empty_response(options, {'lap1': {'lapId': lapId1, 'telemetry': {}, 'trackpath': []},
+                                             'lap2': {'lapId': lapId2, 'telemetry': {}, 'trackpath': []}})
+
+    def compareLapsAligned(self, lapIds, options=None):
+        """
+        Resamples any number of laps onto one distance grid and returns their
+        channels with each lap's delta-time and channel differences to the
+        reference lap (options={'reference': lapId}, default the first).
+        """
+        print(f"API CALL: compareLapsAligned for laps {lapIds}", flush=True)
+        try:
+            if isinstance(lapIds, str):
+                lapIds = json.loads(lapIds)
+            lap_ids = list(dict.fromkeys(int(lap_id) for lap_id in lapIds))
+            if not lap_ids:
+                raise ValueError("No laps to compare.")
+            options = _comparison_options(options)
+            return telemetry_cache.get(('aligned', *lap_ids, *sorted(options.items())), lap_ids,
+                                       lambda: _aligned_response(lap_ids, options))
+
+        except Exception as e:
+            print(f"Error aligning laps: {e}", flush=True)
+            return _empty_aligned_response(options)
+
+    def getTelemetryCacheStats(self):
+        """Size and hit rate of the telemetry response cache."""
+        return json.dumps(telemetry_cache.stats())
@@ -0,0 +1,125 @@
+# rw_backend/api/telemetry_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+import peewee as pw
+from rw_backend.database.lap_channels import has_lap_channels
+from rw_backend.database.models import Lap, LapRetention
+
+# A lap's telemetry does not change once its channel record is written, and
+# analysts flip between the same few laps, so built responses are kept here,
+# least recently used first out once they exceed the byte budget
+# (RACEWORKSHOP_TELEMETRY_CACHE_MB, default 64; 0 turns the cache off).
+#
+# Two things can still change a lap: deleting it and the retention job. Both
+# show in the main database, which the daemon writes from another process,
+# so every hit is checked against the laps' current version: the Lap record
+# still existing and its LapRetention timestamp. That is one indexed query
+# instead of reading and rebuilding the telemetry.
+DEFAULT_MAX_MB = 64
+
+def lap_versions(lap_ids) -> tuple | None:
+    """The laps' current versions, or None if any of them no longer exists."""
+    versions = dict(Lap.select(Lap.id, LapRetention.applied_at)
+                    .join(LapRetention, pw.JOIN.LEFT_OUTER)
+                    .where(Lap.id.in_(list(lap_ids)))
+                    .tuples())
+    if len(versions) != len(set(lap_ids)):
+        return None
+    return tuple(versions[lap_id] for lap_id in lap_ids)
+
+class TelemetryCache:
+    """
+    Built telemetry responses (JSON strings) keyed by the request, each
+    recorded against the laps it covers. Shared by the UI's API threads.
+    """
+    def __init__(self, max_bytes: int | None = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("RACEWORKSHOP_TELEMETRY_CACHE_MB", DEFAULT_MAX_MB)) * 1e6)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()   # key -> (lap ids, versions, response)
+        self._keys_by_lap = {}          # lap id -> keys of the entries covering it
+        self._lock = threading.Lock()
+
+    def get(self, key, lap_ids, build) -> str:
+        """
+        The response for `key`, from the cache if the laps have not changed
+        since it was built, else from `build()`. Only responses whose laps all
+        have a channel record are kept: laps still being written, and laps
+        without telemetry, can still change.
+        """
+        lap_ids = tuple(lap_ids)
+        versions = lap_versions(lap_ids) if self.max_bytes > 0 else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and versions is not None and entry[1] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        response = build()
+        if versions is not None and len(response) <= self.max_bytes and all(map(has_lap_channels, set(lap_ids))):
+            with self._lock:
+                self._store(key, lap_ids, versions, response)
+        return response
+
+    def _store(self, key, lap_ids, versions, response):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (lap_ids, versions, response)
+        for lap_id in lap_ids:
+            self._keys_by_lap.setdefault(lap_id, set()).add(key)
+        self.bytes += len(response)
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        lap_ids, _, response = self._entries.pop(key)
+        self.bytes -= len(response)
+        for lap_id in lap_ids:
+            keys = self._keys_by_lap.get(lap_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_lap[lap_id]
+
+    def invalidate(self, lap_ids) -> int:
+        """Drops every response covering one of `lap_ids`; returns how many."""
+        with self._lock:
+            keys = {key for lap_id in lap_ids for key in self._keys_by_lap.get(lap_id, ())}
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_lap.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'maxBytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'hitRate': self.hits / lookups if lookups else 0.0,
+                    'evictions': self.evictions, 'invalidations': self.invalidations}
+
+def format_stats(stats: dict) -> str:
+    return (f"{stats['entries']} responses, {stats['bytes'] / 1e6:.1f}/{stats['maxBytes'] / 1e6:.0f} MB, "
+            f"{stats['hits']} hits / {stats['misses']} misses ({stats['hitRate']:.0%}), "
+            f"{stats['evictions']} evicted, {stats['invalidations']} invalidated")
+
+# The UI process's cache, used by TelemetryApi and invalidated by SessionApi.
+telemetry_cache = TelemetryCache()
@@ -37,12 +37,21 @@ class ApiBridge:
     def getSessionDetail(self, sessionId):
         return self._session_api.getSessionDetail(sessionId)
 
+    def deleteSession(self, sessionId):
+        return self._session_api.deleteSession(sessionId)
+
     # Telemetry Methods
-    def getLapTelemetry(self, lapId):
-        return self._telemetry_api.getLapTelemetry(lapId)
+    def getLapTelemetry(self, lapId, options=None):
+        return self._telemetry_api.getLapTelemetry(lapId, options)
     
-    def compareLaps(self, lapId1, lapId2):
-        return self._telemetry_api.compareLaps(lapId1, lapId2)
+    def compareLaps(self, lapId1, lapId2, options=None):
+        return self._telemetry_api.compareLaps(lapId1, lapId2, options)
+
+    def compareLapsAligned(self, lapIds, options=None):
+        return self._telemetry_api.compareLapsAligned(lapIds, options)
+
+    def getTelemetryCacheStats(self):
+        return self._telemetry_api.getTelemetryCacheStats()
     
     # --- NEW pass-through method ---
     def getSimulatorList(self):
@@ -0,0 +1,105 @@
+# rw_backend/core/bounded_queue.py
+
+from queue import Queue, Full
+from time import monotonic
+
+DROP_OLDEST = "drop_oldest"
+COALESCE_LATEST = "coalesce_latest"
+BLOCK = "block"
+
+class BoundedQueue(Queue):
+    """
+    A Queue that holds at most `maxsize` droppable items.
+    When full, droppable items are handled by the overflow policy:
+
+    - drop_oldest: the oldest droppable item is discarded to make room.
+    - coalesce_latest: the new item replaces the newest queued item when
+      that item is droppable (falling back to drop_oldest otherwise), so
+      a slow consumer only ever sees the latest data.
+    - block: the producer waits for room, as with a bounded Queue (including
+      its `block`/`timeout` arguments and queue.Full). Used for replays,
+      where every frame should reach the handlers. close() releases waiting
+      producers when the consumer is gone.
+
+    Items for which `droppable(item)` is False (lifecycle events, the None
+    shutdown sentinel) are always queued immediately, even past the bound.
+    Producers include handlers putting chained events from the consumer
+    thread itself, which must never block.
+    """
+    def __init__(self, maxsize: int, policy: str = DROP_OLDEST, droppable=lambda item: True, name: str = "queue"):
+        if policy not in (DROP_OLDEST, COALESCE_LATEST, BLOCK):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        # The base class is left unbounded; the bound is enforced in put().
+        super().__init__()
+        self.bound = maxsize
+        self.policy = policy
+        self.droppable = droppable
+        self.name = name
+        self.high_water = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item, block=True, timeout=None):
+        with self.mutex:
+            if self.policy == BLOCK and self._is_droppable(item):
+                if not self._wait_for_room(block, timeout):
+                    self.dropped += 1
+                    return
+            elif len(self.queue) >= self.bound and self._is_droppable(item):
+                if not self._make_room(item):
+                    self.high_water = max(self.high_water, len(self.queue))
+                    return
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.high_water = max(self.high_water, len(self.queue))
+            self.not_empty.notify()
+
+    def _wait_for_room(self, block, timeout) -> bool:
+        """Waits for room as Queue.put does, raising Full; False if the queue was closed instead."""
+        if not block:
+            if len(self.queue) >= self.bound and not self.closed:
+                raise Full
+        elif timeout is None:
+            while len(self.queue) >= self.bound and not self.closed:
+                self.not_full.wait()
+        elif timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        else:
+            deadline = monotonic() + timeout
+            while len(self.queue) >= self.bound and not self.closed:
+                remaining = deadline - monotonic()
+                if remaining <= 0.0:
+                    raise Full
+                self.not_full.wait(remaining)
+        return not self.closed
+
+    def close(self):
+        """
+        For when nothing will drain the queue any more (shutdown): producers
+        waiting for room are released, and droppable items are dropped from
+        now on instead of waited for. Other items are still queued.
+        """
+        with self.mutex:
+            self.closed = True
+            self.not_full.notify_all()
+
+    def _make_room(self, item) -> bool:
+        """Applies the overflow policy. Returns False if the item was absorbed instead of appended."""
+        self.dropped += 1
+        if self.policy == COALESCE_LATEST and self.queue and self._is_droppable(self.queue[-1]):
+            self.queue[-1] = item
+            return False
+        for i, queued in enumerate(self.queue):
+            if self._is_droppable(queued):
+                del self.queue[i]
+                self.unfinished_tasks -= 1
+                return True
+        # Nothing queued may be dropped, so the incoming item is.
+        return False
+
+    def _is_droppable(self, item) -> bool:
+        return item is not None and self.droppable(item)
+
+    def stats(self) -> dict:
+        with self.mutex:
+            return {'depth': len(self.queue), 'high_water': self.high_water, 'dropped': self.dropped}
@@ -0,0 +1,65 @@
+# rw_backend/core/event_bus.py
+
+from time import perf_counter
+
+class HandlerTiming:
+    """Call count and time spent in one subscribed callback."""
+    __slots__ = ("name", "event_type", "calls", "total", "max")
+
+    def __init__(self, name: str, event_type: str):
+        self.name = name
+        self.event_type = event_type
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+class EventBus:
+    """
+    Routes each event to the callbacks subscribed to its exact type, so an
+    event only reaches the handlers that consume it.
+
+    Ordering: callbacks for one event type run in the order they were
+    subscribed. A handler that reads another handler's state (e.g. the
+    LapHandler reading the current stint) must be registered after it.
+    Events are dispatched one at a time, in the order they are published.
+    """
+    def __init__(self):
+        self._routes = {}
+        self.timings = []
+
+    def subscribe(self, event_type: type, callback, name: str | None = None):
+        timing = HandlerTiming(name or callback.__qualname__, event_type.__name__)
+        self.timings.append(timing)
+        self._routes[event_type] = self._routes.get(event_type, ()) + ((timing, callback),)
+
+    def register(self, handler):
+        """Subscribes every callback from the handler's subscriptions() mapping."""
+        for event_type, callback in handler.subscriptions().items():
+            self.subscribe(event_type, callback, f"{type(handler).__name__}.{callback.__name__}")
+
+    def subscribers(self, event_type: type) -> list[str]:
+        return [timing.name for timing, _ in self._routes.get(event_type, ())]
+
+    def publish(self, event):
+        for timing, callback in self._routes.get(type(event), ()):
+            started = perf_counter()
+            callback(event)
+            timing.record(perf_counter() - started)
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                'handler': t.name,
+                'event': t.event_type,
+                'calls': t.calls,
+                'avg_ms': t.total / t.calls * 1000 if t.calls else 0.0,
+                'max_ms': t.max * 1000,
+            }
+            for t in self.timings
+        ]
@@ -1,6 +1,8 @@
 # rw_backend/core/events.py
 
+from concurrent.futures import Future
 from dataclasses import dataclass
+from rw_backend.core.frame import FrameContext
 
 @dataclass
 class Event:
@@ -11,13 +13,12 @@ class Event:
 @dataclass
 class SessionStarted(Event):
     uid: str
-    simulator_id: int
-    track_id: int
-    car_id: int
-    driver_id: int
     session_type: str
     track_temp: float
     air_temp: float
+    # Pending lookup of the session's Simulator, Driver, Car and Track records
+    # (creating placeholders for unknown ones); resolves after the event is fired.
+    records: Future
 
 @dataclass
 class SessionEnded(Event):
@@ -27,7 +28,9 @@ class SessionEnded(Event):
 @dataclass
 class StintStarted(Event):
     lap_number: int
-    setup_id: int | None
+    setup_id: int | None = None
+    # Pending setup lookup; resolves to the setup id after the event is fired.
+    setup: Future | None = None
 
 @dataclass
 class StintEnded(Event):
@@ -60,5 +63,6 @@ class LapAborted(Event):
 # --- Live Data Events ---
 @dataclass
 class TelemetryUpdate(Event):
-    payload: dict
-    player_state: str
\ No newline at end of file
+    payload: FrameContext
+    player_state: str
+    queued_at: float = 0.0  # time.perf_counter() when the EventGenerator queued it
\ No newline at end of file
@@ -0,0 +1,22 @@
+# rw_backend/core/frame.py
+
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class FrameContext:
+    """
+    Everything the pipeline needs about one collected frame. It is built once
+    by the collector, so detectors and handlers never search mVehicles for
+    the player themselves.
+    """
+    telemetry: object | None       # player's rF2VehicleTelemetry
+    scoring: object | None         # mScoringInfo plus the player's mVehicles slice
+    extended: object | None        # rF2Extended
+    player_scoring: object | None  # player's rF2VehicleScoring
+    player_index: int | None = None
+    collected_at: float = 0.0      # time.perf_counter() when the collector read the frame
+    read_time: float = 0.0         # seconds the collector spent copying it; 0 for replayed frames
+
+    @property
+    def scoring_info(self):
+        return self.scoring.mScoringInfo if self.scoring else None
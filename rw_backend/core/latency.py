@@ -0,0 +1,156 @@
+# rw_backend/core/latency.py
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+
+SUB_BUCKET_BITS = 7                 # 128 sub-buckets per power of two, ~1% precision
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+MAX_TRACKABLE_US = 1 << 26          # ~67 s; anything slower lands in the last bucket
+
+# Pipeline stages, in the order a frame passes through them.
+STAGES = (
+    "collector_read",   # copying the shared memory buffers
+    "frame_queue",      # collected -> EventGenerator dequeue
+    "detectors",        # EventGenerator._process_frame
+    "event_queue",      # TelemetryUpdate queued -> dispatch loop dequeue
+    "dispatch",         # EventBus.publish of one TelemetryUpdate
+    "json_encode",      # LiveDataServer.push_data serialisation
+    "broadcast",        # pushed -> websocket broadcast done
+    "end_to_end",       # collected -> websocket broadcast done
+)
+
+def _bucket_index(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_SUB_BUCKETS + (value >> shift) - HALF_SUB_BUCKETS
+
+def _highest_value_in_bucket(index: int) -> int:
+    if index < SUB_BUCKETS:
+        return index
+    shift, sub_bucket = divmod(index - SUB_BUCKETS, HALF_SUB_BUCKETS)
+    shift += 1
+    return ((sub_bucket + HALF_SUB_BUCKETS + 1) << shift) - 1
+
+BUCKET_COUNT = _bucket_index(MAX_TRACKABLE_US) + 1
+
+class LatencyHistogram:
+    """
+    An HDR-style histogram of durations in microseconds: exact below 128 µs,
+    then 64 linear buckets per power of two, so every recorded value is kept
+    to within ~1.6% however large it is. Counts live in a preallocated list.
+
+    There is no lock. Each histogram is written by exactly one thread, and
+    readers on other threads only ever see slightly stale counts.
+    """
+    __slots__ = ("name", "counts", "count", "max_us", "total_us")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.max_us = 0
+        self.total_us = 0
+
+    def record(self, seconds: float):
+        value = int(seconds * 1_000_000)
+        if value < 0:
+            value = 0
+        elif value >= MAX_TRACKABLE_US:
+            value = MAX_TRACKABLE_US
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def percentile(self, percent: float) -> int:
+        """The smallest value (µs) that `percent` of recorded values do not exceed."""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(_highest_value_in_bucket(index), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'p50_us': self.percentile(50),
+            'p99_us': self.percentile(99),
+            'max_us': self.max_us,
+            'mean_us': self.total_us / self.count if self.count else 0.0,
+        }
+
+class LatencyTracer:
+    """
+    One histogram per pipeline stage. Frame timestamps come from
+    time.perf_counter(), which has sub-microsecond resolution on every platform.
+    Set RACEWORKSHOP_LATENCY_TRACE=0 to skip recording entirely.
+    """
+    def __init__(self, stages=STAGES, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = {name: LatencyHistogram(name) for name in stages}
+        self.started_at = time.perf_counter()
+
+    def stage(self, name: str) -> LatencyHistogram:
+        return self.stages[name]
+
+    def record(self, name: str, seconds: float):
+        if self.enabled:
+            self.stages[name].record(seconds)
+
+    def reset(self):
+        for name in self.stages:
+            self.stages[name] = LatencyHistogram(name)
+        self.started_at = time.perf_counter()
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        frames = self.stages["detectors"].count if "detectors" in self.stages else 0
+        return {
+            'type': 'latency',
+            'elapsed_s': elapsed,
+            'frames_per_s': frames / elapsed if elapsed > 0 else 0.0,
+            'stages': {name: histogram.summary() for name, histogram in self.stages.items()},
+        }
+
+def format_snapshot(snapshot: dict) -> list[str]:
+    lines = [f"{'stage':<16}{'count':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, s in snapshot['stages'].items():
+        if s['count']:
+            lines.append(f"{name:<16}{s['count']:>9}{s['p50_us'] / 1000:>10.3f}"
+                         f"{s['p99_us'] / 1000:>10.3f}{s['max_us'] / 1000:>10.3f}")
+    lines.append(f"{snapshot['frames_per_s']:.1f} frames/s over {snapshot['elapsed_s']:.0f}s")
+    return lines
+
+tracer = LatencyTracer(enabled=os.getenv("RACEWORKSHOP_LATENCY_TRACE", "1") != "0")
+
+async def _request_snapshot(url: str, reset: bool) -> dict:
+    import websockets
+    async with websockets.connect(url) as websocket:
+        await websocket.send(json.dumps({'command': 'latency', 'reset': reset}))
+        # Live data keeps streaming on the same socket; wait for our reply.
+        async for message in websocket:
+            reply = json.loads(message)
+            if reply.get('type') == 'latency':
+                return reply
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump the running daemon's per-stage latency histograms.")
+    parser.add_argument("--url", default="ws://localhost:8765")
+    parser.add_argument("--reset", action="store_true", help="clear the histograms after reading them")
+    args = parser.parse_args()
+    snapshot = asyncio.run(asyncio.wait_for(_request_snapshot(args.url, args.reset), timeout=5))
+    print("\n".join(format_snapshot(snapshot)))
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,9 @@ import asyncio
 import websockets
 import threading
 import json
+import time
 from queue import Queue, Empty
+from rw_backend.core.latency import tracer, format_snapshot
 
 class LiveDataServer:
     """
@@ -19,24 +21,45 @@ class LiveDataServer:
         self.server_thread = threading.Thread(target=self._run_server_in_thread, daemon=True)
 
     async def _register(self, websocket):
-        """Adds a new client and waits for them to disconnect."""
+        """Adds a new client and answers its debug commands until it disconnects."""
         self.clients.add(websocket)
         print(f"[Live Data Server] Client connected. Total clients: {len(self.clients)}")
         try:
-            await websocket.wait_closed()
+            async for message in websocket:
+                await self._handle_command(websocket, message)
+        except websockets.ConnectionClosed:
+            pass
         finally:
             self.clients.remove(websocket)
             print(f"[Live Data Server] Client disconnected. Total clients: {len(self.clients)}")
 
+    async def _handle_command(self, websocket, message):
+        """{"command": "latency"} replies with the per-stage latency histograms."""
+        try:
+            command = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(command, dict) or command.get('command') != 'latency':
+            return
+        snapshot = tracer.snapshot()
+        if command.get('reset'):
+            tracer.reset()
+        await websocket.send(json.dumps(snapshot))
+        print("[Live Data Server] Latency dump requested:\n" + "\n".join(format_snapshot(snapshot)), flush=True)
+
     async def _broadcast_data(self):
         """Continuously checks the queue and sends data to all clients."""
         while True:
             try:
                 # Use a non-blocking get to avoid halting the async loop
-                message = self.data_queue.get_nowait()
+                message, pushed_at, collected_at = self.data_queue.get_nowait()
                 if self.clients:
                     # websockets.broadcast is a convenient way to send to all clients
                     websockets.broadcast(self.clients, message)
+                sent_at = time.perf_counter()
+                tracer.record("broadcast", sent_at - pushed_at)
+                if collected_at is not None:
+                    tracer.record("end_to_end", sent_at - collected_at)
             except Empty:
                 # If the queue is empty, wait briefly to yield control
                 await asyncio.sleep(1 / 100) # Sleep for 10ms
@@ -58,7 +81,14 @@ class LiveDataServer:
         """Starts the server thread."""
         self.server_thread.start()
 
-    def push_data(self, data: dict):
-        """Public, thread-safe method to add data to the broadcast queue."""
+    def push_data(self, data: dict, collected_at: float | None = None):
+        """
+        Public, thread-safe method to add data to the broadcast queue.
+        `collected_at` is the source frame's perf_counter stamp, for latency tracing.
+        """
         # We serialize to JSON here to offload that work from the server's async loop.
-        self.data_queue.put(json.dumps(data))
\ No newline at end of file
+        started = time.perf_counter()
+        message = json.dumps(data)
+        pushed_at = time.perf_counter()
+        tracer.record("json_encode", pushed_at - started)
+        self.data_queue.put((message, pushed_at, collected_at))
\ No newline at end of file
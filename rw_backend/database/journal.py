@@ -0,0 +1,208 @@
+# rw_backend/database/journal.py
+
+import argparse
+import glob
+import itertools
+import mmap
+import os
+import struct
+import time
+import zlib
+from .models import db, Lap, LapTelemetry
+from .lap_channels import CHANNELS, CHANNEL_NAMES, CHANNEL_ENTRY, ChannelBuffer, has_lap_channels, store_columns, insert_buffer_rows
+
+# While a lap is being driven its samples only exist in the TelemetryHandler's
+# buffer. Each lap is also appended to a journal file, memory-mapped so an
+# append is a struct pack and a copy into the page cache: it survives the
+# daemon being killed (the OS writes the pages back), and only a power cut
+# can lose what the OS had not written yet. The persistence writer deletes
+# the file once the lap's telemetry is committed; files still present at the
+# next start are replayed into the database.
+#
+# File layout: a header and the channel directory (as in lap_channels.py),
+# then records. Each record is a header (kind, payload length, CRC-32 of the
+# payload) and its payload. The header is written last, so replay stops at
+# the first record that is zero, short or fails its CRC.
+JOURNAL_DIR_NAME = "journal"
+MAGIC = b'RWJL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBH')     # magic, format version, channel count; the directory follows
+RECORD = struct.Struct('<BHI')      # kind, payload length, crc32 of the payload
+
+LAP = 1       # the lap number; first record of every journal
+LAP_ID = 2    # the Lap record's id, once the writer has created it
+SAMPLE = 3    # one sample, every channel in directory order
+ID_RECORD = struct.Struct('<i')
+SAMPLE_RECORD = struct.Struct('<' + ''.join(typecode for _, typecode in CHANNELS))
+
+DEFAULT_CAPACITY_SAMPLES = 2048
+# Journal names sort oldest first; the counter separates laps within one clock tick.
+_sequence = itertools.count()
+
+def journal_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db.database)), JOURNAL_DIR_NAME)
+
+def _directory(channels) -> bytes:
+    return b''.join(CHANNEL_ENTRY.pack(typecode.encode('ascii'), len(name)) + name.encode('ascii')
+                    for name, typecode in channels)
+
+class LapJournal:
+    """
+    One lap's samples, appended to a memory-mapped file as they are taken.
+    Written by the TelemetryHandler while the lap runs, then handed to the
+    persistence writer, which discards it once the lap is committed.
+    """
+    def __init__(self, lap_number: int, expected_samples: int = DEFAULT_CAPACITY_SAMPLES, directory: str | None = None):
+        directory = directory or journal_dir()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"lap-{time.time_ns():020d}-{next(_sequence):04d}.rwj")
+        self.lap_id = None
+        self.samples = 0
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(CHANNELS)) + _directory(CHANNELS)
+        self.capacity = len(header) + max(1, expected_samples) * (RECORD.size + SAMPLE_RECORD.size)
+        self._file = open(self.path, 'w+b')
+        self._file.truncate(self.capacity)
+        self._map = mmap.mmap(self._file.fileno(), self.capacity)
+        self._map[:len(header)] = header
+        self.offset = len(header)
+        self._append(LAP, ID_RECORD.pack(lap_number))
+
+    def _append(self, kind: int, payload: bytes):
+        start = self.offset + RECORD.size
+        end = start + len(payload)
+        if end > self.capacity:
+            self._grow(end)
+        self._map[start:end] = payload
+        RECORD.pack_into(self._map, self.offset, kind, len(payload), zlib.crc32(payload))
+        self.offset = end
+
+    def _grow(self, needed: int):
+        self._map.close()
+        self.capacity = max(needed, self.capacity * 2)
+        self._file.truncate(self.capacity)
+        self._map = mmap.mmap(self._file.fileno(), self.capacity)
+
+    def append(self, values):
+        """Journals one sample; `values` holds every channel in CHANNELS order."""
+        self._append(SAMPLE, SAMPLE_RECORD.pack(*values))
+        self.samples += 1
+
+    def set_lap_id(self, lap_id: int):
+        if self.lap_id is None:
+            self.lap_id = lap_id
+            self._append(LAP_ID, ID_RECORD.pack(lap_id))
+
+    def sync(self):
+        """Forces the journal to disk (msync); appends alone only reach the page cache."""
+        self._map.flush()
+
+    def close(self):
+        """Unmaps the journal and keeps the file, to be replayed at the next start."""
+        if not self._map.closed:
+            self._map.close()
+            self._file.close()
+
+    def discard(self):
+        """Deletes the journal; its lap is safely in the database."""
+        self.close()
+        os.remove(self.path)
+
+def read_journal(path: str) -> tuple[int | None, int | None, ChannelBuffer]:
+    """
+    The lap number, Lap id (None if never journaled) and samples of a journal
+    file, up to its last complete record. Channels the file does not have are
+    filled with NaN (0 for integer channels).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, channel_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a telemetry journal, or from a newer version.")
+    offset = HEADER.size
+    directory = []
+    for _ in range(channel_count):
+        typecode, name_length = CHANNEL_ENTRY.unpack_from(data, offset)
+        offset += CHANNEL_ENTRY.size
+        directory.append((data[offset:offset + name_length].decode('ascii'), typecode.decode('ascii')))
+        offset += name_length
+    sample_record = struct.Struct('<' + ''.join(typecode for _, typecode in directory))
+    positions = {name: i for i, (name, _) in enumerate(directory)}
+    defaults = tuple(0 if typecode == 'b' else float('nan') for _, typecode in CHANNELS)
+    layout = [positions.get(name) for name in CHANNEL_NAMES]
+
+    lap_number = lap_id = None
+    samples = []
+    while offset + RECORD.size <= len(data):
+        kind, length, crc = RECORD.unpack_from(data, offset)
+        payload = data[offset + RECORD.size:offset + RECORD.size + length]
+        if kind == 0 or len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        if kind == LAP:
+            (lap_number,) = ID_RECORD.unpack(payload)
+        elif kind == LAP_ID:
+            (lap_id,) = ID_RECORD.unpack(payload)
+        elif kind == SAMPLE and length == sample_record.size:
+            values = sample_record.unpack(payload)
+            samples.append(tuple(default if i is None else values[i] for i, default in zip(layout, defaults)))
+        offset += RECORD.size + length
+
+    buffer = ChannelBuffer(len(samples))
+    for values in samples:
+        buffer.append(values)
+    return lap_number, lap_id, buffer
+
+def replay_journal(path: str, store_channels: bool = True, store_rows: bool = False) -> int:
+    """
+    Writes a journal's samples to its lap, unless the lap already has them
+    (the daemon stopped after committing but before deleting the journal),
+    then deletes the file. Returns the samples recovered.
+    """
+    lap_number, lap_id, buffer = read_journal(path)
+    recovered = 0
+    if lap_id is None or not Lap.select().where(Lap.id == lap_id).exists():
+        if len(buffer):
+            print(f"[Journal] WARNING: Dropping {len(buffer)} samples of lap #{lap_number}; "
+                  f"its Lap record was never saved.", flush=True)
+    elif len(buffer):
+        with db.atomic():
+            if store_channels and not has_lap_channels(lap_id):
+                recovered = store_columns(lap_id, buffer.columns())
+            if store_rows and LapTelemetry.select().where(LapTelemetry.lap == lap_id).count() < len(buffer):
+                # Rows flushed before the crash are a prefix of the journal; rewrite them all.
+                LapTelemetry.delete().where(LapTelemetry.lap == lap_id).execute()
+                recovered = insert_buffer_rows(lap_id, buffer, 0, len(buffer))
+    os.remove(path)
+    return recovered
+
+def replay_journals(directory: str | None = None, store_channels: bool = True, store_rows: bool = False) -> int:
+    """Replays every journal left in `directory`, oldest first; returns the laps recovered."""
+    recovered_laps = 0
+    for path in sorted(glob.glob(os.path.join(directory or journal_dir(), "lap-*.rwj"))):
+        try:
+            samples = replay_journal(path, store_channels, store_rows)
+        except Exception as e:
+            # Set aside, so one unreadable file is not retried on every start.
+            print(f"[Journal] ERROR: Could not replay {os.path.basename(path)}: {e}", flush=True)
+            os.replace(path, path + ".bad")
+            continue
+        if samples:
+            recovered_laps += 1
+            print(f"[Journal] Recovered {samples} samples from {os.path.basename(path)}.", flush=True)
+    return recovered_laps
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay telemetry journals left by a daemon that did not shut down cleanly.")
+    parser.add_argument("--rows", action="store_true", help="also write LapTelemetry rows")
+    args = parser.parse_args()
+
+    from .manager import initialize_database
+    initialize_database()
+    db.connect(reuse_if_open=True)
+    try:
+        laps = replay_journals(store_rows=args.rows)
+        print(f"[Journal] Recovered {laps} laps from {journal_dir()}.", flush=True)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+# rw_backend/database/lap_channels.py
+
+import struct
+import sys
+import zlib
+from array import array
+from .models import db, LapTelemetry, LapChannels
+from . import shards
+
+try:
+    import zstandard
+except ImportError:  # optional: blobs fall back to zlib
+    zstandard = None
+
+# A lap is stored as one blob: a header, the channel directory, then every
+# channel's values back to back, compressed together. Values are little-endian
+# typed arrays ('f' float32, 'd' float64, 'b' int8), so a channel can be read
+# with array.frombytes or numpy.frombuffer without touching the others. The
+# payload is one compressed stream, so reading a subset of channels stops
+# decompressing after the last one asked for.
+MAGIC = b'RWLC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBIH')   # magic, format version, codec, sample count, channel count
+CHANNEL_ENTRY = struct.Struct('<cB')  # typecode, name length; the name follows
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Session-time channels keep float64 so a 24 h race still resolves milliseconds.
+DOUBLE_CHANNELS = {'elapsed_time', 'lap_start_et'}
+INT8_CHANNELS = {'gear'}
+
+# Every LapTelemetry column except the row id and the lap, in table order.
+CHANNELS = tuple(
+    (field.name, 'd' if field.name in DOUBLE_CHANNELS else 'b' if field.name in INT8_CHANNELS else 'f')
+    for field in LapTelemetry._meta.sorted_fields
+    if field.name not in ('id', 'lap')
+)
+CHANNEL_NAMES = tuple(name for name, _ in CHANNELS)
+
+# One parameterised INSERT for a LapTelemetry row: the lap id, then the channels.
+INSERT_ROW_SQL = 'INSERT INTO "{}" ("{}", {}) VALUES ({})'.format(
+    LapTelemetry._meta.table_name,
+    LapTelemetry.lap.column_name,
+    ', '.join(f'"{getattr(LapTelemetry, name).column_name}"' for name in CHANNEL_NAMES),
+    ', '.join('?' * (len(CHANNEL_NAMES) + 1)),
+)
+
+def _compress(data: bytes) -> tuple[int, bytes]:
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+def _decompress(codec: int, data: bytes, length: int | None = None) -> bytes:
+    """The decompressed payload, or only its first `length` bytes."""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This lap is zstd-compressed; install the 'zstandard' package to read it.")
+        if length is None:
+            return zstandard.ZstdDecompressor().decompress(data)
+        chunks, remaining = [], length
+        with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+            while remaining > 0:
+                chunk = reader.read(remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+        return b''.join(chunks)
+    if length is None:
+        return zlib.decompress(data)
+    return zlib.decompressobj().decompress(data, length)
+
+def columns_from_rows(rows) -> dict[str, array]:
+    """
+    Turns telemetry sample dicts (as buffered by the TelemetryHandler) into
+    channel arrays ordered by lap distance. Missing values become NaN (0 for
+    integer channels).
+    """
+    rows = sorted(rows, key=lambda row: row['lap_dist'])
+    columns = {}
+    for name, typecode in CHANNELS:
+        missing = 0 if typecode == 'b' else float('nan')
+        columns[name] = array(typecode, [missing if row.get(name) is None else row[name] for row in rows])
+    return columns
+
+def pack_channels(columns: dict[str, array]) -> bytes:
+    sample_count = len(columns['lap_dist'])
+    directory, payload = [], []
+    for name, typecode in CHANNELS:
+        values = columns[name]
+        if values.typecode != typecode:
+            values = array(typecode, values)
+        if len(values) != sample_count:
+            raise ValueError(f"Channel '{name}' has {len(values)} samples, expected {sample_count}.")
+        if sys.byteorder == 'big':
+            values = array(typecode, values)
+            values.byteswap()
+        encoded_name = name.encode('ascii')
+        directory.append(CHANNEL_ENTRY.pack(typecode.encode('ascii'), len(encoded_name)) + encoded_name)
+        payload.append(values.tobytes())
+    codec, compressed = _compress(b''.join(payload))
+    return HEADER.pack(MAGIC, FORMAT_VERSION, codec, sample_count, len(CHANNELS)) + b''.join(directory) + compressed
+
+def unpack_channels(blob: bytes, channels=None) -> dict[str, array]:
+    """A blob's channel arrays; with `channels`, only those the blob has."""
+    magic, version, codec, sample_count, channel_count = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a lap channel blob, or from a newer version.")
+    offset = HEADER.size
+    directory = []
+    for _ in range(channel_count):
+        typecode, name_length = CHANNEL_ENTRY.unpack_from(blob, offset)
+        offset += CHANNEL_ENTRY.size
+        directory.append((blob[offset:offset + name_length].decode('ascii'), typecode.decode('ascii')))
+        offset += name_length
+
+    # Where each channel sits in the payload.
+    layout, position = [], 0
+    for name, typecode in directory:
+        size = sample_count * array(typecode).itemsize
+        if channels is None or name in channels:
+            layout.append((name, typecode, position, size))
+        position += size
+    needed = max((start + size for *_, start, size in layout), default=0)
+
+    payload = memoryview(_decompress(codec, blob[offset:], None if channels is None else needed))
+    columns = {}
+    for name, typecode, start, size in layout:
+        values = array(typecode)
+        values.frombytes(payload[start:start + size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        columns[name] = values
+    return columns
+
+class ChannelBuffer:
+    """
+    A lap's samples in flight: one preallocated typed array per channel, in
+    CHANNELS order. Samples are written by index; when a lap runs longer than
+    expected every array doubles in place.
+
+    Samples before `len(buffer)` are never rewritten, so the persistence
+    writer can read them while the handler keeps appending.
+    """
+    __slots__ = ("arrays", "capacity", "length")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.arrays = [array(typecode, bytes(self.capacity * array(typecode).itemsize)) for _, typecode in CHANNELS]
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, values):
+        """Stores one sample; `values` holds every channel in CHANNELS order."""
+        index = self.length
+        if index == self.capacity:
+            self._grow()
+        for column, value in zip(self.arrays, values):
+            column[index] = value
+        self.length = index + 1
+
+    def _grow(self):
+        for column in self.arrays:
+            column.frombytes(bytes(self.capacity * column.itemsize))
+        self.capacity *= 2
+
+    def rows(self, start: int, end: int):
+        """Samples [start, end) as value tuples in CHANNELS order."""
+        return zip(*(column[start:end] for column in self.arrays))
+
+    def columns(self) -> dict[str, array]:
+        """The buffered samples as channel arrays ordered by lap distance."""
+        length = self.length
+        columns = {name: column[:length] for (name, _), column in zip(CHANNELS, self.arrays)}
+        dist = columns['lap_dist']
+        # Samples arrive in distance order; only reorder if something slipped through.
+        if any(dist[i] > dist[i + 1] for i in range(length - 1)):
+            order = sorted(range(length), key=dist.__getitem__)
+            columns = {name: array(values.typecode, [values[i] for i in order]) for name, values in columns.items()}
+        return columns
+
+def insert_buffer_rows(lap_id: int, buffer: ChannelBuffer, start: int, end: int) -> int:
+    """Writes samples [start, end) of a buffer as LapTelemetry rows with one executemany."""
+    cursor = db.cursor()
+    cursor.executemany(INSERT_ROW_SQL, ((lap_id, *values) for values in buffer.rows(start, end)))
+    return end - start
+
+def save_lap_channels(lap_id: int, rows) -> int:
+    """Stores a lap's buffered samples as one LapChannels record; returns the sample count."""
+    return store_columns(lap_id, columns_from_rows(rows))
+
+def store_columns(lap_id: int, columns: dict[str, array]) -> int:
+    """Writes a lap's channels to its session's shard (see shards.py); returns the sample count."""
+    sample_count = len(columns['lap_dist'])
+    shards.write_lap_blob(lap_id, sample_count, pack_channels(columns))
+    # A lap recorded before shards existed may still have a copy in the main database.
+    LapChannels.delete().where(LapChannels.lap == lap_id).execute()
+    return sample_count
+
+def read_row_channels(lap_id: int, channels=None) -> dict[str, array] | None:
+    """
+    A lap's LapTelemetry rows as channel arrays ordered by lap distance, or
+    None if it has none. With `channels`, only those columns are read.
+    """
+    selected = [(name, typecode) for name, typecode in CHANNELS
+                if channels is None or name in channels or name == 'lap_dist']
+    rows = (LapTelemetry
+            .select(*[getattr(LapTelemetry, name) for name, _ in selected])
+            .where(LapTelemetry.lap == lap_id)
+            .order_by(LapTelemetry.lap_dist)
+            .tuples())
+    columns = {name: array(typecode) for name, typecode in selected}
+    appends = [(columns[name].append, 0 if typecode == 'b' else float('nan')) for name, typecode in selected]
+    for row in rows:
+        for (append, missing), value in zip(appends, row):
+            append(missing if value is None else value)
+    return columns if len(columns['lap_dist']) else None
+
+def load_lap_channels(lap_id: int, channels=None) -> dict[str, array] | None:
+    """
+    A lap's channels from its session's shard, in one fetch. Laps stored
+    before shards existed come from the main database's LapChannels table,
+    and laps recorded in row mode (or not yet migrated) from LapTelemetry.
+    With `channels`, only those (and lap_dist, which every view needs) are
+    decoded.
+    """
+    if channels is not None:
+        channels = {'lap_dist', *channels}
+    blob = shards.read_lap_blob(lap_id)
+    if blob is None:
+        blob = LapChannels.select(LapChannels.data).where(LapChannels.lap == lap_id).scalar()
+    if blob is not None:
+        return unpack_channels(bytes(blob), channels)
+    return read_row_channels(lap_id, channels)
+
+def has_lap_channels(lap_id: int) -> bool:
+    return (shards.has_lap_blob(lap_id)
+            or LapChannels.select().where(LapChannels.lap == lap_id).exists())
+
+def delete_lap_channels(lap_id: int):
+    """Removes a lap's channel record, wherever it is stored."""
+    shards.delete_lap_blob(lap_id)
+    LapChannels.delete().where(LapChannels.lap == lap_id).execute()
+
+def laps_with_telemetry(session_ids) -> set[int]:
+    """Ids of every lap in these sessions with telemetry in any form."""
+    lap_ids = {lap_id for session_id in session_ids for lap_id in shards.shard_lap_ids(session_id)}
+    lap_ids.update(lap_id for (lap_id,) in LapChannels.select(LapChannels.lap).tuples())
+    lap_ids.update(lap_id for (lap_id,) in LapTelemetry.select(LapTelemetry.lap).distinct().tuples())
+    return lap_ids
+
+def fuel_used(lap_ids) -> float:
+    """
+    Fuel at the first sample of the first lap with telemetry minus fuel at the
+    last sample of the last one. `lap_ids` must be in driving order.
+    """
+    lap_ids = list(lap_ids)
+    load = lambda lap_id: load_lap_channels(lap_id, ('fuel_level',))
+    first = next((c for c in map(load, lap_ids) if c is not None), None)
+    if first is None:
+        return 0.0
+    last = next(c for c in map(load, reversed(lap_ids)) if c is not None)
+    return first['fuel_level'][0] - last['fuel_level'][-1]
+
+# Channels whose local extremes survive downsampling.
+EXTREMA_CHANNELS = ('speed', 'throttle', 'brake', 'steering')
+
+def downsample_minmax(columns: dict[str, array], bucket_m: float, channels=EXTREMA_CHANNELS) -> dict[str, array]:
+    """
+    Thins a lap to the samples that carry its shape: for every `bucket_m`
+    metres of lap distance, the samples holding the minimum and maximum of
+    each of `channels`, plus the lap's first and last samples. Every channel
+    keeps the same samples, so the lap stays aligned.
+    """
+    dist = columns['lap_dist']
+    count = len(dist)
+    if count <= 2:
+        return columns
+    keep = {0, count - 1}
+    tracked = [columns[name] for name in channels]
+    start = 0
+    while start < count:
+        end = start
+        bucket_end = dist[start] + bucket_m
+        while end < count and dist[end] < bucket_end:
+            end += 1
+        indices = range(start, end)
+        for values in tracked:
+            keep.add(min(indices, key=values.__getitem__))
+            keep.add(max(indices, key=values.__getitem__))
+        start = end
+    order = sorted(keep)
+    return {name: array(values.typecode, [values[i] for i in order]) for name, values in columns.items()}
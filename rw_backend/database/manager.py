@@ -2,8 +2,13 @@
 
 import json
 import os
+import sqlite3
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from .models import db, Session, Stint, Lap, Simulator, Track, Car, Driver, LapTelemetry, Setup
+import peewee as pw
+from rw_backend.core.latency import LatencyHistogram
+from .models import db, DB_PRAGMAS, Session, Stint, Lap, Simulator, Track, Car, Driver, LapTelemetry, LapChannels, LapRetention, Setup
 
 def _seed_tracks():
     """Seeds the Track table from a JSON file if it's empty."""
@@ -76,17 +81,34 @@ def _seed_cars():
 # --- NEW FUNCTION END ---
 
 
+def prepare_new_database():
+    """
+    New databases free pages incrementally, so the retention job can compact
+    them in small steps (see retention.py). The mode has to be written to a
+    new file before anything else, WAL mode included, so it is set here on a
+    plain connection rather than with the per-connection pragmas.
+    """
+    if os.path.exists(db.database) and os.path.getsize(db.database) > 0:
+        return
+    connection = sqlite3.connect(db.database, isolation_level=None)
+    try:
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")  # writes the header, so the mode sticks
+    finally:
+        connection.close()
+
 def initialize_database():
     """
     Connects to the database, creates tables, and seeds them with initial data.
     """
     try:
+        prepare_new_database()
         db.connect()
       
         db.create_tables([
             Simulator, Track, Car, Driver,
             Session, Stint, Lap, 
-            LapTelemetry,
+            LapTelemetry, LapChannels, LapRetention,
             Setup
         ])
         
@@ -110,4 +132,78 @@ def connect_db():
 def close_db():
     """Closes the database connection if it's open."""
     if not db.is_closed():
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Connection roles. The daemon is the only process that writes, through the
+# persistence writer's long-lived connection; the UI process only reads.
+WRITER = "writer"
+READER = "reader"
+BUSY_TIMEOUT = 5.0
+
+# Time spent waiting for SQLite's write lock, per write transaction.
+lock_waits = LatencyHistogram("db_lock_wait")
+lock_timeouts = 0
+# Waits at least this long are logged as they happen.
+SLOW_LOCK_WAIT = 0.1
+
+def configure_database(role: str = WRITER):
+    """
+    Sets up this process's connections for `role`. Reader connections are
+    query_only, so a stray write from the UI fails instead of taking the
+    write lock away from the daemon; see writable() for deliberate ones.
+    """
+    if role not in (WRITER, READER):
+        raise ValueError(f"Unknown database role '{role}'.")
+    pragmas = dict(DB_PRAGMAS)
+    if role == READER:
+        pragmas['query_only'] = 1
+    db.init(db.database, pragmas=pragmas, timeout=BUSY_TIMEOUT)
+
+@contextmanager
+def writable():
+    """Lifts query_only on this thread's connection for the duration of the block."""
+    db.connect(reuse_if_open=True)
+    query_only = db.execute_sql("PRAGMA query_only").fetchone()[0]
+    db.execute_sql("PRAGMA query_only = 0")
+    try:
+        yield
+    finally:
+        db.execute_sql(f"PRAGMA query_only = {int(query_only)}")
+
+def _record_lock_wait(seconds: float, timed_out: bool = False):
+    global lock_timeouts
+    lock_waits.record(seconds)
+    if timed_out:
+        lock_timeouts += 1
+        print(f"[Database] WARNING: Gave up on the write lock after {seconds * 1000:.0f} ms.", flush=True)
+    elif seconds >= SLOW_LOCK_WAIT:
+        print(f"[Database] Waited {seconds * 1000:.0f} ms for the write lock.", flush=True)
+
+@contextmanager
+def write_transaction():
+    """
+    Like db.atomic(), but takes the write lock when the transaction starts
+    (BEGIN IMMEDIATE) and records how long that took in `lock_waits`.
+    Nested inside another transaction it is a plain savepoint.
+    """
+    if db.in_transaction():
+        with db.atomic():
+            yield
+        return
+    started = time.perf_counter()
+    waited = None
+    try:
+        with db.atomic(lock_type='IMMEDIATE'):
+            waited = time.perf_counter() - started
+            _record_lock_wait(waited)
+            yield
+    except pw.OperationalError:
+        if waited is None:
+            _record_lock_wait(time.perf_counter() - started, timed_out=True)
+        raise
+
+def format_lock_waits() -> str:
+    if not lock_waits.count:
+        return "no write transactions"
+    return (f"{lock_waits.count} write transactions, lock wait p99 {lock_waits.percentile(99) / 1000:.2f} ms, "
+            f"max {lock_waits.max_us / 1000:.2f} ms, {lock_timeouts} timeouts")
@@ -0,0 +1,52 @@
+# rw_backend/database/migrate_lap_channels.py
+
+import argparse
+import time
+from .models import db, LapTelemetry
+from .lap_channels import read_row_channels, store_columns, has_lap_channels
+from .manager import initialize_database
+
+def migrate(drop_rows: bool = False) -> tuple[int, int]:
+    """
+    Converts every lap that has LapTelemetry rows but no channel record.
+    Each lap is converted in its own transaction, so an interrupted migration
+    can simply be run again. Returns (laps converted, samples converted).
+    """
+    lap_ids = [lap_id for (lap_id,) in (LapTelemetry
+                                        .select(LapTelemetry.lap)
+                                        .distinct()
+                                        .order_by(LapTelemetry.lap)
+                                        .tuples())
+               if not has_lap_channels(lap_id)]
+    laps = samples = 0
+    for lap_id in lap_ids:
+        with db.atomic():
+            columns = read_row_channels(lap_id)
+            samples += store_columns(lap_id, columns)
+            if drop_rows:
+                LapTelemetry.delete().where(LapTelemetry.lap == lap_id).execute()
+        laps += 1
+        if laps % 100 == 0:
+            print(f"[Migration] {laps}/{len(lap_ids)} laps converted...", flush=True)
+    return laps, samples
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert LapTelemetry rows into per-lap channel records.")
+    parser.add_argument("--drop-rows", action="store_true", help="delete each lap's rows once it is converted")
+    parser.add_argument("--vacuum", action="store_true", help="compact the database file afterwards")
+    args = parser.parse_args()
+
+    initialize_database()
+    db.connect(reuse_if_open=True)
+    try:
+        started = time.perf_counter()
+        laps, samples = migrate(drop_rows=args.drop_rows)
+        print(f"[Migration] Converted {laps} laps ({samples} samples) in {time.perf_counter() - started:.1f}s.", flush=True)
+        if args.vacuum:
+            print("[Migration] Vacuuming database...", flush=True)
+            db.execute_sql("VACUUM")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
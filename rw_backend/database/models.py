@@ -7,7 +7,30 @@ from datetime import datetime
 app_data_path = os.path.join(os.getenv('APPDATA'), 'RaceWorkshop')
 os.makedirs(app_data_path, exist_ok=True)
 db_path = os.path.join(app_data_path, 'raceworkshop.db')
-db = pw.SqliteDatabase(db_path, pragmas={'foreign_keys': 1})
+BASE_PRAGMAS = {'foreign_keys': 1}
+# The daemon writes while the UI reads the same file. In WAL mode readers
+# never block the writer and the writer never blocks readers; NORMAL sync is
+# still crash-safe with WAL (a power cut can only lose the last commits).
+TUNED_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -32 * 1024,           # 32 MB page cache per connection
+    'mmap_size': 256 * 1024 * 1024,     # reads map the file instead of copying pages
+    'temp_store': 'memory',
+    'journal_size_limit': 64 * 1024 * 1024,
+}
+# RACEWORKSHOP_DB_PROFILE=compat keeps SQLite's defaults, for a database on a
+# network share, where WAL's shared memory does not work. A file that has been
+# in WAL mode stays in it until a connection switches it back.
+DB_PROFILES = {
+    'tuned': {**BASE_PRAGMAS, **TUNED_PRAGMAS},
+    'compat': BASE_PRAGMAS,
+}
+DB_PROFILE = os.getenv('RACEWORKSHOP_DB_PROFILE', 'tuned')
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Unknown RACEWORKSHOP_DB_PROFILE '{DB_PROFILE}'; expected one of {', '.join(DB_PROFILES)}.")
+DB_PRAGMAS = DB_PROFILES[DB_PROFILE]
+db = pw.SqliteDatabase(db_path, pragmas=DB_PRAGMAS)
 
 class BaseModel(pw.Model):
     class Meta:
@@ -127,4 +150,22 @@ class LapTelemetry(BaseModel):
     ride_height_fl = pw.FloatField()
     ride_height_fr = pw.FloatField()
     ride_height_rl = pw.FloatField()
-    ride_height_rr = pw.FloatField()
\ No newline at end of file
+    ride_height_rr = pw.FloatField()
+
+class LapChannels(BaseModel):
+    """
+    A lap's telemetry as one record of compressed, typed channel arrays (see
+    lap_channels.py). New laps go to per-session shard files instead (see
+    shards.py); this table only holds laps stored before shards existed.
+    """
+    lap = pw.ForeignKeyField(Lap, primary_key=True, backref='channels', on_delete='CASCADE')
+    sample_count = pw.IntegerField()
+    data = pw.BlobField()
+
+class LapRetention(BaseModel):
+    """What the retention job has done to a lap's telemetry (see retention.py)."""
+    lap = pw.ForeignKeyField(Lap, primary_key=True, backref='retention', on_delete='CASCADE')
+    tier = pw.CharField(index=True)  # 'downsampled' or 'dropped'
+    samples_before = pw.IntegerField()
+    samples_after = pw.IntegerField()
+    applied_at = pw.DateTimeField(default=datetime.now)
@@ -0,0 +1,249 @@
+# rw_backend/database/retention.py
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import peewee as pw
+from .models import db, Session, Stint, Lap, LapTelemetry, LapRetention
+from .lap_channels import load_lap_channels, store_columns, delete_lap_channels, laps_with_telemetry, downsample_minmax
+from . import shards
+
+# Telemetry tiers. Laps without a LapRetention record are at full resolution.
+DOWNSAMPLED = "downsampled"
+DROPPED = "dropped"
+
+# Free pages released per incremental_vacuum step (4 MB at the default page size).
+COMPACT_STEP_PAGES = 1024
+
+class RetentionPolicy:
+    """
+    Decides which laps keep full-resolution telemetry. Personal bests (the
+    fastest valid lap per track and car), each session's fastest valid lap
+    (the reference lap the UI compares against) and every lap from the last
+    `recent_days` are never touched. Older laps are thinned to min/max per
+    `bucket_m` metres, and invalid laps (out-laps, aborted and cut laps) lose
+    their telemetry entirely after `invalid_days`.
+
+    Defaults come from RACEWORKSHOP_RETENTION_RECENT_DAYS (14),
+    RACEWORKSHOP_RETENTION_INVALID_DAYS (30) and RACEWORKSHOP_RETENTION_BUCKET_M (25).
+    """
+    def __init__(self, recent_days: float | None = None, invalid_days: float | None = None,
+                 bucket_m: float | None = None):
+        self.recent_days = _setting(recent_days, "RACEWORKSHOP_RETENTION_RECENT_DAYS", 14)
+        self.invalid_days = _setting(invalid_days, "RACEWORKSHOP_RETENTION_INVALID_DAYS", 30)
+        self.bucket_m = _setting(bucket_m, "RACEWORKSHOP_RETENTION_BUCKET_M", 25)
+
+def _setting(value, env_name: str, default: float) -> float:
+    return float(value if value is not None else os.getenv(env_name, default))
+
+def protected_laps() -> set[int]:
+    """Ids of every personal best and every session's fastest valid lap."""
+    fastest = pw.fn.MIN(Lap.lap_time)
+    valid = (Lap.is_valid == True) & (Lap.lap_time > 0)
+    # SQLite returns the row holding the MIN() for the bare Lap.id column.
+    personal_bests = (Lap.select(Lap.id, fastest).join(Stint).join(Session)
+                      .where(valid).group_by(Session.track, Session.car))
+    session_bests = (Lap.select(Lap.id, fastest).join(Stint)
+                     .where(valid).group_by(Stint.session))
+    return {lap_id for query in (personal_bests, session_bests) for lap_id, _ in query.tuples()}
+
+def plan_retention(policy: RetentionPolicy, now: datetime | None = None) -> list[tuple[int, str]]:
+    """The (lap id, tier) changes the policy calls for, oldest lap first."""
+    now = now or datetime.now()
+    recent_since = now - timedelta(days=policy.recent_days)
+    invalid_since = now - timedelta(days=policy.invalid_days)
+    protected = protected_laps()
+
+    laps = list(Lap.select(Lap.id, Lap.is_valid, Session.started_at, LapRetention.tier, Session.id)
+                .join(Stint).join(Session)
+                .switch(Lap).join(LapRetention, pw.JOIN.LEFT_OUTER)
+                .where(Session.started_at < recent_since)
+                .order_by(Lap.id)
+                .tuples())
+    with_telemetry = laps_with_telemetry({session_id for *_, session_id in laps})
+    plan = []
+    for lap_id, is_valid, started_at, tier, _ in laps:
+        if lap_id in protected or lap_id not in with_telemetry:
+            continue
+        if not is_valid and started_at < invalid_since:
+            plan.append((lap_id, DROPPED))
+        elif tier is None:
+            plan.append((lap_id, DOWNSAMPLED))
+    return plan
+
+def apply_tier(lap_id: int, tier: str, bucket_m: float) -> tuple[int, int] | None:
+    """
+    Moves one lap's telemetry to `tier` in one transaction; returns (samples
+    before, samples after), or None if the lap has been deleted since.
+    """
+    with db.atomic():
+        if not Lap.select().where(Lap.id == lap_id).exists():
+            return None
+        columns = load_lap_channels(lap_id)
+        before = len(columns['lap_dist']) if columns else 0
+        after = 0
+        if tier == DOWNSAMPLED and columns:
+            after = store_columns(lap_id, downsample_minmax(columns, bucket_m))
+        else:
+            delete_lap_channels(lap_id)
+        # Downsampled laps live in their channel record from now on.
+        LapTelemetry.delete().where(LapTelemetry.lap == lap_id).execute()
+        (LapRetention
+         .insert(lap=lap_id, tier=tier, samples_before=before, samples_after=after, applied_at=datetime.now())
+         .on_conflict_replace()
+         .execute())
+    return before, after
+
+def _pragma(name: str) -> int:
+    return db.execute_sql(f"PRAGMA {name}").fetchone()[0]
+
+def compact(step_pages: int = COMPACT_STEP_PAGES, should_stop=None) -> int:
+    """
+    Returns free pages to the file system a step at a time, so other
+    connections only wait for one short write lock per step. Needs
+    auto_vacuum=incremental (the default for new databases; older ones are
+    converted by a full VACUUM). Must be called outside a transaction.
+    Returns the bytes reclaimed.
+    """
+    if _pragma("auto_vacuum") != 2:
+        return 0
+    page_size = _pragma("page_size")
+    reclaimed = 0
+    while _pragma("freelist_count") and not (should_stop and should_stop()):
+        before = _pragma("page_count")
+        # executescript steps the pragma to completion; execute() frees one page.
+        db.connection().executescript(f"PRAGMA incremental_vacuum({step_pages})")
+        freed = before - _pragma("page_count")
+        if freed <= 0:
+            break
+        reclaimed += freed * page_size
+    return reclaimed
+
+def vacuum() -> int:
+    """Rebuilds the whole file (switching it to incremental auto-vacuum); returns the bytes reclaimed."""
+    page_size = _pragma("page_size")
+    before = _pragma("page_count")
+    db.execute_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    db.execute_sql("VACUUM")
+    # Switching modes adds pointer-map pages, so a nearly empty file can even grow.
+    return max(0, before - _pragma("page_count")) * page_size
+
+def run_retention(policy: RetentionPolicy, submit=None, now: datetime | None = None, should_stop=None) -> dict:
+    """
+    Applies the policy lap by lap, then compacts. `submit(fn, *args)` runs
+    each lap's change and returns its result; the daemon passes the
+    persistence writer so the job never competes with live writes.
+
+    The UI can delete sessions while a pass runs: laps deleted since the plan
+    was made are skipped, and a lap whose change fails is left as it is and
+    counted, without stopping the pass.
+    """
+    submit = submit or (lambda fn, *args: fn(*args))
+    report = {DOWNSAMPLED: 0, DROPPED: 0, 'failed': 0, 'samples_removed': 0, 'bytes_reclaimed': 0}
+    touched_sessions = set()
+    for lap_id, tier in plan_retention(policy, now):
+        if should_stop and should_stop():
+            break
+        try:
+            samples = submit(apply_tier, lap_id, tier, policy.bucket_m)
+        except Exception as e:
+            print(f"[Retention] WARNING: Lap {lap_id} not moved to {tier}: {e}", flush=True)
+            report['failed'] += 1
+            continue
+        if samples is None:
+            continue
+        before, after = samples
+        report[tier] += 1
+        report['samples_removed'] += before - after
+        session_id = shards.session_of_lap(lap_id)
+        if session_id is not None:
+            touched_sessions.add(session_id)
+    # Old sessions' shards are not written to any more, so they can be rebuilt in place.
+    for session_id in touched_sessions:
+        try:
+            report['bytes_reclaimed'] += shards.compact_shard(session_id)
+        except Exception as e:
+            print(f"[Retention] WARNING: Shard of session {session_id} not compacted: {e}", flush=True)
+    report['bytes_reclaimed'] += compact(should_stop=should_stop)
+    report['free_bytes'] = _pragma("freelist_count") * _pragma("page_size")
+    return report
+
+def format_report(report: dict) -> str:
+    return (f"{report[DOWNSAMPLED]} laps downsampled, {report[DROPPED]} dropped, "
+            + (f"{report['failed']} failed, " if report['failed'] else "")
+            + f"{report['samples_removed']} samples removed, {report['bytes_reclaimed'] / 1e6:.1f} MB reclaimed"
+            + (f" ({report['free_bytes'] / 1e6:.1f} MB still free; run a full VACUUM to release it)"
+               if report['free_bytes'] else ""))
+
+class RetentionJob(threading.Thread):
+    """
+    Runs the retention policy in the background: once shortly after the
+    daemon starts, then every `interval` seconds. Lap changes go through the
+    persistence writer; compaction runs on this thread's own connection,
+    because incremental_vacuum cannot run inside the writer's transactions.
+    """
+    INITIAL_DELAY = 60.0
+    INTERVAL = 6 * 3600.0
+
+    def __init__(self, writer, policy: RetentionPolicy | None = None,
+                 initial_delay: float = INITIAL_DELAY, interval: float = INTERVAL):
+        super().__init__(daemon=True, name="RetentionJob")
+        self.writer = writer
+        self.policy = policy or RetentionPolicy()
+        self.initial_delay = initial_delay
+        self.interval = interval
+        self.runs = 0
+        self.last_report = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        delay = self.initial_delay
+        while not self._stop_event.wait(delay):
+            delay = self.interval
+            db.connect(reuse_if_open=True)
+            try:
+                started = time.perf_counter()
+                self.last_report = run_retention(self.policy, submit=self._submit, should_stop=self._stop_event.is_set)
+                self.runs += 1
+                print(f"[RetentionJob] {format_report(self.last_report)} in {time.perf_counter() - started:.1f}s.", flush=True)
+            except Exception as e:
+                print(f"[RetentionJob] ERROR: Retention pass failed: {e}", flush=True)
+            finally:
+                db.close()
+
+    def _submit(self, fn, *args):
+        return self.writer.submit(fn, *args).result()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the telemetry retention policy to the database.")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="finish with a full VACUUM (also converts older databases to incremental compaction)")
+    args = parser.parse_args()
+
+    from .manager import initialize_database
+    initialize_database()
+    db.connect(reuse_if_open=True)
+    try:
+        policy = RetentionPolicy()
+        if args.dry_run:
+            plan = plan_retention(policy)
+            counts = {tier: sum(1 for _, t in plan if t == tier) for tier in (DOWNSAMPLED, DROPPED)}
+            print(f"[Retention] Would downsample {counts[DOWNSAMPLED]} laps and drop telemetry of {counts[DROPPED]}.")
+            return
+        report = run_retention(policy)
+        if args.vacuum:
+            report['bytes_reclaimed'] += vacuum()
+            report['free_bytes'] = 0
+        print(f"[Retention] {format_report(report)}.", flush=True)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+# rw_backend/database/shards.py
+
+import argparse
+import os
+import sqlite3
+from contextlib import contextmanager
+from .models import db, Session, Stint, Lap, LapChannels
+from .manager import write_transaction
+
+# Lap telemetry lives in one SQLite file per session, in a telemetry/ folder
+# next to the main database. The main file keeps only metadata, small enough
+# to stay in the page cache, and deleting a session's telemetry is an unlink.
+#
+# Shards are opened with their own short-lived connection rather than
+# ATTACHed: SQLite refuses ATTACH inside a transaction, and the persistence
+# writer runs every command inside one.
+SHARD_DIR_NAME = "telemetry"
+SHARD_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS lap_channels (
+        lap_id INTEGER PRIMARY KEY,
+        sample_count INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+"""
+BUSY_TIMEOUT = 5.0
+# A deleted session's shard files are renamed with this suffix until the delete commits.
+DELETED_SUFFIX = ".deleted"
+
+def shard_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db.database)), SHARD_DIR_NAME)
+
+def shard_path(session_id: int) -> str:
+    return os.path.join(shard_dir(), f"session-{int(session_id)}.db")
+
+def session_of_lap(lap_id: int) -> int | None:
+    return Lap.select(Stint.session).join(Stint).where(Lap.id == lap_id).scalar()
+
+@contextmanager
+def open_shard(session_id: int, create: bool = False):
+    """
+    A connection to a session's shard, committed when the block exits
+    cleanly. Yields None if the session has no shard and `create` is False.
+    """
+    path = shard_path(session_id)
+    if not create and not os.path.exists(path):
+        yield None
+        return
+    if create:
+        os.makedirs(shard_dir(), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    try:
+        with connection:
+            if create:
+                connection.execute(SHARD_SCHEMA)
+            yield connection
+    finally:
+        connection.close()
+
+def write_lap_blob(lap_id: int, sample_count: int, data: bytes):
+    with open_shard(session_of_lap(lap_id), create=True) as shard:
+        shard.execute("INSERT OR REPLACE INTO lap_channels (lap_id, sample_count, data) VALUES (?, ?, ?)",
+                      (lap_id, sample_count, data))
+
+def read_lap_blob(lap_id: int) -> bytes | None:
+    session_id = session_of_lap(lap_id)
+    if session_id is None:
+        return None
+    with open_shard(session_id) as shard:
+        if shard is None:
+            return None
+        row = shard.execute("SELECT data FROM lap_channels WHERE lap_id = ?", (lap_id,)).fetchone()
+    return row[0] if row else None
+
+def has_lap_blob(lap_id: int) -> bool:
+    session_id = session_of_lap(lap_id)
+    if session_id is None:
+        return False
+    with open_shard(session_id) as shard:
+        return bool(shard and shard.execute("SELECT 1 FROM lap_channels WHERE lap_id = ?", (lap_id,)).fetchone())
+
+def delete_lap_blob(lap_id: int) -> bool:
+    session_id = session_of_lap(lap_id)
+    if session_id is None:
+        return False
+    with open_shard(session_id) as shard:
+        return bool(shard and shard.execute("DELETE FROM lap_channels WHERE lap_id = ?", (lap_id,)).rowcount)
+
+def shard_lap_ids(session_id: int) -> set[int]:
+    with open_shard(session_id) as shard:
+        if shard is None:
+            return set()
+        return {lap_id for (lap_id,) in shard.execute("SELECT lap_id FROM lap_channels")}
+
+def compact_shard(session_id: int) -> int:
+    """VACUUMs a session's shard, or removes it once it holds no laps; returns the bytes reclaimed."""
+    path = shard_path(session_id)
+    if not os.path.exists(path):
+        return 0
+    before = os.path.getsize(path)
+    if not shard_lap_ids(session_id):
+        remove_shard(session_id)
+        return before
+    with open_shard(session_id) as shard:
+        shard.isolation_level = None  # VACUUM cannot run in a transaction
+        shard.execute("VACUUM")
+    return max(0, before - os.path.getsize(path))
+
+def remove_shard(session_id: int) -> int:
+    """Unlinks a session's shard (and any journal left beside it); returns the bytes freed."""
+    freed = 0
+    path = shard_path(session_id)
+    for leftover in (path, path + "-journal", path + "-wal", path + "-shm"):
+        if os.path.exists(leftover):
+            freed += os.path.getsize(leftover)
+            os.remove(leftover)
+    return freed
+
+def _shard_files(session_id: int) -> list[str]:
+    path = shard_path(session_id)
+    return [leftover for leftover in (path, path + "-journal", path + "-wal", path + "-shm") if os.path.exists(leftover)]
+
+def delete_session(session_id: int) -> int:
+    """
+    Deletes a session, its stints and laps from the main database and unlinks
+    its telemetry shard. Returns the shard bytes freed.
+
+    The shard is renamed aside before the delete commits: a shard that cannot
+    be moved (held open by another process) raises OSError and the session
+    stays, rather than the session going and its shard being left for the
+    next session given the same id.
+    """
+    moved = []
+    try:
+        for leftover in _shard_files(session_id):
+            os.replace(leftover, leftover + DELETED_SUFFIX)
+            moved.append(leftover)
+        with write_transaction():
+            Session.delete().where(Session.id == session_id).execute()
+    except BaseException:
+        for leftover in moved:
+            os.replace(leftover + DELETED_SUFFIX, leftover)
+        raise
+    freed = 0
+    for leftover in moved:
+        freed += os.path.getsize(leftover + DELETED_SUFFIX)
+        os.remove(leftover + DELETED_SUFFIX)
+    return freed
+
+# Session and lap ids have no AUTOINCREMENT, so SQLite gives a deleted or
+# rolled-back record's id to the next one. Shard writes commit on their own
+# connection, outside the writer's transaction, so a shard can still hold
+# telemetry for a record the main database never kept. New records clear
+# whatever their id left behind before any telemetry is written for them.
+def clear_stale_session(session_id: int):
+    """Removes a shard left under a new session's id."""
+    try:
+        if remove_shard(session_id):
+            print(f"[Shards] Removed a stale shard left under new session id {session_id}.", flush=True)
+    except OSError as e:
+        print(f"[Shards] WARNING: Could not remove the stale shard of new session {session_id}: {e}", flush=True)
+
+def clear_stale_lap(lap_id: int):
+    """Removes channels left in the shard under a new lap's id."""
+    if delete_lap_blob(lap_id):
+        print(f"[Shards] Removed stale telemetry left under new lap id {lap_id}.", flush=True)
+
+def migrate_to_shards() -> int:
+    """Moves LapChannels records out of the main database into the session shards; returns laps moved."""
+    moved = 0
+    lap_ids = [lap_id for (lap_id,) in LapChannels.select(LapChannels.lap).order_by(LapChannels.lap).tuples()]
+    for lap_id in lap_ids:
+        record = LapChannels.get_by_id(lap_id)
+        with db.atomic():
+            write_lap_blob(lap_id, record.sample_count, bytes(record.data))
+            record.delete_instance()
+        moved += 1
+        if moved % 100 == 0:
+            print(f"[Shards] {moved}/{len(lap_ids)} laps moved...", flush=True)
+    return moved
+
+def main():
+    parser = argparse.ArgumentParser(description="Move lap telemetry out of the main database into per-session shards.")
+    parser.add_argument("--vacuum", action="store_true", help="compact the main database afterwards")
+    args = parser.parse_args()
+
+    from .manager import initialize_database
+    initialize_database()
+    db.connect(reuse_if_open=True)
+    try:
+        moved = migrate_to_shards()
+        print(f"[Shards] Moved {moved} laps into {shard_dir()}.", flush=True)
+        if args.vacuum:
+            print("[Shards] Vacuuming main database...", flush=True)
+            db.execute_sql("VACUUM")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# rw_backend/database/writer.py
+
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+from .models import db
+from .manager import write_transaction, format_lock_waits
+
+class PersistenceWriter(threading.Thread):
+    """
+    Owns the daemon's database writes. Handlers submit write commands and get
+    a Future for the result (e.g. a new Lap record) instead of waiting on disk.
+
+    Commands run one at a time in submission order, so a command may call
+    .result() on the Future of any command submitted before it. Everything
+    queued when the worker wakes up is committed as one transaction, with a
+    savepoint per command so one failing command does not undo the others.
+    The worker keeps one connection open for its whole life and takes the
+    write lock at the start of each batch, timing the wait (see manager.py).
+
+    Futures are resolved only once their batch has committed; if the commit
+    fails, every Future in the batch fails with it. Until then, only later
+    commands in the same batch see a command's outcome.
+    """
+    MAX_BATCH = 500
+
+    def __init__(self):
+        super().__init__(daemon=True, name="PersistenceWriter")
+        self._commands = Queue()
+        self.commands_run = 0
+        self.commands_failed = 0
+        self.transactions = 0
+        self.largest_batch = 0
+        self.busy_time = 0.0
+
+    def submit(self, fn, *args) -> Future:
+        future = WriteFuture(self)
+        self._commands.put((fn, args, future))
+        return future
+
+    def after_commit(self, fn, *args) -> Future:
+        """
+        Runs fn(*args) on the worker once everything submitted before it has
+        been committed or has failed, outside any transaction (so `fn` must
+        not write to the database). Returns a Future for its result.
+        """
+        done = Future()
+
+        def run(_):
+            try:
+                done.set_result(fn(*args))
+            except Exception as e:
+                print(f"[PersistenceWriter] ERROR: {getattr(fn, '__qualname__', fn)} failed after commit: {e}", flush=True)
+                done.set_exception(e)
+
+        self.submit(_no_op).add_done_callback(run)
+        return done
+
+    def run(self):
+        print("[PersistenceWriter] Thread started.", flush=True)
+        db.connect(reuse_if_open=True)
+        stopping = False
+        while not stopping:
+            batch = [self._commands.get()]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(self._commands.get_nowait())
+                except Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [command for command in batch if command is not None]
+            if batch:
+                self._run_batch(batch)
+        db.close()
+        print(f"[PersistenceWriter] Thread stopped. {self.commands_run} commands in {self.transactions} transactions "
+              f"({self.commands_failed} failed, largest batch {self.largest_batch}, {self.busy_time:.1f}s busy; "
+              f"{format_lock_waits()}).", flush=True)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        outcomes = []
+        try:
+            with write_transaction():
+                for fn, args, future in batch:
+                    try:
+                        with db.atomic():
+                            result = fn(*args)
+                    except Exception as e:
+                        self.commands_failed += 1
+                        print(f"[PersistenceWriter] ERROR: {getattr(fn, '__qualname__', fn)} failed: {e}", flush=True)
+                        outcomes.append((future, None, e))
+                    else:
+                        outcomes.append((future, result, None))
+                    future._staged = outcomes[-1][1:]
+        except Exception as e:
+            # The write lock or the commit failed; nothing in this batch was saved.
+            print(f"[PersistenceWriter] ERROR: Failed to commit {len(batch)} commands: {e}", flush=True)
+            outcomes = [(future, None, e) for _, _, future in batch]
+        self.commands_run += len(batch)
+        self.transactions += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.busy_time += time.perf_counter() - started
+        # Only now is the outcome final; done-callbacks run here, after the commit.
+        for future, result, exception in outcomes:
+            future._staged = None
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def stop(self):
+        """Runs everything already submitted, then stops the worker."""
+        self._commands.put(None)
+        self.join()
+
+def _no_op():
+    return None
+
+class WriteFuture(Future):
+    """
+    A command's Future. While its batch is still open, the worker itself
+    (running a later command of the batch) reads the staged outcome; every
+    other thread waits for the commit.
+    """
+    def __init__(self, writer: PersistenceWriter):
+        super().__init__()
+        self._writer = writer
+        self._staged = None     # (result, exception) until the batch commits
+
+    def _staged_outcome(self):
+        staged = self._staged
+        if staged is not None and threading.current_thread() is self._writer:
+            return staged
+        return None
+
+    def result(self, timeout=None):
+        staged = self._staged_outcome()
+        if staged is None:
+            return super().result(timeout)
+        result, exception = staged
+        if exception is not None:
+            raise exception
+        return result
+
+    def exception(self, timeout=None):
+        staged = self._staged_outcome()
+        if staged is None:
+            return super().exception(timeout)
+        return staged[1]
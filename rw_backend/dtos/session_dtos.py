@@ -3,7 +3,8 @@
 import json
 from datetime import timedelta
 import statistics
-from rw_backend.database.models import Session, Lap, Stint, Setup, Car, Track, Driver, Simulator, LapTelemetry
+from rw_backend.database.models import Session, Lap, Stint, Setup, Car, Track, Driver, Simulator
+from rw_backend.database import lap_channels
 import peewee as pw
 
 # --- Helper Functions ---
@@ -55,9 +56,7 @@ def _map_stint_to_dto(stint: Stint, all_stint_laps: list[Lap]) -> dict:
     end_time = stint.updated_at.isoformat() if stint.ended_on_lap is not None else None
 
     # Fuel Used (This is an approximation as the first snapshot might not be at lap start)
-    first_telemetry = LapTelemetry.select(LapTelemetry.fuel_level).join(Lap).where(Lap.stint == stint).order_by(LapTelemetry.id.asc()).first()
-    last_telemetry = LapTelemetry.select(LapTelemetry.fuel_level).join(Lap).where(Lap.stint == stint).order_by(LapTelemetry.id.desc()).first()
-    fuel_used = (first_telemetry.fuel_level - last_telemetry.fuel_level) if first_telemetry and last_telemetry else 0.0
+    fuel_used = lap_channels.fuel_used(sorted(lap.id for lap in all_stint_laps))
 
     return {
         "id": stint.id, "stintNumber": stint.stint_number, "startedOnLap": stint.started_on_lap,
@@ -78,9 +77,7 @@ def _get_session_analytics(session: Session, all_laps: list[Lap], valid_laps: li
     optimal_lap_s = best_s1 + best_s2 + best_s3 if best_s1 and best_s2 and best_s3 else None
 
     # Fuel Used for the session
-    first_telemetry = LapTelemetry.select(LapTelemetry.fuel_level).join(Lap).join(Stint).where(Stint.session == session).order_by(LapTelemetry.id.asc()).first()
-    last_telemetry = LapTelemetry.select(LapTelemetry.fuel_level).join(Lap).join(Stint).where(Stint.session == session).order_by(LapTelemetry.id.desc()).first()
-    fuel_used = (first_telemetry.fuel_level - last_telemetry.fuel_level) if first_telemetry and last_telemetry else 0.0
+    fuel_used = lap_channels.fuel_used(sorted(lap.id for lap in all_laps))
 
     # Distance Covered
     distance_m = len(all_laps) * session.track.length_m
@@ -37,7 +37,7 @@ class LapDetector:
     def detect(self, player_scoring, last_player_data, telemetry_data, player_state):
         # This logic remains the same: we track provisional sector times based on sector changes.
         current_sector = player_scoring.mSector
-        last_sector = last_player_data.get('mSector', -1)
+        last_sector = last_player_data.mSector if last_player_data else -1
         if current_sector != last_sector:
             current_time = telemetry_data.mElapsedTime
             if last_sector == 1 and current_sector == 2:
@@ -48,7 +48,7 @@ class LapDetector:
 
         # This logic is simplified to remove the "pending lap" state.
         current_laps = player_scoring.mTotalLaps
-        last_laps = last_player_data.get('mTotalLaps', -1)
+        last_laps = last_player_data.mTotalLaps if last_player_data else -1
         if current_laps > last_laps and last_laps != -1:
             self._handle_lap_completion(player_scoring, last_player_data, player_state)
             # We now always reset for the next lap, the EventGenerator handles pit exit resets separately.
@@ -72,7 +72,7 @@ class LapDetector:
         return {'lap_number': player_scoring.mTotalLaps, 'lap_time': lap_time, 'sector1_time': s1, 'sector2_time': s2, 'sector3_time': s3}
 
     def _handle_lap_completion(self, player_scoring, last_player_data, player_state):
-        is_valid_from_sim = last_player_data.get('mCountLapFlag') == 2
+        is_valid_from_sim = last_player_data.mCountLapFlag == 2
         final_is_valid = is_valid_from_sim and player_state not in ["IN_GARAGE", "IN_PITS"]
 
         official_lap_time = player_scoring.mLastLapTime
@@ -86,7 +86,7 @@ class LapDetector:
             lap_time = self.provisional_s1_time + self.provisional_s2_time + s3
             lap_data = (lap_time, self.provisional_s1_time, self.provisional_s2_time, s3)
         
-        event = LapCompleted(lap_number=last_player_data.get('mTotalLaps'), lap_time=lap_data[0], sector1_time=lap_data[1], sector2_time=lap_data[2], sector3_time=lap_data[3], is_valid=final_is_valid)
+        event = LapCompleted(lap_number=last_player_data.mTotalLaps, lap_time=lap_data[0], sector1_time=lap_data[1], sector2_time=lap_data[2], sector3_time=lap_data[3], is_valid=final_is_valid)
         self.event_queue.put(event)
         # --- THIS IS THE FIX ---
         # A new lap only begins if the car is still on track after the last one finished.
@@ -1,5 +1,6 @@
 # rw_backend/generators/detectors/session_detector.py
 
+from concurrent.futures import Future
 from rw_backend.core.events import SessionStarted, SessionEnded
 from rw_backend.database.models import Simulator, Track, Car, Driver
 import time
@@ -9,23 +10,35 @@ def Cbytestring2Python(bytestring):
     try: return bytes(bytestring).partition(b'\0')[0].decode('utf-8').strip()
     except: return ""
 
+def _run_now(fn, *args) -> Future:
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
 def map_game_phase_to_session_type(game_phase: int) -> str:
     phases = { 0: "Testday", 1: "Practice", 2: "Practice", 3: "Practice", 4: "Practice", 5: "Qualifying", 6: "Qualifying", 7: "Qualifying", 8: "Qualifying", 9: "Warmup", 10: "Race", 11: "Race", 12: "Race", 13: "Race" }
     return phases.get(game_phase, "Unknown")
 
 class SessionDetector:
-    def __init__(self, event_queue):
+    def __init__(self, event_queue, submit=None):
         self.event_queue = event_queue
+        # `submit(fn, *args)` queues a database write and returns a Future for
+        # its result; the daemon passes the persistence writer's, so frame
+        # processing never waits for the lookups.
+        self._submit = submit or _run_now
 
-    def detect(self, raw_data, last_extended_data, last_player_data, player_state):
-        extended = raw_data.get('extended')
+    def detect(self, frame, last_extended_data, last_player_data, player_state):
+        extended = frame.extended
         if not extended:
             return None, None
 
-        was_session_started = last_extended_data.get('mSessionStarted', False)
+        was_session_started = bool(last_extended_data and last_extended_data.mSessionStarted)
         
         if extended.mSessionStarted and not was_session_started:
-            session_data = self._build_session_data(raw_data)
+            session_data = self._build_session_data(frame)
             if session_data:
                 self.event_queue.put(SessionStarted(**session_data))
                 return "IN_GARAGE", session_data
@@ -36,14 +49,14 @@ class SessionDetector:
             return "UNKNOWN", None
         
         if extended.mSessionStarted and was_session_started:
-            player_scoring = next((v for v in raw_data['scoring'].mVehicles if v.mIsPlayer), None)
+            player_scoring = frame.player_scoring
             if not player_scoring: return None, None
             
-            laps_reset = player_scoring.mTotalLaps == 0 and last_player_data.get('mTotalLaps', 0) > 0
+            laps_reset = player_scoring.mTotalLaps == 0 and last_player_data is not None and last_player_data.mTotalLaps > 0
             if player_state == "IN_GARAGE" and laps_reset:
                 print("[SessionDetector] Restart detected. Cycling session.", flush=True)
                 self.event_queue.put(SessionEnded())
-                session_data = self._build_session_data(raw_data)
+                session_data = self._build_session_data(frame)
                 if session_data:
                     self.event_queue.put(SessionStarted(**session_data))
                     return "IN_GARAGE", session_data
@@ -51,16 +64,36 @@ class SessionDetector:
         
         return None, None
 
-    def _build_session_data(self, raw_data) -> dict | None:
-        extended = raw_data.get('extended')
-        scoring = raw_data.get('scoring')
-        telemetry = raw_data.get('telemetry')
-        scoring_info = scoring.mScoringInfo
-        player_scoring = next((v for v in scoring.mVehicles if v.mIsPlayer), None)
+    def _build_session_data(self, frame) -> dict | None:
+        extended = frame.extended
+        telemetry = frame.telemetry
+        scoring_info = frame.scoring_info
+        player_scoring = frame.player_scoring
         
         if not (scoring_info and player_scoring and telemetry and extended):
             return None
 
+        records = self._submit(self._session_records, frame)
+
+        # The track's display name is the simulator's track name, seeded or not.
+        ticks_uid = extended.mTicksSessionStarted
+        uid = f"{Cbytestring2Python(scoring_info.mTrackName)}-{ticks_uid}"
+        
+        return {
+            "uid": uid,
+            "session_type": map_game_phase_to_session_type(scoring_info.mSession),
+            "track_temp": scoring_info.mTrackTemp,
+            "air_temp": scoring_info.mAmbientTemp,
+            "records": records,
+        }
+
+    @staticmethod
+    def _session_records(frame):
+        """The session's Simulator, Driver, Car and Track, creating placeholders for unknown ones."""
+        telemetry = frame.telemetry
+        scoring_info = frame.scoring_info
+        player_scoring = frame.player_scoring
+
         simulator, _ = Simulator.get_or_create(name="Le Mans Ultimate")
         driver, _ = Driver.get_or_create(name=Cbytestring2Python(player_scoring.mDriverName))
         
@@ -113,17 +146,4 @@ class SessionDetector:
                 }
             )
         # --- ROBUST TRACK LOOKUP END ---
-
-        ticks_uid = extended.mTicksSessionStarted
-        uid = f"{track.display_name}-{ticks_uid}"
-        
-        return {
-            "uid": uid,
-            "simulator_id": simulator.id,
-            "track_id": track.id,
-            "car_id": car.id,
-            "driver_id": driver.id,
-            "session_type": map_game_phase_to_session_type(scoring_info.mSession),
-            "track_temp": scoring_info.mTrackTemp,
-            "air_temp": scoring_info.mAmbientTemp
-        }
\ No newline at end of file
+        return simulator, driver, car, track
\ No newline at end of file
@@ -2,16 +2,54 @@
 
 import json
 import hashlib
+import os
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from rw_backend.database.models import Setup
 
 class SetupDetector:
     """
     Detects the active car setup by calling the LMU Garage API
     and finds or creates a corresponding record in the database.
+
+    Lookups run on a single background worker over one pooled HTTP session,
+    so the event generator never waits on the game's REST server. Setup ids
+    are cached by settings checksum; a known setup costs one /summary call.
     """
-    LMU_SUMMARY_API_URL = "http://localhost:6397/rest/garage/summary"
-    LMU_OVERVIEW_API_URL = "http://localhost:6397/rest/garage/UIScreen/CarSetupOverview"
+    LMU_API_URL = os.getenv("RACEWORKSHOP_GARAGE_API", "http://localhost:6397")
+    SUMMARY_PATH = "/rest/garage/summary"
+    OVERVIEW_PATH = "/rest/garage/UIScreen/CarSetupOverview"
+    TIMEOUT = 1
+
+    def __init__(self, base_url: str | None = None, write=None):
+        # `write(fn, *args)` runs a database write and returns its result; the
+        # daemon passes one that goes through the persistence writer.
+        self._write = write or (lambda fn, *args: fn(*args))
+        base_url = (base_url or self.LMU_API_URL).rstrip("/")
+        self.summary_url = base_url + self.SUMMARY_PATH
+        self.overview_url = base_url + self.OVERVIEW_PATH
+        self.http = requests.Session()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SetupDetector")
+        self._setup_ids = {}
+
+    def request_setup(self, car_id, track_id) -> Future:
+        """Starts a lookup on the worker; the Future resolves to the setup id or None."""
+        return self._worker.submit(self.get_setup_for_stint, car_id, track_id)
+
+    def request_setup_for_session(self, records: Future) -> Future:
+        """
+        Like request_setup, with the car and track from a session's pending
+        records lookup (SessionStarted.records), waited for on the worker.
+        """
+        return self._worker.submit(self._setup_for_session, records)
+
+    def _setup_for_session(self, records: Future):
+        try:
+            _, _, car, track = records.result()
+        except Exception as e:
+            print(f"[SetupDetector] WARNING: No setup lookup; the session's car and track are unknown: {e}", flush=True)
+            return None
+        return self.get_setup_for_stint(car.id, track.id)
 
     def get_setup_for_stint(self, car_id, track_id):
         """
@@ -21,44 +59,48 @@ class SetupDetector:
         """
         try:
             # --- STEP 1: Get summary data for identification ---
-            summary_response = requests.get(self.LMU_SUMMARY_API_URL, timeout=1)
+            summary_response = self.http.get(self.summary_url, timeout=self.TIMEOUT)
             summary_response.raise_for_status()
             summary_data = summary_response.json()
-            
+
             setup_name = summary_data.get('activeSetup')
             settings_summary_obj = summary_data.get('settingSummaries')
 
             if not setup_name or not settings_summary_obj:
                 print("[SetupDetector] WARNING: Could not find setup info in /summary response.", flush=True)
                 return None
-            
+
             # --- THIS IS THE FIX: Create checksum from the settingSummaries object ---
             settings_summary_json = json.dumps(settings_summary_obj, sort_keys=True)
             checksum = hashlib.sha256(settings_summary_json.encode('utf-8')).hexdigest()
             # --- END FIX ---
 
+            if checksum in self._setup_ids:
+                return self._setup_ids[checksum]
+
             # --- STEP 2: Check if this exact setup already exists ---
             existing_setup = Setup.get_or_none(checksum=checksum)
             if existing_setup:
                 print(f"[SetupDetector] Existing setup '{setup_name}' (ID #{existing_setup.id}) detected.", flush=True)
+                self._setup_ids[checksum] = existing_setup.id
                 return existing_setup.id
 
             # --- STEP 3: If new, and only if new, get the detailed data ---
             print(f"[SetupDetector] New setup '{setup_name}' detected. Fetching details...", flush=True)
-            overview_response = requests.get(self.LMU_OVERVIEW_API_URL, timeout=1)
+            overview_response = self.http.get(self.overview_url, timeout=self.TIMEOUT)
             overview_response.raise_for_status()
             overview_data = overview_response.json()
 
             # Extract the necessary objects for storage
             setup_details_obj = overview_data.get('carSetup', {}).get('garageValues', {})
             weather_details_obj = overview_data.get('currentWeather', {})
-            
+
             summary_json = json.dumps(summary_data, sort_keys=True)
             setup_details_json = json.dumps(setup_details_obj, sort_keys=True)
             weather_details_json = json.dumps(weather_details_obj, sort_keys=True)
 
             # --- STEP 4: Create the new record with all data ---
-            new_setup = Setup.create(
+            new_setup = self._write(lambda: Setup.create(
                 car_id=car_id,
                 track_id=track_id,
                 name=setup_name,
@@ -66,9 +108,10 @@ class SetupDetector:
                 summary_data=summary_json,
                 setup_details=setup_details_json,
                 weather_details=weather_details_json
-            )
-            
+            ))
+
             print(f"[SetupDetector] Stored new setup with ID #{new_setup.id}", flush=True)
+            self._setup_ids[checksum] = new_setup.id
             return new_setup.id
 
         except requests.exceptions.RequestException as e:
@@ -76,4 +119,8 @@ class SetupDetector:
             return None
         except Exception as e:
             print(f"[SetupDetector] ERROR: An error occurred while fetching setup: {e}", flush=True)
-            return None
\ No newline at end of file
+            return None
+
+    def close(self):
+        self._worker.shutdown(wait=True)
+        self.http.close()
@@ -1,6 +1,7 @@
 # rw_backend/generators/event_generator.py
 
 import threading
+import time
 from queue import Queue
 # --- CHANGE START: Removed LapStarted from imports ---
 from rw_backend.core.events import TelemetryUpdate, LapAborted
@@ -10,98 +11,119 @@ from .detectors.lap_detector import LapDetector
 from .detectors.stint_detector import StintDetector
 from .detectors.player_state_detector import PlayerStateDetector
 from .detectors.setup_detector import SetupDetector
+from .frame_records import PLAYER_SCORING_FIELDS, EXTENDED_FIELDS
+from rw_backend.core.latency import tracer
 
 class EventGenerator(threading.Thread):
-    def __init__(self, raw_data_queue: Queue, event_queue: Queue):
+    def __init__(self, raw_data_queue: Queue, event_queue: Queue, writer=None):
         super().__init__(daemon=True)
         self.raw_data_queue = raw_data_queue
         self.event_queue = event_queue
         self._running = threading.Event()
         
-        self.last_extended_data, self.last_player_data = {}, {}
+        # Previous-frame records; None until the first frame has been seen.
+        self.last_extended_data, self.last_player_data = None, None
         self.player_state_detector = PlayerStateDetector()
         self.player_state = self.player_state_detector.current_state
-        self.session_detector = SessionDetector(self.event_queue)
+        # With a persistence writer, the detectors' few writes (placeholder
+        # cars and tracks, new setups) go through its connection too. The
+        # session's records come back as a Future, so this thread never waits
+        # on the writer; only the setup worker blocks on its writes.
+        write = (lambda fn, *args: writer.submit(fn, *args).result()) if writer else None
+        self.session_detector = SessionDetector(self.event_queue, writer.submit if writer else None)
         self.lap_detector = LapDetector(self.event_queue)
         self.stint_detector = StintDetector(self.event_queue)
-        self.setup_detector = SetupDetector()
-        self.current_session_car_id = None
-        self.current_session_track_id = None
+        self.setup_detector = SetupDetector(write=write)
+        self.current_session_records = None
+        self.frames_processed = 0
 
     def run(self):
         print("[Event Generator] Thread started.", flush=True)
         self._running.set()
         while self._running.is_set():
-            raw_data = self.raw_data_queue.get()
-            if raw_data is None: break
+            frame = self.raw_data_queue.get()
+            if frame is None: break
+            dequeued_at = time.perf_counter()
+            # Recorded here rather than by the collector, which may run in
+            # another process with its own tracer. Replayed frames were not read.
+            if frame.read_time:
+                tracer.record("collector_read", frame.read_time)
+            tracer.record("frame_queue", dequeued_at - frame.collected_at)
+            self._process_frame(frame)
+            tracer.record("detectors", time.perf_counter() - dequeued_at)
+            self.frames_processed += 1
+        self.setup_detector.close()
 
-            extended = raw_data.get('extended')
-            
-            old_player_state = self.player_state
-            new_state, session_data = self.session_detector.detect(raw_data, self.last_extended_data, self.last_player_data, old_player_state)
-            
-            if new_state:
-                self.player_state = new_state
-            
-            # If the detector returned new session data, we update our internal state.
-            if session_data:
-                self.current_session_car_id = session_data['car_id']
-                self.current_session_track_id = session_data['track_id']
-                if self.player_state == "IN_GARAGE" and old_player_state == "UNKNOWN":
-                    self.lap_detector.reset_for_new_session(raw_data.get('telemetry'))
-             # --- CHANGE END ---
+    def _process_frame(self, frame):
+        extended = frame.extended
+        
+        old_player_state = self.player_state
+        new_state, session_data = self.session_detector.detect(frame, self.last_extended_data, self.last_player_data, old_player_state)
+        
+        if new_state:
+            self.player_state = new_state
+        
+        # If the detector returned new session data, we update our internal state.
+        if session_data:
+            self.current_session_records = session_data['records']
+            if self.player_state == "IN_GARAGE" and old_player_state == "UNKNOWN":
+                self.lap_detector.reset_for_new_session(frame.telemetry)
+         # --- CHANGE END ---
 
-            if not extended or not extended.mSessionStarted:
-                scoring = raw_data.get('scoring'); player_scoring = next((v for v in scoring.mVehicles if v.mIsPlayer), None) if scoring else None
-                if player_scoring: self.last_player_data = {f[0]: getattr(player_scoring, f[0]) for f in player_scoring._fields_}
-                if extended: self.last_extended_data = {f[0]: getattr(extended, f[0]) for f in extended._fields_}
-                continue
+        player_scoring = frame.player_scoring
+        if not extended or not extended.mSessionStarted:
+            if player_scoring: self.last_player_data = PLAYER_SCORING_FIELDS.extract(player_scoring)
+            if extended: self.last_extended_data = EXTENDED_FIELDS.extract(extended)
+            return
 
-            scoring = raw_data.get('scoring'); telemetry = raw_data.get('telemetry')
-            player_scoring = next((v for v in scoring.mVehicles if v.mIsPlayer), None) if scoring else None
-            if not player_scoring or not telemetry:
-                if extended: self.last_extended_data = {f[0]: getattr(extended, f[0]) for f in extended._fields_}
-                continue
+        telemetry = frame.telemetry
+        if not player_scoring or not telemetry:
+            if extended: self.last_extended_data = EXTENDED_FIELDS.extract(extended)
+            return
 
-            self.event_queue.put(TelemetryUpdate(payload=raw_data, player_state=self.player_state))
+        self.event_queue.put(TelemetryUpdate(payload=frame, player_state=self.player_state, queued_at=time.perf_counter()))
 
-            old_state = self.player_state
-            new_state = self.player_state_detector.update_and_get_state(player_scoring)
-            self.player_state = new_state
-            
-            is_lap_completed = player_scoring.mTotalLaps > self.last_player_data.get('mTotalLaps', -1)
-            state_has_changed = new_state != old_state
-            pit_stop_completed = player_scoring.mNumPitstops > self.last_player_data.get('mNumPitstops', 0)
-            
-            # --- CHANGE START: Simplified event firing ---
-            # The generator's responsibility is now only to fire the highest-level events.
-            # Dependent events (like LapStarted) are now chained by the handlers.
-            self.lap_detector.detect(player_scoring, self.last_player_data, telemetry, self.player_state)
+        old_state = self.player_state
+        new_state = self.player_state_detector.update_and_get_state(player_scoring)
+        self.player_state = new_state
+        
+        last_player_data = self.last_player_data
+        is_lap_completed = player_scoring.mTotalLaps > (last_player_data.mTotalLaps if last_player_data else -1)
+        state_has_changed = new_state != old_state
+        pit_stop_completed = player_scoring.mNumPitstops > (last_player_data.mNumPitstops if last_player_data else 0)
+        
+        # --- CHANGE START: Simplified event firing ---
+        # The generator's responsibility is now only to fire the highest-level events.
+        # Dependent events (like LapStarted) are now chained by the handlers.
+        self.lap_detector.detect(player_scoring, self.last_player_data, telemetry, self.player_state)
 
-            # --- CHANGE START: Pass setup_id to stint detector ---
-            if pit_stop_completed:
-                setup_id = self.setup_detector.get_setup_for_stint(self.current_session_car_id, self.current_session_track_id)
-                self.stint_detector.handle_pit_stop(player_scoring, self.last_player_data, setup_id)
+        # --- CHANGE START: Pass the setup lookup to stint detector ---
+        if pit_stop_completed:
+            self.stint_detector.handle_pit_stop(player_scoring, self.last_player_data, self._request_setup)
+        
+        if state_has_changed:
+            if old_state == 'ON_TRACK' and new_state == 'IN_GARAGE' and not is_lap_completed:
+                provisional_data = self.lap_detector.get_provisional_lap_data(player_scoring, telemetry)
+                self.event_queue.put(LapAborted(**provisional_data))
             
-            if state_has_changed:
-                if old_state == 'ON_TRACK' and new_state == 'IN_GARAGE' and not is_lap_completed:
-                    provisional_data = self.lap_detector.get_provisional_lap_data(player_scoring, telemetry)
-                    self.event_queue.put(LapAborted(**provisional_data))
-                
-                # We no longer need to fire LapStarted here.
-                if old_state == 'IN_PITS' and new_state == 'ON_TRACK':
-                    self.lap_detector.reset_for_next_lap(player_scoring.mLapStartET)
+            # We no longer need to fire LapStarted here.
+            if old_state == 'IN_PITS' and new_state == 'ON_TRACK':
+                self.lap_detector.reset_for_next_lap(player_scoring.mLapStartET)
 
-                # The orchestrator's job is to gather context and delegate.
-                # We fetch the setup_id here and pass it unconditionally.
-                setup_id = self.setup_detector.get_setup_for_stint(self.current_session_car_id, self.current_session_track_id)
-                self.stint_detector.handle_state_transition(
-                    self.player_state_detector.state_history, player_scoring, setup_id
-                )
-            # --- CHANGE END ---
-            
-            self.last_player_data = {f[0]: getattr(player_scoring, f[0]) for f in player_scoring._fields_}
-            self.last_extended_data = {f[0]: getattr(extended, f[0]) for f in extended._fields_}
+            # The orchestrator's job is to gather context and delegate.
+            # The setup is only looked up, off this thread, when a stint actually starts.
+            self.stint_detector.handle_state_transition(
+                self.player_state_detector.state_history, player_scoring, self._request_setup
+            )
+        # --- CHANGE END ---
+        
+        self.last_player_data = PLAYER_SCORING_FIELDS.extract(player_scoring)
+        self.last_extended_data = EXTENDED_FIELDS.extract(extended)
+
+    def _request_setup(self):
+        if self.current_session_records is None:
+            return self.setup_detector.request_setup(None, None)
+        return self.setup_detector.request_setup_for_session(self.current_session_records)
 
     def stop(self):
         self._running.clear()
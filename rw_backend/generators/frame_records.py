@@ -0,0 +1,14 @@
+# rw_backend/generators/frame_records.py
+
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2VehicleScoring, rF2Extended
+from rw_backend.pyRfactor2SharedMemory.rF2Fields import FieldPlan
+
+# The previous-frame values the detectors compare against. Only these fields
+# are copied out of each frame; add a field here before reading it from
+# last_player_data / last_extended_data.
+PLAYER_SCORING_FIELDS = FieldPlan(
+    rF2VehicleScoring,
+    ('mTotalLaps', 'mSector', 'mNumPitstops', 'mCountLapFlag'),
+    'PlayerScoringRecord'
+)
+EXTENDED_FIELDS = FieldPlan(rF2Extended, ('mSessionStarted',), 'ExtendedRecord')
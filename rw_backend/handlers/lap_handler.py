@@ -3,6 +3,7 @@
 from datetime import datetime
 from rw_backend.core.events import LapCompleted, LapStarted
 from rw_backend.database.models import Lap
+from rw_backend.database.shards import clear_stale_lap
 
 def format_time_from_seconds(seconds: float | None) -> str | None:
         if seconds is None or seconds <= 0: return None
@@ -11,19 +12,22 @@ def format_time_from_seconds(seconds: float | None) -> str | None:
         return f"{minutes}:{remaining_seconds:06.3f}"
 
 class LapHandler:
-    def __init__(self, stint_handler, event_queue): # <-- Add event_queue
+    def __init__(self, stint_handler, event_queue, writer): # <-- Add event_queue
         self.stint_handler = stint_handler
         self.event_queue = event_queue # <-- Store event_queue
-        self.current_lap_model = None
+        self.writer = writer
+        # Future for the current Lap record, created by the persistence writer.
+        self.current_lap = None
+        self.current_lap_number = None
 
-    def handle_event(self, event):
-        if isinstance(event, LapStarted):
-            self.on_lap_started(event)
-        elif isinstance(event, LapCompleted):
-            self.on_lap_completed(event)
+    def subscriptions(self):
+        return {
+            LapStarted: self.on_lap_started,
+            LapCompleted: self.on_lap_completed,
+        }
 
     def on_lap_started(self, event: LapStarted):
-        stint = self.stint_handler.current_stint_model
+        stint = self.stint_handler.current_stint
         
         # --- THIS IS THE FIX (PART 1) ---
         # A new lap record should only be created if there is an active stint.
@@ -31,42 +35,60 @@ class LapHandler:
         # because the stint has already been ended.
         if not stint:
             print("[LapHandler] INFO: Received LapStarted but no active stint. Ignoring.", flush=True)
-            self.current_lap_model = None # Ensure state is clean
+            self.current_lap = None # Ensure state is clean
+            self.current_lap_number = None
             return
         # --- END FIX ---
         
         # Guard against creating a duplicate lap record if events are ever misfired.
-        if self.current_lap_model and self.current_lap_model.lap_number == event.lap_number:
+        if self.current_lap and self.current_lap_number == event.lap_number:
             print(f"[LapHandler] INFO: Received duplicate LapStarted for lap #{event.lap_number}. Ignoring.", flush=True)
             return
 
         print(f"[LapHandler] Creating record for Lap #{event.lap_number} in database.", flush=True)
-        self.current_lap_model = Lap.create(
-            stint=stint, lap_number=event.lap_number,
+        self.current_lap = self.writer.submit(self._create_lap, stint, event.lap_number)
+        self.current_lap_number = event.lap_number
+
+    @staticmethod
+    def _create_lap(stint_future, lap_number: int):
+        lap = Lap.create(
+            stint=stint_future.result(), lap_number=lap_number,
             lap_time=-1.0, is_valid=False, timestamp=datetime.now()
         )
+        clear_stale_lap(lap.id)
+        return lap
 
     def on_lap_completed(self, event: LapCompleted):
-        if not self.current_lap_model or self.current_lap_model.lap_number != event.lap_number:
-            print(f"[LapHandler] WARNING: Received LapCompleted for lap {event.lap_number}, but was expecting {self.current_lap_model.lap_number if self.current_lap_model else 'None'}. Finding record to update.", flush=True)
-            stint = self.stint_handler.current_stint_model
+        if not self.current_lap or self.current_lap_number != event.lap_number:
+            print(f"[LapHandler] WARNING: Received LapCompleted for lap {event.lap_number}, but was expecting {self.current_lap_number if self.current_lap else 'None'}. Finding record to update.", flush=True)
+            stint = self.stint_handler.current_stint
             # If the stint is already closed, we can't find the lap. This is expected after "Return to Garage".
             if not stint:
                 print(f"[LapHandler] INFO: No active stint to find lap {event.lap_number}.", flush=True)
                 return
-            self.current_lap_model = Lap.get_or_none(stint=stint, lap_number=event.lap_number)
+            self.current_lap = self.writer.submit(self._find_lap, stint, event.lap_number)
+            self.current_lap_number = event.lap_number
+
+        self.writer.submit(self._complete_lap, self.current_lap, event)
+
+    @staticmethod
+    def _find_lap(stint_future, lap_number: int):
+        return Lap.get_or_none(stint=stint_future.result(), lap_number=lap_number)
 
-        if not self.current_lap_model:
+    @staticmethod
+    def _complete_lap(lap_future, event: LapCompleted):
+        lap = lap_future.result()
+        if not lap:
             print(f"[LapHandler] ERROR: Could not find Lap record for lap {event.lap_number} to update.", flush=True)
             return
             
         print(f"[LapHandler] Updating Lap #{event.lap_number} with final data.", flush=True)
-        self.current_lap_model.lap_time = event.lap_time
-        self.current_lap_model.sector1_time = event.sector1_time
-        self.current_lap_model.sector2_time = event.sector2_time
-        self.current_lap_model.sector3_time = event.sector3_time
-        self.current_lap_model.is_valid = event.is_valid
-        self.current_lap_model.save()
+        lap.lap_time = event.lap_time
+        lap.sector1_time = event.sector1_time
+        lap.sector2_time = event.sector2_time
+        lap.sector3_time = event.sector3_time
+        lap.is_valid = event.is_valid
+        lap.save()
 
         
     # Add this formatting method
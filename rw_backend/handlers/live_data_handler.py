@@ -30,37 +30,39 @@ class LiveDataHandler:
         self.lap_handler = lap_handler
         self.last_lap_object_sent = None
 
-    def handle_event(self, event):
-        if isinstance(event, TelemetryUpdate):
-            self.on_telemetry_update(event)
-        elif isinstance(event, LapCompleted):
-            # When a lap is completed, we format it and store it to be sent
-            # with the next telemetry update.
-            # We access the format_lap_for_ui method which should be part of LapHandler
-            self.last_lap_object_sent = self.lap_handler.format_lap_for_ui(event)
+    def subscriptions(self):
+        return {
+            TelemetryUpdate: self.on_telemetry_update,
+            LapCompleted: self.on_lap_completed,
+        }
+
+    def on_lap_completed(self, event: LapCompleted):
+        # When a lap is completed, we format it and store it to be sent
+        # with the next telemetry update.
+        # We access the format_lap_for_ui method which should be part of LapHandler
+        self.last_lap_object_sent = self.lap_handler.format_lap_for_ui(event)
 
     def on_telemetry_update(self, event: TelemetryUpdate):
-        raw_data = event.payload
-        telemetry = raw_data.get('telemetry')
-        scoring = raw_data.get('scoring')
+        frame = event.payload
+        telemetry = frame.telemetry
         
         # --- THE FIX: ADD THIS VALIDATION BLOCK ---
         # If we are not in a session, scoring_info will be None.
         # This guard clause prevents the handler from crashing the daemon.
-        scoring_info = scoring.mScoringInfo if scoring else None
+        scoring_info = frame.scoring_info
         if not scoring_info or not telemetry:
             # Optionally, send a "disconnected" or "in menus" status to the UI
             # For now, we just safely exit.
             return
         # --- END OF FIX ---
 
-        player_scoring = next((v for v in scoring.mVehicles if v.mIsPlayer), None)
+        player_scoring = frame.player_scoring
         if not player_scoring: return
 
         vel = telemetry.mLocalVel
         speed_ms = math.sqrt(vel.x**2 + vel.y**2 + vel.z**2)
         
-        session_id = self.session_handler.current_session_model.id if self.session_handler.current_session_model else -1
+        session_id = self.session_handler.current_session_id
 
         live_data = {
             "sessionId": session_id,
@@ -82,7 +84,7 @@ class LiveDataHandler:
             "lastLap": self.last_lap_object_sent,
         }
         
-        self.server.push_data(live_data)
+        self.server.push_data(live_data, collected_at=frame.collected_at)
         
         if self.last_lap_object_sent:
             self.last_lap_object_sent = None
\ No newline at end of file
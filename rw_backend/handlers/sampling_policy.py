@@ -0,0 +1,272 @@
+# rw_backend/handlers/sampling_policy.py
+
+import argparse
+import math
+import os
+
+# How the TelemetryHandler picks which frames of a lap to keep. A policy sees
+# every on-track frame of the lap, in order, and answers should_sample().
+#
+#   distance  one sample every `distance` metres (the original behaviour)
+#   time      one sample every `interval` seconds of session time
+#   adaptive  `min_distance` spacing while the driver is working the pedals or
+#             the wheel, `max_distance` on steady-state straights
+#
+# Every policy also rebases after a backwards jump in mLapDist (a spin, a
+# reset to track) and takes a sample at least every `max_interval` seconds,
+# so a slow or stationary car is still recorded.
+
+# Backwards movement smaller than this is treated as noise, not a rebase.
+REWIND_TOLERANCE = 1.0
+# Slack on time comparisons, for mElapsedTime's accumulated rounding.
+TIME_EPSILON = 1e-6
+# Longest gap between scoring updates that is bridged by dead reckoning.
+MAX_EXTRAPOLATION = 0.5
+
+def frame_lap_dist(frame) -> float:
+    """
+    The player's lap distance at a telemetry frame. mLapDist only changes
+    with scoring (~5 Hz, ~50 m apart at speed), so between scoring updates
+    it is carried forward by the car's forward speed, up to the track length.
+    """
+    lap_dist = frame.player_scoring.mLapDist
+    scoring_info = frame.scoring_info
+    if scoring_info is None:
+        return lap_dist
+    since_scoring = frame.telemetry.mElapsedTime - scoring_info.mCurrentET
+    if 0 < since_scoring < MAX_EXTRAPOLATION:
+        lap_dist += -frame.telemetry.mLocalVel.z * since_scoring
+        if scoring_info.mLapDist > 0:
+            lap_dist = min(lap_dist, scoring_info.mLapDist)
+    return lap_dist
+
+class SamplingPolicy:
+    name = None
+
+    def __init__(self, max_interval: float = 1.0):
+        self.max_interval = max_interval
+        self.reset()
+
+    def reset(self):
+        """Called at the start of every lap."""
+        self.last_dist = None
+        self.last_time = None
+
+    def expected_samples(self, track_length: float, lap_time: float) -> int | None:
+        """Samples a lap is likely to need, for sizing its buffer; None if unknown."""
+        return None
+
+    def should_sample(self, frame, lap_dist: float) -> bool:
+        elapsed = frame.telemetry.mElapsedTime
+        # Policies track state on every frame, so _due() is always asked first.
+        due = self._due(frame, lap_dist, elapsed)
+        sample = (due
+                  or self.last_dist is None
+                  or lap_dist < self.last_dist - max(REWIND_TOLERANCE, self._step())
+                  or elapsed >= self.last_time + self.max_interval - TIME_EPSILON)
+        if sample:
+            self.last_dist = lap_dist
+            self.last_time = elapsed
+        return sample
+
+    def _step(self) -> float:
+        return 0.0
+
+    def _due(self, frame, lap_dist: float, elapsed: float) -> bool:
+        """Whether the policy itself wants this frame; `last_dist` is None before the lap's first sample."""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+class FixedDistancePolicy(SamplingPolicy):
+    name = "distance"
+
+    def __init__(self, distance: float = 3.0, max_interval: float = 1.0):
+        self.distance = distance
+        super().__init__(max_interval)
+
+    def expected_samples(self, track_length, lap_time):
+        return int(track_length / self.distance) + 1 if track_length > 0 else None
+
+    def _step(self):
+        return self.distance
+
+    def _due(self, frame, lap_dist, elapsed):
+        return self.last_dist is not None and lap_dist >= self.last_dist + self.distance
+
+    def describe(self):
+        return f"distance ({self.distance:g} m)"
+
+class FixedTimePolicy(SamplingPolicy):
+    name = "time"
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        super().__init__(max_interval=interval)
+
+    def expected_samples(self, track_length, lap_time):
+        return int(lap_time / self.interval) + 1 if lap_time > 0 else None
+
+    def _due(self, frame, lap_dist, elapsed):
+        return False  # max_interval is the sampling interval
+
+    def describe(self):
+        return f"time ({self.interval * 1000:g} ms)"
+
+class AdaptivePolicy(SamplingPolicy):
+    """
+    Samples densely wherever brake, throttle or steering change faster than
+    their threshold (units per second) and for `hold` seconds afterwards, and
+    for as long as the brake is pressed, so braking zones and corner entries
+    are covered whole. Elsewhere the spacing relaxes to `max_distance`.
+    """
+    name = "adaptive"
+    THRESHOLDS = {'mFilteredBrake': 1.0, 'mFilteredThrottle': 1.0, 'mFilteredSteering': 0.5}
+    BRAKING = 0.05
+
+    def __init__(self, min_distance: float = 1.0, max_distance: float = 12.0, hold: float = 0.3,
+                 thresholds: dict | None = None, max_interval: float = 1.0):
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.hold = hold
+        self.thresholds = tuple((thresholds or self.THRESHOLDS).items())
+        super().__init__(max_interval)
+
+    def reset(self):
+        super().reset()
+        self.previous = None
+        self.active_until = -math.inf
+
+    def expected_samples(self, track_length, lap_time):
+        # Roughly a third of a lap is braking zones and corners.
+        return int(track_length / self.min_distance / 3 + track_length / self.max_distance) + 1 if track_length > 0 else None
+
+    def _step(self):
+        return self.max_distance
+
+    def _due(self, frame, lap_dist, elapsed):
+        telemetry = frame.telemetry
+        inputs = tuple(getattr(telemetry, field) for field, _ in self.thresholds)
+        previous, self.previous = self.previous, (elapsed, inputs)
+        became_active = False
+        if previous is not None and elapsed > previous[0]:
+            dt = elapsed - previous[0]
+            for (_, threshold), value, last in zip(self.thresholds, inputs, previous[1]):
+                if abs(value - last) / dt > threshold:
+                    became_active = elapsed >= self.active_until
+                    self.active_until = elapsed + self.hold
+                    break
+        if became_active:
+            return True  # catch the onset itself, not the next step
+        dense = elapsed < self.active_until or telemetry.mFilteredBrake > self.BRAKING
+        step = self.min_distance if dense else self.max_distance
+        return self.last_dist is not None and lap_dist >= self.last_dist + step
+
+    def describe(self):
+        return f"adaptive ({self.min_distance:g}-{self.max_distance:g} m)"
+
+SAMPLING_POLICIES = {
+    FixedDistancePolicy.name: FixedDistancePolicy,
+    FixedTimePolicy.name: FixedTimePolicy,
+    AdaptivePolicy.name: AdaptivePolicy,
+}
+
+def make_sampling_policy(name: str | None = None) -> SamplingPolicy:
+    """A policy by name; defaults to RACEWORKSHOP_SAMPLING, then 'distance'."""
+    name = name or os.getenv("RACEWORKSHOP_SAMPLING", FixedDistancePolicy.name)
+    if name not in SAMPLING_POLICIES:
+        raise ValueError(f"Unknown sampling policy '{name}'; expected one of {', '.join(SAMPLING_POLICIES)}.")
+    return SAMPLING_POLICIES[name]()
+
+# Channels the reconstruction error is measured on.
+ERROR_CHANNELS = ('speed', 'throttle', 'brake', 'steering')
+
+def _reconstruction_error(reference: dict, sampled: dict) -> dict:
+    """RMS error of each channel when the sampled lap is linearly interpolated back onto every frame."""
+    xs = sampled['lap_dist']
+    errors = {}
+    for name in ERROR_CHANNELS:
+        ys = sampled[name]
+        j, squared = 0, 0.0
+        for x, expected in zip(reference['lap_dist'], reference[name]):
+            while j + 1 < len(xs) - 1 and xs[j + 1] < x:
+                j += 1
+            if len(xs) == 1 or x <= xs[0]:
+                value = ys[0]
+            elif x >= xs[-1]:
+                value = ys[-1]
+            else:
+                x0, x1 = xs[j], xs[j + 1]
+                value = ys[j] if x1 == x0 else ys[j] + (ys[j + 1] - ys[j]) * (x - x0) / (x1 - x0)
+            squared += (value - expected) ** 2
+        errors[name] = math.sqrt(squared / len(reference['lap_dist']))
+    return errors
+
+def evaluate(policy: SamplingPolicy, lap_frames) -> dict:
+    """
+    Runs a policy over one lap's on-track frames and reports what it keeps:
+    samples, stored bytes (the LapChannels blob) and per-channel RMS error
+    against every frame.
+    """
+    from rw_backend.database.lap_channels import ChannelBuffer, pack_channels
+    from rw_backend.handlers.telemetry_handler import TelemetryHandler
+
+    reference, sampled = ChannelBuffer(len(lap_frames)), ChannelBuffer(len(lap_frames))
+    policy.reset()
+    for frame in lap_frames:
+        lap_dist = frame_lap_dist(frame)
+        values = TelemetryHandler._snapshot_values(frame, lap_dist)
+        reference.append(values)
+        if policy.should_sample(frame, lap_dist):
+            sampled.append(values)
+    sampled_columns = sampled.columns()
+    return {
+        'policy': policy.describe(),
+        'samples': len(sampled),
+        'bytes': len(pack_channels(sampled_columns)),
+        'rms': _reconstruction_error(reference.columns(), sampled_columns),
+    }
+
+def recorded_laps(path: str):
+    """Yields the on-track frames of each complete lap in a .rwrec recording."""
+    from rw_backend.simulators.lmu.recording import RecordingReader
+
+    lap, lap_number = [], None
+    for frame in RecordingReader(path).frames():
+        player = frame.player_scoring
+        if player is None or frame.telemetry is None:
+            continue
+        if player.mTotalLaps != lap_number:
+            # Only a lap that was started and finished on camera is complete.
+            if lap and lap_number is not None and lap[0].player_scoring.mLapDist < 50:
+                yield lap
+            lap, lap_number = [], player.mTotalLaps
+        if not player.mInPits:
+            lap.append(frame)
+
+def format_report(results: list[dict]) -> list[str]:
+    lines = [f"{'policy':<24}{'laps':>5}{'samples':>9}{'KB/lap':>8}" + ''.join(f"{'rms ' + c:>14}" for c in ERROR_CHANNELS)]
+    for policy in dict.fromkeys(r['policy'] for r in results):
+        laps = [r for r in results if r['policy'] == policy]
+        n = len(laps)
+        lines.append(f"{policy:<24}{n:>5}{sum(r['samples'] for r in laps) / n:>9.0f}"
+                     f"{sum(r['bytes'] for r in laps) / n / 1024:>8.1f}"
+                     + ''.join(f"{sum(r['rms'][c] for r in laps) / n:>14.4f}" for c in ERROR_CHANNELS))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare telemetry sampling policies on a recorded session.")
+    parser.add_argument("recording", help=".rwrec file to evaluate against")
+    parser.add_argument("--policy", choices=list(SAMPLING_POLICIES), action="append",
+                        help="policy to evaluate (repeatable; default all)")
+    args = parser.parse_args()
+
+    laps = list(recorded_laps(args.recording))
+    if not laps:
+        parser.error(f"{args.recording} has no complete laps")
+    results = [evaluate(SAMPLING_POLICIES[name](), lap) for name in (args.policy or SAMPLING_POLICIES) for lap in laps]
+    print("\n".join(format_report(results)))
+
+if __name__ == '__main__':
+    main()
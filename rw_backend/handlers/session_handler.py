@@ -3,28 +3,43 @@
 from datetime import datetime
 from rw_backend.core.events import SessionStarted, SessionEnded
 from rw_backend.database.models import Session
+from rw_backend.database.shards import clear_stale_session
 
 class SessionHandler:
-    def __init__(self):
-        self.current_session_model = None
-        
-    def handle_event(self, event):
-        if isinstance(event, SessionStarted):
-            self.on_session_started(event)
-        elif isinstance(event, SessionEnded):
-            self.on_session_ended(event)
+    def __init__(self, writer):
+        self.writer = writer
+        # Future for the current Session record, created by the persistence writer.
+        self.current_session = None
+
+    @property
+    def current_session_id(self) -> int:
+        """The current session's id, or -1 if there is none or it is not written yet."""
+        session = self.current_session
+        if session and session.done() and not session.exception():
+            return session.result().id
+        return -1
+
+    def subscriptions(self):
+        return {
+            SessionStarted: self.on_session_started,
+            SessionEnded: self.on_session_ended,
+        }
 
     def on_session_started(self, event: SessionStarted):
         print(f"[SessionHandler] Received SessionStarted event for UID: {event.uid}", flush=True)
-        
+        self.current_session = self.writer.submit(self._get_or_create_session, event)
+
+    @staticmethod
+    def _get_or_create_session(event: SessionStarted):
         # --- REFACTORED to use IDs from the event ---
+        simulator, driver, car, track = event.records.result()
         session, created = Session.get_or_create(
             game_session_uid=event.uid,
             defaults={
-                'simulator_id': event.simulator_id,
-                'track_id': event.track_id,
-                'car_id': event.car_id,
-                'driver_id': event.driver_id,
+                'simulator_id': simulator.id,
+                'track_id': track.id,
+                'car_id': car.id,
+                'driver_id': driver.id,
                 'session_type': event.session_type,
                 'started_at': datetime.now(),
                 'track_temp': event.track_temp,
@@ -35,15 +50,19 @@ class SessionHandler:
 
         if created:
             print(f"[SessionHandler] Created new Session #{session.id} in the database.", flush=True)
+            clear_stale_session(session.id)
         else:
             print(f"[SessionHandler] Resumed existing Session #{session.id} from the database.", flush=True)
-        
-        self.current_session_model = session
         return session
 
     def on_session_ended(self, event: SessionEnded):
-        if self.current_session_model:
-            print(f"[SessionHandler] Received SessionEnded event. Closing session #{self.current_session_model.id}", flush=True)
-            self.current_session_model.ended_at = datetime.now()
-            self.current_session_model.save()
-            self.current_session_model = None
\ No newline at end of file
+        if self.current_session:
+            self.writer.submit(self._close_session, self.current_session)
+            self.current_session = None
+
+    @staticmethod
+    def _close_session(session_future):
+        session = session_future.result()
+        print(f"[SessionHandler] Received SessionEnded event. Closing session #{session.id}", flush=True)
+        session.ended_at = datetime.now()
+        session.save()
\ No newline at end of file
@@ -4,54 +4,82 @@ from rw_backend.core.events import StintStarted, StintEnded, SessionStarted, Ses
 from rw_backend.database.models import Stint
 
 class StintHandler:
-    def __init__(self, session_handler, event_queue):
+    def __init__(self, session_handler, event_queue, writer):
         self.session_handler = session_handler
         self.event_queue = event_queue
-        self.current_stint_model = None
-
-    def handle_event(self, event):
-        if isinstance(event, SessionStarted):
-            self.current_stint_model = None
-        elif isinstance(event, StintStarted):
-            self.on_stint_started(event)
-        elif isinstance(event, StintEnded):
-            self.on_stint_ended(event)
-        elif isinstance(event, SessionEnded):
-            self.on_session_ended()
+        self.writer = writer
+        # Future for the open Stint record, created by the persistence writer.
+        self.current_stint = None
+
+    def subscriptions(self):
+        return {
+            SessionStarted: self.on_session_started,
+            StintStarted: self.on_stint_started,
+            StintEnded: self.on_stint_ended,
+            SessionEnded: self.on_session_ended,
+        }
+
+    def on_session_started(self, event: SessionStarted):
+        self.current_stint = None
 
     def on_stint_started(self, event: StintStarted):
-        session = self.session_handler.current_session_model
+        session = self.session_handler.current_session
         if not session:
             print("[StintHandler] WARNING: Received StintStarted but no active session.", flush=True)
             return
 
+        self.current_stint = self.writer.submit(self._create_stint, session, event)
+        if event.setup:
+            # Stint records are written before the setup lookup usually finishes;
+            # the setup is attached to this stint whenever it resolves.
+            stint = self.current_stint
+            event.setup.add_done_callback(lambda setup: self.writer.submit(self._assign_setup, stint, setup))
+        print(f"[StintHandler] Firing LapStarted for lap #{event.lap_number}", flush=True)
+        self.event_queue.put(LapStarted(lap_number=event.lap_number))
+
+    @staticmethod
+    def _create_stint(session_future, event: StintStarted):
+        session = session_future.result()
         stint_num = 1
         last_stint = Stint.select().where(Stint.session == session).order_by(Stint.stint_number.desc()).first()
         if last_stint:
             stint_num = last_stint.stint_number + 1
         
-        print(f"[StintHandler] Starting Stint #{stint_num} with Setup ID #{event.setup_id}", flush=True)
+        setup = f"Setup ID #{event.setup_id}" if event.setup_id is not None else "setup pending" if event.setup else "no setup"
+        print(f"[StintHandler] Starting Stint #{stint_num} with {setup}", flush=True)
         # --- CHANGE START: Add the setup_id to the new record ---
-        self.current_stint_model = Stint.create(
+        return Stint.create(
             session=session,
             setup_id=event.setup_id,
             stint_number=stint_num,
             started_on_lap=event.lap_number
         )
         # --- CHANGE END ---
-        
-        print(f"[StintHandler] Firing LapStarted for lap #{event.lap_number}", flush=True)
-        self.event_queue.put(LapStarted(lap_number=event.lap_number))
+
+    @staticmethod
+    def _assign_setup(stint_future, setup_future):
+        setup_id = setup_future.result()
+        if setup_id is None:
+            return
+        stint = stint_future.result()
+        print(f"[StintHandler] Stint #{stint.stint_number} is using Setup ID #{setup_id}", flush=True)
+        stint.setup_id = setup_id
+        stint.save()
 
     def on_stint_ended(self, event: StintEnded):
-        if self.current_stint_model:
-            print(f"[StintHandler] Ending Stint #{self.current_stint_model.stint_number}", flush=True)
-            self.current_stint_model.ended_on_lap = event.lap_number
-            self.current_stint_model.final_place = event.final_place
-            self.current_stint_model.save()
-            self.current_stint_model = None
-            
-    def on_session_ended(self):
-        if self.current_stint_model and self.current_stint_model.ended_on_lap is None:
+        if self.current_stint:
+            self.writer.submit(self._end_stint, self.current_stint, event)
+            self.current_stint = None
+
+    @staticmethod
+    def _end_stint(stint_future, event: StintEnded):
+        stint = stint_future.result()
+        print(f"[StintHandler] Ending Stint #{stint.stint_number}", flush=True)
+        stint.ended_on_lap = event.lap_number
+        stint.final_place = event.final_place
+        stint.save()
+
+    def on_session_ended(self, event: SessionEnded):
+        if self.current_stint:
             print("[StintHandler] Session ended, closing final open stint.", flush=True)
             self.on_stint_ended(StintEnded(lap_number=0, final_place=None))
\ No newline at end of file
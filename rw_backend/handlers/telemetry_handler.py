@@ -1,113 +1,182 @@
 # rw_backend/handlers/telemetry_handler.py
 
+import os
 from rw_backend.core.events import TelemetryUpdate, LapStarted, SessionEnded
-from rw_backend.database.models import Lap, Stint, LapTelemetry, db
+from rw_backend.database.lap_channels import ChannelBuffer, insert_buffer_rows, store_columns
+from rw_backend.database.journal import LapJournal, replay_journals
+from .sampling_policy import SamplingPolicy, make_sampling_policy, frame_lap_dist
+
+# Where lap telemetry goes: "columnar" keeps each lap as one LapChannels record
+# of compressed channel arrays, "rows" writes a LapTelemetry row per sample,
+# "both" does both.
+STORAGE_MODES = ("columnar", "rows", "both")
+
+KELVIN = 273.15
 
 class TelemetryHandler:
-    SAMPLING_DISTANCE = 3
     BUFFER_SIZE = 200
+    # Unflushed rows are in the journal, so they can wait for bigger batches.
+    JOURNALED_BUFFER_SIZE = 2000
+    # Lap buffer size when the policy cannot estimate one yet.
+    DEFAULT_LAP_SAMPLES = 2048
 
-    def __init__(self):
-        self.current_lap_model = None
-        self.telemetry_buffer = []
-        self.last_log_distance = -1.0
+    def __init__(self, lap_handler, writer, storage: str | None = None, sampling: SamplingPolicy | str | None = None,
+                 journal: bool | None = None):
+        self.lap_handler = lap_handler
+        self.writer = writer
+        storage = storage or os.getenv("RACEWORKSHOP_TELEMETRY_STORAGE", "columnar")
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown telemetry storage '{storage}'; expected one of {', '.join(STORAGE_MODES)}.")
+        self.store_rows = storage in ("rows", "both")
+        self.store_channels = storage in ("columnar", "both")
+        # Which frames of a lap are kept; see sampling_policy.py (RACEWORKSHOP_SAMPLING).
+        self.sampling = sampling if isinstance(sampling, SamplingPolicy) else make_sampling_policy(sampling)
+        # Crash-safe copy of the current lap (see journal.py); RACEWORKSHOP_JOURNAL=0 turns it off.
+        self.journaling = journal if journal is not None else os.getenv("RACEWORKSHOP_JOURNAL", "1") != "0"
+        self.flush_size = self.JOURNALED_BUFFER_SIZE if self.journaling else self.BUFFER_SIZE
+        # Future for the Lap record that buffered snapshots belong to.
+        self.current_lap = None
+        self.current_lap_number = None
+        # The current lap's snapshots, created on its first sample and sized from the track length.
+        self.lap_buffer = None
+        # Snapshots before this index have been handed to the writer as rows.
+        self.rows_flushed = 0
+        self.lap_journal = None
+        # Futures for the current lap's telemetry writes; its journal goes once they all succeed.
+        self.lap_writes = []
 
-    def handle_event(self, event):
-        if isinstance(event, LapStarted):
-            self._on_lap_started(event)
-        elif isinstance(event, TelemetryUpdate):
-            self._on_telemetry_update(event)
-        elif isinstance(event, SessionEnded):
-            self._on_session_ended(event)
+    def subscriptions(self):
+        return {
+            LapStarted: self._on_lap_started,
+            TelemetryUpdate: self._on_telemetry_update,
+            SessionEnded: self._on_session_ended,
+        }
 
     def _on_lap_started(self, event: LapStarted):
-        self._flush_buffer()
-        self.current_lap_model = Lap.select().order_by(Lap.id.desc()).first()
-        self.last_log_distance = -1.0
-        if not self.current_lap_model or self.current_lap_model.lap_number != event.lap_number:
+        self._finish_lap()
+        # The LapHandler is registered first, so its Future for this lap is already submitted.
+        self.current_lap = self.lap_handler.current_lap
+        self.current_lap_number = self.lap_handler.current_lap_number
+        self.sampling.reset()
+        if not self.current_lap or self.current_lap_number != event.lap_number:
              print(f"[TelemetryHandler] WARNING: Mismatch finding new lap record for lap #{event.lap_number}", flush=True)
-             self.current_lap_model = None
+             self.current_lap = None
 
     def _on_session_ended(self, event: SessionEnded):
-        self._flush_buffer()
-        self.current_lap_model = None
+        self._finish_lap()
+        self.current_lap = None
 
     def _on_telemetry_update(self, event: TelemetryUpdate):
-        if not self.current_lap_model or event.player_state != "ON_TRACK":
+        if not self.current_lap or event.player_state != "ON_TRACK":
             return
         
-        player_scoring = next((v for v in event.payload['scoring'].mVehicles if v.mIsPlayer), None)
+        player_scoring = event.payload.player_scoring
         if not player_scoring:
             return
 
-        current_dist = player_scoring.mLapDist
-        if current_dist >= (self.last_log_distance + self.SAMPLING_DISTANCE):
-            self._add_snapshot_to_buffer(event.payload, current_dist)
-            self.last_log_distance = current_dist
-            if len(self.telemetry_buffer) >= self.BUFFER_SIZE:
-                self._flush_buffer()
-    
-    def _add_snapshot_to_buffer(self, raw_data, lap_dist):
-        telemetry = raw_data['telemetry']
-        scoring_info = raw_data['scoring'].mScoringInfo
-        player_scoring = next((v for v in raw_data['scoring'].mVehicles if v.mIsPlayer), None)
-        wheels = telemetry.mWheels
-        
+        current_dist = frame_lap_dist(event.payload)
+        if self.sampling.should_sample(event.payload, current_dist):
+            if self.lap_buffer is None:
+                self._start_buffer(self._expected_samples(event.payload))
+            values = self._snapshot_values(event.payload, current_dist)
+            self.lap_buffer.append(values)
+            journal = self.lap_journal
+            if journal is not None:
+                if journal.lap_id is None and self.current_lap.done() and not self.current_lap.exception():
+                    journal.set_lap_id(self.current_lap.result().id)
+                journal.append(values)
+            if self.store_rows and len(self.lap_buffer) - self.rows_flushed >= self.flush_size:
+                self._flush_rows()
+
+    def _start_buffer(self, expected_samples: int):
+        self.lap_buffer = ChannelBuffer(expected_samples)
+        if self.journaling:
+            try:
+                self.lap_journal = LapJournal(self.current_lap_number, expected_samples)
+            except OSError as e:
+                print(f"[TelemetryHandler] WARNING: Could not open a journal for Lap number {self.current_lap_number}: {e}", flush=True)
+
+    def _expected_samples(self, frame) -> int:
+        scoring_info = frame.scoring_info
+        track_length = scoring_info.mLapDist if scoring_info else 0
+        expected = self.sampling.expected_samples(track_length, frame.player_scoring.mEstimatedLapTime)
+        return expected or self.DEFAULT_LAP_SAMPLES
+
+    @staticmethod
+    def _snapshot_values(frame, lap_dist) -> tuple:
+        """One snapshot's channel values, in lap_channels.CHANNELS order."""
+        telemetry = frame.telemetry
+        player_scoring = frame.player_scoring
+        fl, fr, rl, rr = telemetry.mWheels[0], telemetry.mWheels[1], telemetry.mWheels[2], telemetry.mWheels[3]
         vel = telemetry.mLocalVel
+        pos = telemetry.mPos
         speed_kph = (vel.x**2 + vel.y**2 + vel.z**2)**0.5 * 3.6
-        kelvin_to_celsius = lambda k: k - 273.15
-        
-        # --- CHANGE START: Populate the new enriched data structure ---
-        snapshot_data = {
-            'lap': self.current_lap_model,
-            'lap_dist': lap_dist,
-            'elapsed_time': telemetry.mElapsedTime,
-            'delta_time': telemetry.mDeltaTime,
-            
-            'pos_x': telemetry.mPos.x, 'pos_y': telemetry.mPos.y, 'pos_z': telemetry.mPos.z,
-            
-            'throttle': telemetry.mFilteredThrottle, 'brake': telemetry.mFilteredBrake,
-            'steering': telemetry.mFilteredSteering, 'speed': speed_kph,
-            'rpm': telemetry.mEngineRPM, 'gear': telemetry.mGear,
-            
-            'fuel_level': telemetry.mFuel,
-            
-            'time_into_lap': player_scoring.mTimeIntoLap,
-            'lap_start_et': player_scoring.mLapStartET, 'estimated_lap_time': player_scoring.mEstimatedLapTime,
-            'track_edge': player_scoring.mTrackEdge,
-            
-            'tire_pressure_fl': wheels[0].mPressure, 'tire_pressure_fr': wheels[1].mPressure,
-            'tire_pressure_rl': wheels[2].mPressure, 'tire_pressure_rr': wheels[3].mPressure,
-
-            'tire_wear_fl': wheels[0].mWear, 'tire_wear_fr': wheels[1].mWear,
-            'tire_wear_rl': wheels[2].mWear, 'tire_wear_rr': wheels[3].mWear,
-            
-            # Simplified to outer temp only and converted to Celsius
-            'tire_temp_fl': kelvin_to_celsius(wheels[0].mTemperature[2]),
-            'tire_temp_fr': kelvin_to_celsius(wheels[1].mTemperature[2]),
-            'tire_temp_rl': kelvin_to_celsius(wheels[2].mTemperature[2]),
-            'tire_temp_rr': kelvin_to_celsius(wheels[3].mTemperature[2]),
-
-            # New brake temp and ride height data
-            'brake_temp_fl': kelvin_to_celsius(wheels[0].mBrakeTemp), 'brake_temp_fr': kelvin_to_celsius(wheels[1].mBrakeTemp),
-            'brake_temp_rl': kelvin_to_celsius(wheels[2].mBrakeTemp), 'brake_temp_rr': kelvin_to_celsius(wheels[3].mBrakeTemp),
-
-            'ride_height_fl': wheels[0].mRideHeight, 'ride_height_fr': wheels[1].mRideHeight,
-            'ride_height_rl': wheels[2].mRideHeight, 'ride_height_rr': wheels[3].mRideHeight,
-        }
-        self.telemetry_buffer.append(snapshot_data)
-        # --- CHANGE END ---
 
-    def _flush_buffer(self):
-        if not self.telemetry_buffer or not self.current_lap_model:
-            self.telemetry_buffer.clear()
+        return (
+            lap_dist, telemetry.mElapsedTime, telemetry.mDeltaTime,
+            pos.x, pos.y, pos.z,
+            telemetry.mFilteredThrottle, telemetry.mFilteredBrake, telemetry.mFilteredSteering, speed_kph,
+            telemetry.mEngineRPM, telemetry.mGear,
+            telemetry.mFuel,
+            player_scoring.mTimeIntoLap, player_scoring.mLapStartET, player_scoring.mEstimatedLapTime,
+            player_scoring.mTrackEdge,
+            fl.mPressure, fr.mPressure, rl.mPressure, rr.mPressure,
+            fl.mWear, fr.mWear, rl.mWear, rr.mWear,
+            # Outer tire temp only, in Celsius
+            fl.mTemperature[2] - KELVIN, fr.mTemperature[2] - KELVIN,
+            rl.mTemperature[2] - KELVIN, rr.mTemperature[2] - KELVIN,
+            fl.mBrakeTemp - KELVIN, fr.mBrakeTemp - KELVIN, rl.mBrakeTemp - KELVIN, rr.mBrakeTemp - KELVIN,
+            fl.mRideHeight, fr.mRideHeight, rl.mRideHeight, rr.mRideHeight,
+        )
+
+    def _flush_rows(self):
+        end = len(self.lap_buffer)
+        if end > self.rows_flushed:
+            print(f"[TelemetryHandler] Flushing {end - self.rows_flushed} snapshots to DB for Lap number {self.current_lap_number}...", flush=True)
+            self.lap_writes.append(self.writer.submit(self._insert_rows, self.current_lap, self.lap_buffer, self.rows_flushed, end))
+            self.rows_flushed = end
+
+    def _finish_lap(self):
+        buffer = self.lap_buffer
+        if buffer is not None and self.current_lap:
+            if self.store_rows:
+                self._flush_rows()
+            if self.store_channels and len(buffer):
+                print(f"[TelemetryHandler] Storing {len(buffer)} snapshots for Lap number {self.current_lap_number} "
+                      f"as channel arrays ({self.sampling.describe()} sampling)...", flush=True)
+                self.lap_writes.append(self.writer.submit(self._save_channels, self.current_lap, buffer))
+        if self.lap_journal is not None:
+            if self.current_lap:
+                # Only once the lap's writes are committed may its journal go.
+                self.writer.after_commit(self._settle_journal, self.current_lap, self.lap_journal, self.lap_writes)
+            else:
+                self.lap_journal.discard()
+        # The writer keeps the old buffer and journal; the next lap gets fresh ones.
+        self.lap_buffer = None
+        self.lap_journal = None
+        self.lap_writes = []
+        self.rows_flushed = 0
+
+    def recover(self):
+        """Queues the replay of journals left by a daemon that did not shut down cleanly."""
+        if self.journaling:
+            self.writer.submit(replay_journals, None, self.store_channels, self.store_rows)
+
+    @staticmethod
+    def _save_channels(lap_future, buffer):
+        store_columns(lap_future.result().id, buffer.columns())
+
+    @staticmethod
+    def _settle_journal(lap_future, journal, writes):
+        # Runs after the batches holding the lap's writes have committed (or failed).
+        if all(write.exception() is None for write in writes):
+            journal.discard()
             return
-        
-        print(f"[TelemetryHandler] Flushing {len(self.telemetry_buffer)} snapshots to DB for Lap number {self.current_lap_model.lap_number}...", flush=True)
-        try:
-            with db.atomic():
-                LapTelemetry.insert_many(self.telemetry_buffer).execute()
-            self.telemetry_buffer.clear()
-        except Exception as e:
-            print(f"[TelemetryHandler] ERROR: Failed to flush telemetry buffer: {e}", flush=True)
-            self.telemetry_buffer.clear()
\ No newline at end of file
+        if not lap_future.exception():
+            journal.set_lap_id(lap_future.result().id)
+        journal.close()
+        print(f"[TelemetryHandler] Kept {journal.samples} journaled samples in {journal.path} for the next start.", flush=True)
+
+    @staticmethod
+    def _insert_rows(lap_future, buffer, start, end):
+        insert_buffer_rows(lap_future.result().id, buffer, start, end)
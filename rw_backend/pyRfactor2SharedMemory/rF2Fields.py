@@ -0,0 +1,108 @@
+"""
+rF2 Field Extraction
+
+Compiled extraction plans for reading a declared set of fields out of
+the rF2data ctypes structures in a single struct.unpack_from call.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import re
+import struct
+from collections import namedtuple
+
+_PATH_TOKEN = re.compile(r"(\w+)|\[(\d+)\]")
+
+
+def field_layout(data_struct: type, path: str) -> tuple[int, type]:
+    """Resolve a field path to its byte offset and ctypes type
+
+    Args:
+        data_struct: ctypes structure, ex. rF2data.rF2VehicleTelemetry.
+        path: field path, ex. "mTotalLaps", "mLocalVel.x", "mWheels[0].mTemperature[2]".
+
+    Returns:
+        Byte offset from the start of data_struct, ctypes type of the field.
+    """
+    offset = 0
+    ctype = data_struct
+    for name, index in _PATH_TOKEN.findall(path):
+        if name:
+            fields = dict(ctype._fields_)
+            if name not in fields:
+                raise ValueError(f"{ctype.__name__} has no field {name!r} (in {path!r})")
+            offset += getattr(ctype, name).offset
+            ctype = fields[name]
+        else:
+            if not issubclass(ctype, ctypes.Array) or int(index) >= ctype._length_:
+                raise ValueError(f"Invalid index [{index}] in {path!r}")
+            ctype = ctype._type_
+            offset += int(index) * ctypes.sizeof(ctype)
+    return offset, ctype
+
+
+def _format_char(ctype: type, path: str) -> str:
+    """struct format for a leaf ctypes type (standard size, no alignment)"""
+    if issubclass(ctype, ctypes.Array) and ctype._type_ is ctypes.c_char:
+        return f"{ctype._length_}s"
+    code = getattr(ctype, "_type_", None)
+    if not isinstance(code, str) or struct.calcsize("=" + code) != ctypes.sizeof(ctype):
+        raise ValueError(f"Field {path!r} is not a scalar or char array")
+    return code
+
+
+class FieldPlan:
+    """Extraction plan for a fixed set of fields of one rF2 structure
+
+    The byte offsets are resolved once, up front, so each extraction is a
+    single unpack_from into a slotted, immutable record.
+    """
+
+    __slots__ = (
+        "data_struct",
+        "record",
+        "format",
+        "_unpack_from",
+    )
+
+    def __init__(self, data_struct: type, fields, name: str = "FieldRecord") -> None:
+        """Compile plan
+
+        Args:
+            data_struct: ctypes structure, ex. rF2data.rF2VehicleScoring.
+            fields: field names, or a dict of record attribute -> field path.
+            name: record type name.
+        """
+        if not isinstance(fields, dict):
+            fields = {path: path for path in fields}
+
+        layout = []
+        for attr, path in fields.items():
+            offset, ctype = field_layout(data_struct, path)
+            layout.append((offset, attr, _format_char(ctype, path), ctypes.sizeof(ctype)))
+        layout.sort()
+
+        parts = ["="]
+        cursor = 0
+        for offset, attr, code, size in layout:
+            if offset < cursor:
+                raise ValueError(f"Field {attr!r} overlaps another field")
+            if offset > cursor:
+                parts.append(f"{offset - cursor}x")
+            parts.append(code)
+            cursor = offset + size
+
+        self.data_struct = data_struct
+        self.record = namedtuple(name, [attr for _, attr, _, _ in layout])
+        self.format = "".join(parts)
+        self._unpack_from = struct.Struct(self.format).unpack_from
+
+    def extract(self, source, offset: int = 0):
+        """Unpack the planned fields into a record
+
+        Args:
+            source: any buffer holding a data_struct (ctypes instance, mmap, bytes).
+            offset: byte offset of the data_struct within source.
+        """
+        return self.record._make(self._unpack_from(source, offset))
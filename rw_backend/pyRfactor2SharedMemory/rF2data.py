@@ -5,7 +5,6 @@ Auto-generated from rF2data.cs
 # pylint: disable=C,R,W
 
 import ctypes
-import mmap
 from enum import Enum, Flag
 
 
@@ -932,24 +931,26 @@ class SimInfo:
     """Simulation info from shared memory"""
 
     def __init__(self):
-        self._rf2_tele = mmap.mmap(
-            fileno=0,
-            length=ctypes.sizeof(rF2Telemetry),
-            tagname=rFactor2Constants.MM_TELEMETRY_FILE_NAME,
+        try:
+            from .rF2MMap import platform_mmap
+        except ImportError:  # standalone, not package
+            from rF2MMap import platform_mmap
+
+        self._rf2_tele = platform_mmap(
+            name=rFactor2Constants.MM_TELEMETRY_FILE_NAME,
+            size=ctypes.sizeof(rF2Telemetry),
         )
         self.Rf2Tele = rF2Telemetry.from_buffer(self._rf2_tele)
 
-        self._rf2_scor = mmap.mmap(
-            fileno=0,
-            length=ctypes.sizeof(rF2Scoring),
-            tagname=rFactor2Constants.MM_SCORING_FILE_NAME,
+        self._rf2_scor = platform_mmap(
+            name=rFactor2Constants.MM_SCORING_FILE_NAME,
+            size=ctypes.sizeof(rF2Scoring),
         )
         self.Rf2Scor = rF2Scoring.from_buffer(self._rf2_scor)
 
-        self._rf2_ext = mmap.mmap(
-            fileno=0,
-            length=ctypes.sizeof(rF2Extended),
-            tagname=rFactor2Constants.MM_EXTENDED_FILE_NAME,
+        self._rf2_ext = platform_mmap(
+            name=rFactor2Constants.MM_EXTENDED_FILE_NAME,
+            size=ctypes.sizeof(rF2Extended),
         )
         self.Rf2Ext = rF2Extended.from_buffer(self._rf2_ext)
 
@@ -28,6 +28,7 @@ class SimInfoAPI(rF2data.SimInfo):
 
     def __init__(self):
         rF2data.SimInfo.__init__(self)
+        self.playerIndex = PlayerVehicleIndex()
         self.versionCheckMsg = self.versionCheck()
         self.__find_rf2_pid()
 
@@ -103,10 +104,8 @@ class SimInfoAPI(rF2data.SimInfo):
 
     def __playersDriverNum(self):
         """ Find the player's driver number """
-        for _player in range(50):  # self.Rf2Tele.mVehicles[0].mNumVehicles:
-            if self.Rf2Scor.mVehicles[_player].mIsPlayer:
-                break
-        return _player
+        _player = self.playerIndex.scoring(self.Rf2Scor)
+        return _player if _player is not None else 0
 
     ###########################################################
     # Access functions
@@ -183,12 +182,12 @@ class SimInfoAPI(rF2data.SimInfo):
 
     def playersVehicleTelemetry(self):
         """ Get the variable for the player's vehicle """
-        self.__playersDriverNum()
-        return self.Rf2Tele.mVehicles[self.__playersDriverNum()]
+        _player = self.playerIndex.telemetry(
+            self.Rf2Tele, self.__playersDriverNum())
+        return self.Rf2Tele.mVehicles[_player]
 
     def playersVehicleScoring(self):
         """ Get the variable for the player's vehicle """
-        self.__playersDriverNum()
         return self.Rf2Scor.mVehicles[self.__playersDriverNum()]
 
     def vehicleName(self):
@@ -211,6 +210,62 @@ class SimInfoAPI(rF2data.SimInfo):
         self.close()
 
 
+class PlayerVehicleIndex:
+    """
+    Remembers which mVehicles slot holds the player's car.
+    The cached slot is revalidated against the player's mID on every
+    lookup; the vehicle array is only scanned again when that fails.
+    """
+
+    def __init__(self):
+        self.scoring_index = None
+        self.telemetry_index = None
+        self.player_id = None
+        self.scans = 0
+
+    def scoring(self, rf2_scoring):
+        """ Slot of the player's car in rF2Scoring.mVehicles, or None """
+        vehicles = rf2_scoring.mVehicles
+        _index = self.scoring_index
+        if _index is not None:
+            vehicle = vehicles[_index]
+            if vehicle.mIsPlayer and vehicle.mID == self.player_id:
+                return _index
+
+        self.scans += 1
+        self.telemetry_index = None
+        num_vehicles = min(rf2_scoring.mScoringInfo.mNumVehicles, len(vehicles))
+        for _index in range(num_vehicles):
+            if vehicles[_index].mIsPlayer:
+                self.scoring_index = _index
+                self.player_id = vehicles[_index].mID
+                return _index
+        self.scoring_index = None
+        self.player_id = None
+        return None
+
+    def telemetry(self, rf2_telemetry, scoring_index):
+        """
+        Slot of the player's car in rF2Telemetry.mVehicles.
+        The telemetry array is not guaranteed to be in scoring order, so it
+        is matched by mID, falling back to the scoring slot.
+        """
+        if scoring_index is None or self.player_id is None:
+            return scoring_index
+        vehicles = rf2_telemetry.mVehicles
+        _index = self.telemetry_index
+        if _index is not None and vehicles[_index].mID == self.player_id:
+            return _index
+
+        num_vehicles = min(rf2_telemetry.mNumVehicles, len(vehicles))
+        for _index in range(num_vehicles):
+            if vehicles[_index].mID == self.player_id:
+                self.telemetry_index = _index
+                return _index
+        self.telemetry_index = None
+        return scoring_index
+
+
 def Cbytestring2Python(bytestring):
     """
     C string to Python string
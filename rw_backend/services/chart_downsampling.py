@@ -0,0 +1,119 @@
+# rw_backend/services/chart_downsampling.py
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# Thins lap channels to what a chart can show. A chart is ~1,500 px wide, so
+# sending it 10k+ samples per channel is mostly overdraw. Each channel is
+# reduced on its own: Largest-Triangle-Three-Buckets for continuous channels
+# (keeps the samples that shape the line: peaks, braking points, apexes), a
+# min/max envelope for stepped ones such as gear (keeps every value a bucket
+# reached). A distance window narrows the lap first, so zooming in returns a
+# finer slice for the same point budget.
+
+# Fewer points than this cannot hold a min/max bucket besides the endpoints.
+MIN_POINTS = 4
+
+def window_bounds(dist, start: float | None = None, end: float | None = None) -> tuple[int, int]:
+    """
+    The index range [lo, hi) of the samples between `start` and `end` metres,
+    plus one sample either side so the lines reach the edges of the chart.
+    `dist` must be ascending.
+    """
+    lo = 0 if start is None else max(0, bisect_left(dist, start) - 1)
+    hi = len(dist) if end is None else min(len(dist), bisect_right(dist, end) + 1)
+    return lo, max(lo, hi)
+
+def lttb_indices(xs, ys, lo: int, hi: int, threshold: int) -> list[int]:
+    """Indices of the `threshold` samples in [lo, hi) that LTTB keeps; all of them if there are fewer."""
+    count = hi - lo
+    if count <= threshold or threshold < MIN_POINTS:
+        return list(range(lo, hi))
+    # Running sums give every bucket's average in O(1).
+    x_sums = list(accumulate(xs[lo:hi], initial=0.0))
+    y_sums = list(accumulate(ys[lo:hi], initial=0.0))
+    every = (count - 2) / (threshold - 2)
+    picked = [lo]
+    a = lo
+    bucket_end = lo + 1
+    for bucket in range(threshold - 2):
+        bucket_start, bucket_end = bucket_end, lo + int((bucket + 1) * every) + 1
+        # The third corner of the triangle is the average of the next bucket.
+        avg_end = min(lo + int((bucket + 2) * every) + 1, hi)
+        n = avg_end - bucket_end
+        cx = (x_sums[avg_end - lo] - x_sums[bucket_end - lo]) / n
+        cy = (y_sums[avg_end - lo] - y_sums[bucket_end - lo]) / n
+        ax, ay = xs[a], ys[a]
+        # Twice the triangle's area is linear in the candidate point.
+        k1, k2 = cy - ay, ax - cx
+        k0 = -k2 * ay - ax * k1
+        best, a = -1.0, bucket_start
+        for i in range(bucket_start, bucket_end):
+            area = abs(xs[i] * k1 + ys[i] * k2 + k0)
+            if area > best:
+                best, a = area, i
+        picked.append(a)
+    picked.append(hi - 1)
+    return picked
+
+def minmax_indices(ys, lo: int, hi: int, threshold: int) -> list[int]:
+    """
+    Indices of each bucket's minimum and maximum, in order, plus the first
+    and last sample: at most `threshold` samples from [lo, hi).
+    """
+    count = hi - lo
+    if count <= threshold or threshold < MIN_POINTS:
+        return list(range(lo, hi))
+    buckets = (threshold - 2) // 2
+    every = count / buckets
+    keep = {lo, hi - 1}
+    for bucket in range(buckets):
+        indices = range(lo + int(bucket * every), lo + int((bucket + 1) * every))
+        if indices:
+            keep.add(min(indices, key=ys.__getitem__))
+            keep.add(max(indices, key=ys.__getitem__))
+    return sorted(keep)
+
+def stride_indices(lo: int, hi: int, threshold: int) -> list[int]:
+    """`threshold` evenly spaced indices in [lo, hi), first and last included."""
+    count = hi - lo
+    if count <= threshold or threshold < MIN_POINTS:
+        return list(range(lo, hi))
+    step = (count - 1) / (threshold - 1)
+    return [lo + round(i * step) for i in range(threshold)]
+
+def _take(values: array, indices) -> array:
+    return array(values.typecode, map(values.__getitem__, indices))
+
+def chart_series(columns: dict[str, array], channels, points: int | None = None,
+                 window: tuple | None = None, stepped=()) -> dict[str, tuple[array, array]]:
+    """
+    (distance, values) per channel, limited to `window` (start, end metres;
+    either may be None) and, with `points`, reduced to at most that many
+    samples each. Channels in `stepped` get the min/max envelope.
+    """
+    dist = columns['lap_dist']
+    lo, hi = window_bounds(dist, *(window or (None, None)))
+    series = {}
+    for name in channels:
+        values = columns[name]
+        if points is None:
+            series[name] = (dist[lo:hi], values[lo:hi])
+            continue
+        if name in stepped:
+            indices = minmax_indices(values, lo, hi, points)
+        else:
+            indices = lttb_indices(dist, values, lo, hi, points)
+        series[name] = (_take(dist, indices), _take(values, indices))
+    return series
+
+def chart_path(columns: dict[str, array], points: int | None = None,
+               window: tuple | None = None) -> tuple[array, array, array]:
+    """The (distance, x, z) track path in `window`, evenly thinned to at most `points` positions."""
+    dist = columns['lap_dist']
+    lo, hi = window_bounds(dist, *(window or (None, None)))
+    if points is None:
+        return dist[lo:hi], columns['pos_x'][lo:hi], columns['pos_z'][lo:hi]
+    indices = stride_indices(lo, hi, points)
+    return _take(dist, indices), _take(columns['pos_x'], indices), _take(columns['pos_z'], indices)
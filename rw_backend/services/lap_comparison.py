@@ -0,0 +1,88 @@
+# rw_backend/services/lap_comparison.py
+
+from array import array
+from bisect import bisect_right
+
+# Lines laps up by distance. Two laps never sample the same metres, so every
+# lap is resampled onto one evenly spaced distance grid covering the stretch
+# all of them recorded. On that grid the time difference to a reference lap
+# (the delta-time trace) and per-channel differences are plain subtractions.
+
+DEFAULT_GRID_POINTS = 2000
+# Channel the delta-time trace is built from; float64 session time.
+TIME_CHANNEL = 'elapsed_time'
+
+def common_grid(laps, points: int | None = None, step: float | None = None,
+                window: tuple | None = None) -> tuple[float, float, int]:
+    """
+    (start, step, count) of the grid: the distance every lap covers,
+    narrowed to `window`, split into `points` positions or `step` metres.
+    count is 0 if the laps do not overlap.
+    """
+    start = max(columns['lap_dist'][0] for columns in laps)
+    end = min(columns['lap_dist'][-1] for columns in laps)
+    if window:
+        window_start, window_end = window
+        start = start if window_start is None else max(start, window_start)
+        end = end if window_end is None else min(end, window_end)
+    if end <= start:
+        return start, 0.0, 0
+    if step:
+        count = int((end - start) / step) + 1
+    else:
+        count = points or DEFAULT_GRID_POINTS
+        step = (end - start) / (count - 1)
+    return start, step, count
+
+def grid_positions(dist, start: float, step: float, count: int) -> tuple[list[int], list[float]]:
+    """
+    For each grid position, the sample before it and how far (0-1) it lies
+    towards the next one. Computed once per lap and shared by its channels.
+    """
+    last = len(dist) - 2
+    indices, weights = [], []
+    j = max(0, min(last, bisect_right(dist, start) - 1))
+    for k in range(count):
+        x = start + k * step
+        while j < last and dist[j + 1] <= x:
+            j += 1
+        x0, x1 = dist[j], dist[j + 1]
+        t = (x - x0) / (x1 - x0) if x1 > x0 else 0.0
+        indices.append(j)
+        weights.append(0.0 if t < 0.0 else 1.0 if t > 1.0 else t)
+    return indices, weights
+
+def resample(values: array, indices, weights, stepped: bool = False, typecode: str = 'f') -> array:
+    """A channel at the grid positions: linear between samples, or the last value reached for stepped channels."""
+    if stepped:
+        return array(typecode, [values[j + 1] if t >= 1.0 else values[j] for j, t in zip(indices, weights)])
+    return array(typecode, [values[j] + (values[j + 1] - values[j]) * t for j, t in zip(indices, weights)])
+
+def compare_laps(laps, channels, stepped=(), reference: int = 0, points: int | None = None,
+                 step: float | None = None, window: tuple | None = None) -> dict:
+    """
+    Resamples every lap's `channels` (each lap a channel-column dict with at
+    least two samples) onto a common grid. Returns the grid, and per lap its
+    channels, its cumulative time difference to lap number `reference` (in
+    seconds, positive when slower) and each channel's difference to it.
+    """
+    start, step, count = common_grid(laps, points, step, window)
+    resampled, times = [], []
+    for columns in laps:
+        indices, weights = grid_positions(columns['lap_dist'], start, step, count)
+        resampled.append({name: resample(columns[name], indices, weights, name in stepped) for name in channels})
+        times.append(resample(columns[TIME_CHANNEL], indices, weights, typecode='d'))
+
+    # Time taken since the start of the grid, so every lap starts level.
+    reference_time = times[reference]
+    reference_start = reference_time[0] if count else 0.0
+    deltas, differences = [], []
+    for lap_channels, time in zip(resampled, times):
+        lap_start = time[0] if count else 0.0
+        deltas.append(array('f', [(t - lap_start) - (r - reference_start) for t, r in zip(time, reference_time)]))
+        differences.append({
+            name: array('f', [value - ref for value, ref in zip(lap_channels[name], resampled[reference][name])])
+            for name in channels
+        })
+    return {'start': start, 'step': step, 'count': count,
+            'channels': resampled, 'deltas': deltas, 'differences': differences}
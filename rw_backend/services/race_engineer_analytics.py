@@ -1,7 +1,8 @@
 # rw_backend/services/race_engineer_analytics.py
 
 import peewee as pw
-from rw_backend.database.models import Session, Lap, Stint, Car, Track, Setup, LapTelemetry
+from rw_backend.database.models import Session, Lap, Stint, Car, Track, Setup
+from rw_backend.database import lap_channels
 import statistics
 import json
 
@@ -190,9 +191,7 @@ class RaceEngineerAnalytics:
             total_laps_count = laps_with_setup.count()
             valid_laps_count = valid_laps.count()
 
-            first_telemetry = LapTelemetry.select().join(Lap).where(Lap.stint << stints_with_setup).order_by(LapTelemetry.id.asc()).first()
-            last_telemetry = LapTelemetry.select().join(Lap).where(Lap.stint << stints_with_setup).order_by(LapTelemetry.id.desc()).first()
-            fuel_used = (first_telemetry.fuel_level - last_telemetry.fuel_level) if first_telemetry and last_telemetry else 0
+            fuel_used = lap_channels.fuel_used(lap.id for lap in laps_with_setup.order_by(Lap.id))
             distance_km = (total_laps_count * setup.track.length_m) / 1000
             
             lap_times = [l.lap_time for l in valid_laps]
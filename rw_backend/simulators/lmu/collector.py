@@ -4,36 +4,65 @@ import threading
 import time
 from queue import Queue
 from rw_backend.pyRfactor2SharedMemory.sharedMemoryAPI import SimInfoAPI
+from .snapshot import SnapshotReader
+from .poller import BufferWatch, ChangePoller
 
 class LMUCollector(threading.Thread):
     """
     A simple, "dumb" worker thread that reads all shared memory data
     at high frequency and puts it onto a queue for processing.
+    Every bundle is a version-consistent snapshot of the player's data,
+    so consumers never see the sim rewriting it underneath them.
+
+    In change-driven mode (the default) a frame is only emitted when the
+    telemetry or scoring buffer has actually been rewritten, instead of on
+    a fixed sleep.
     """
+    TELEMETRY_POLL_INTERVAL = 1 / 240
+    SCORING_POLL_INTERVAL = 1 / 20   # the sim publishes scoring at ~5 Hz
+    IDLE_POLL_INTERVAL = 1 / 5       # used while not driving (menus, monitor)
+    AVAILABILITY_CHECK_INTERVAL = 1.0
+    STATS_INTERVAL = 60.0
+
     # --- THE FIX ---
     # The __init__ signature now correctly accepts `raw_data_queue`.
-    def __init__(self, raw_data_queue: Queue):
+    def __init__(self, raw_data_queue: Queue, change_driven: bool = True):
         super().__init__(daemon=True)
         self.raw_data_queue = raw_data_queue
+        self.change_driven = change_driven
         self._running = threading.Event()
         self.info = None
+        self.reader = None
+        self.poller = None
 
     def run(self):
         print("[Collector] Thread started.", flush=True)
         self._running.set()
         self.info = SimInfoAPI()
+        self.reader = SnapshotReader(self.info.Rf2Tele, self.info.Rf2Scor, self.info.Rf2Ext)
+        self.poller = ChangePoller([
+            BufferWatch('telemetry', self.info.Rf2Tele, self.TELEMETRY_POLL_INTERVAL),
+            BufferWatch('scoring', self.info.Rf2Scor, self.SCORING_POLL_INTERVAL),
+        ])
+
+        if self.change_driven:
+            self._run_change_driven()
+        else:
+            self._run_fixed_rate()
+
+        print(f"[Collector] Thread stopped. Frames: {self.reader.frames_read}, torn reads: {self.reader.torn_reads}, dropped: {self.reader.frames_dropped}", flush=True)
+        self._print_poll_stats()
+        if self.info:
+            self.info.close()
 
+    def _run_fixed_rate(self):
         while self._running.is_set():
             try:
                 if self.info.isSharedMemoryAvailable():
-                    # Bundle all data structures the EventGenerator might need
-                    raw_data_bundle = {
-                        'telemetry': self.info.playersVehicleTelemetry(),
-                        'scoring': self.info.Rf2Scor,
-                        'extended': self.info.Rf2Ext
-                    }
-                    self.raw_data_queue.put(raw_data_bundle)
-                    
+                    raw_data_bundle = self.reader.read()
+                    if raw_data_bundle is not None:
+                        self.raw_data_queue.put(raw_data_bundle)
+
                     # Poll at a high frequency when on track, lower when not
                     if self.info.Rf2Ext.mInRealtimeFC:
                         time.sleep(1 / 60)
@@ -44,9 +73,48 @@ class LMUCollector(threading.Thread):
             except Exception as e:
                 print(f"[Collector] Error: {e}", flush=True)
                 time.sleep(5)
-        
-        if self.info:
-            self.info.close()
+
+    def _run_change_driven(self):
+        available = False
+        next_availability_check = 0.0
+        next_stats = time.monotonic() + self.STATS_INTERVAL
+
+        while self._running.is_set():
+            try:
+                now = time.monotonic()
+                # The version string check is comparatively expensive, so it
+                # runs at its own slow cadence rather than on every poll.
+                if now >= next_availability_check:
+                    available = self.info.isSharedMemoryAvailable()
+                    next_availability_check = now + self.AVAILABILITY_CHECK_INTERVAL
+                if not available:
+                    time.sleep(2)
+                    continue
+
+                changed = self.poller.poll(now)
+                if changed:
+                    raw_data_bundle = self.reader.read(refresh_scoring='scoring' in changed)
+                    if raw_data_bundle is not None:
+                        self.raw_data_queue.put(raw_data_bundle)
+
+                if now >= next_stats:
+                    self._print_poll_stats()
+                    next_stats = now + self.STATS_INTERVAL
+
+                delay = self.poller.next_due() - time.monotonic()
+                if not self.info.Rf2Ext.mInRealtimeFC:
+                    delay = max(delay, self.IDLE_POLL_INTERVAL)
+                if delay > 0:
+                    time.sleep(delay)
+            except Exception as e:
+                print(f"[Collector] Error: {e}", flush=True)
+                time.sleep(5)
+
+    def _print_poll_stats(self):
+        if not self.poller or self.poller.started_at is None:
+            return
+        for name, s in self.poller.stats(time.monotonic()).items():
+            print(f"[Collector] {name}: {s['hz']:.1f} Hz effective, {s['duplicates']} duplicate polls skipped, {s['missed']} updates missed", flush=True)
 
     def stop(self):
-        self._running.clear()
\ No newline at end of file
+        self._running.clear()
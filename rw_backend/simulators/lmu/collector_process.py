@@ -0,0 +1,59 @@
+# rw_backend/simulators/lmu/collector_process.py
+
+import multiprocessing
+from .collector import LMUCollector
+from .frame_ring import FrameRing, FrameRingWriter, FrameRingReader
+from .recording import SessionRecorder, RecordingTee
+
+def _run_collector(ring_name: str, stop_event, change_driven: bool, record_path: str | None):
+    """Entry point of the collector process."""
+    ring = FrameRing(ring_name, create=False)
+    frames = FrameRingWriter(ring)
+    recorder = None
+    if record_path:
+        recorder = SessionRecorder(record_path)
+        frames = RecordingTee(frames, recorder)
+    collector = LMUCollector(raw_data_queue=frames, change_driven=change_driven)
+    collector.start()
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    collector.stop()
+    collector.join(timeout=5)
+    if recorder:
+        recorder.close()
+    ring.close()
+
+class LMUCollectorProcess:
+    """
+    Runs LMUCollector in its own process, so shared memory sampling does not
+    share a GIL with event generation, handlers, DB flushes and live pushes.
+    Frames come back through a FrameRing; `frames` is the Queue-like reader
+    to hand to EventGenerator as its raw_data_queue. With `record_path`
+    set, the collector process also records every frame to a .rwrec file.
+    """
+    def __init__(self, slots: int = FrameRing.DEFAULT_SLOTS, change_driven: bool = True, record_path: str | None = None):
+        self.ring = FrameRing(slots=slots)
+        self.frames = FrameRingReader(self.ring)
+        self._stop_event = multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=_run_collector,
+            args=(self.ring.name, self._stop_event, change_driven, record_path),
+            name="LMUCollector",
+            daemon=True
+        )
+
+    def start(self):
+        self._process.start()
+        print(f"[Collector] Running in process {self._process.pid} with a {self.ring.slots}-frame ring.", flush=True)
+
+    def stop(self):
+        self._stop_event.set()
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        # Wake the consumer before the ring goes away.
+        self.frames.put(None)
+        print(f"[Collector] Ring reader: {self.frames.frames_read} frames, {self.frames.overruns} overruns.", flush=True)
+        self.ring.close()
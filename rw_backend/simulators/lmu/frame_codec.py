@@ -0,0 +1,72 @@
+# rw_backend/simulators/lmu/frame_codec.py
+
+import ctypes
+import struct
+from rw_backend.core.frame import FrameContext
+from rw_backend.pyRfactor2SharedMemory.rF2data import (
+    rF2VehicleTelemetry, rF2VehicleScoring, rF2ScoringInfo, rF2Extended
+)
+from .snapshot import ScoringSnapshot
+
+# A packed frame is a fixed-size header followed by the raw bytes of each
+# struct the collector copies. Sections that were absent in the frame keep
+# their space but are flagged as missing in the header.
+HEADER = struct.Struct('=dhB')  # collected_at, player_index (-1 = none), presence flags
+
+HAS_TELEMETRY = 1
+HAS_PLAYER_SCORING = 2
+HAS_SCORING_INFO = 4
+HAS_EXTENDED = 8
+
+_SECTIONS = (
+    (HAS_TELEMETRY, rF2VehicleTelemetry, lambda f: f.telemetry),
+    (HAS_PLAYER_SCORING, rF2VehicleScoring, lambda f: f.player_scoring),
+    (HAS_SCORING_INFO, rF2ScoringInfo, lambda f: f.scoring_info),
+    (HAS_EXTENDED, rF2Extended, lambda f: f.extended),
+)
+
+FRAME_SIZE = HEADER.size + sum(ctypes.sizeof(ctype) for _, ctype, _ in _SECTIONS)
+
+def pack_frame_into(buffer, offset: int, frame: FrameContext):
+    """Writes a frame into a writable buffer (bytearray, shared memory, mmap) at offset."""
+    flags = 0
+    pos = offset + HEADER.size
+    for flag, ctype, get_section in _SECTIONS:
+        size = ctypes.sizeof(ctype)
+        data = get_section(frame)
+        if data is not None:
+            buffer[pos:pos + size] = bytes(data)
+            flags |= flag
+        pos += size
+    player_index = frame.player_index if frame.player_index is not None else -1
+    HEADER.pack_into(buffer, offset, frame.collected_at, player_index, flags)
+
+def pack_frame(frame: FrameContext) -> bytes:
+    buffer = bytearray(FRAME_SIZE)
+    pack_frame_into(buffer, 0, frame)
+    return bytes(buffer)
+
+def unpack_frame_from(buffer, offset: int = 0) -> FrameContext:
+    """Rebuilds a FrameContext from a packed frame. The structs are copied out of buffer."""
+    collected_at, player_index, flags = HEADER.unpack_from(buffer, offset)
+    sections = []
+    pos = offset + HEADER.size
+    for flag, ctype, _ in _SECTIONS:
+        sections.append(ctype.from_buffer_copy(buffer, pos) if flags & flag else None)
+        pos += ctypes.sizeof(ctype)
+    telemetry, player_scoring, scoring_info, extended = sections
+
+    scoring = None
+    if scoring_info is not None:
+        scoring = ScoringSnapshot(
+            mScoringInfo=scoring_info,
+            mVehicles=(player_scoring,) if player_scoring is not None else ()
+        )
+    return FrameContext(
+        telemetry=telemetry,
+        scoring=scoring,
+        extended=extended,
+        player_scoring=player_scoring,
+        player_index=player_index if player_index >= 0 else None,
+        collected_at=collected_at
+    )
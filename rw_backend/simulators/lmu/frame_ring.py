@@ -0,0 +1,129 @@
+# rw_backend/simulators/lmu/frame_ring.py
+
+import dataclasses
+import struct
+import time
+from multiprocessing import shared_memory
+from .frame_codec import FRAME_SIZE, pack_frame_into, unpack_frame_from
+
+# Ring layout: a header with the last committed sequence number, then fixed
+# slots. Each slot is [begin seq][read time][packed frame][end seq]. Sequence
+# numbers start at 1, so 0 means "never written". The read time is carried
+# beside the frame rather than in it, so recordings keep their layout; the
+# daemon's tracer records it, as the collector process has its own.
+RING_HEADER = struct.Struct('=QII')  # write_seq, slot count, frame size
+SEQ = struct.Struct('=Q')
+READ_TIME = struct.Struct('=d')
+FRAME_OFFSET = SEQ.size + READ_TIME.size
+SLOT_SIZE = FRAME_OFFSET + FRAME_SIZE + SEQ.size
+
+class FrameRing:
+    """
+    A single-producer ring of packed frames in multiprocessing shared memory.
+    The writer never waits for the reader: if the reader falls more than a
+    full ring behind, the oldest frames are overwritten and the reader
+    counts them as overruns.
+    """
+    DEFAULT_SLOTS = 256
+
+    def __init__(self, name: str | None = None, slots: int = DEFAULT_SLOTS, create: bool = True):
+        self.slots = slots
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=RING_HEADER.size + slots * SLOT_SIZE)
+            RING_HEADER.pack_into(self.shm.buf, 0, 0, slots, FRAME_SIZE)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _, self.slots, frame_size = RING_HEADER.unpack_from(self.shm.buf, 0)
+            if frame_size != FRAME_SIZE:
+                raise ValueError(f"Frame ring {name} was created with a different frame layout")
+        self.created = create
+        self.name = self.shm.name
+
+    def _slot_offset(self, seq: int) -> int:
+        return RING_HEADER.size + ((seq - 1) % self.slots) * SLOT_SIZE
+
+    def write_seq(self) -> int:
+        return SEQ.unpack_from(self.shm.buf, 0)[0]
+
+    def close(self):
+        self.shm.close()
+        if self.created:
+            self.shm.unlink()
+
+class FrameRingWriter:
+    """Producer side. Has the same put() as a Queue so LMUCollector can write to it directly."""
+    def __init__(self, ring: FrameRing):
+        self.ring = ring
+        self.seq = ring.write_seq()
+
+    def put(self, frame):
+        buf = self.ring.shm.buf
+        seq = self.seq + 1
+        offset = self.ring._slot_offset(seq)
+        # Begin marker first, end marker last: a reader that sees both equal to
+        # the sequence it expects knows the slot was not being rewritten.
+        SEQ.pack_into(buf, offset, seq)
+        READ_TIME.pack_into(buf, offset + SEQ.size, frame.read_time)
+        pack_frame_into(buf, offset + FRAME_OFFSET, frame)
+        SEQ.pack_into(buf, offset + FRAME_OFFSET + FRAME_SIZE, seq)
+        SEQ.pack_into(buf, 0, seq)
+        self.seq = seq
+
+class FrameRingReader:
+    """
+    Consumer side, used by EventGenerator in place of raw_data_queue.
+    get() blocks until the next frame is committed; put(None) wakes it
+    with None, which is how EventGenerator.stop() shuts its loop down.
+    """
+    POLL_INTERVAL = 1 / 1000
+
+    def __init__(self, ring: FrameRing):
+        self.ring = ring
+        self.read_seq = ring.write_seq()
+        self.frames_read = 0
+        self.overruns = 0
+        self._stopped = False
+
+    def put(self, item):
+        if item is None:
+            self._stopped = True
+
+    def get(self):
+        while True:
+            if self._stopped:
+                return None
+            try:
+                frame = self._next_frame()
+            except ValueError:
+                # The ring was closed underneath us during shutdown.
+                return None
+            if frame is not None:
+                return frame
+            time.sleep(self.POLL_INTERVAL)
+
+    def _next_frame(self):
+        buf = self.ring.shm.buf
+        while True:
+            write_seq = self.ring.write_seq()
+            if write_seq <= self.read_seq:
+                return None
+
+            seq = self.read_seq + 1
+            oldest = write_seq - self.ring.slots + 1
+            if seq < oldest:
+                self.overruns += oldest - seq
+                seq = oldest
+
+            offset = self.ring._slot_offset(seq)
+            self.read_seq = seq
+            if SEQ.unpack_from(buf, offset + FRAME_OFFSET + FRAME_SIZE)[0] != seq:
+                self.overruns += 1
+                continue
+            frame = unpack_frame_from(buf, offset + FRAME_OFFSET)
+            read_time, = READ_TIME.unpack_from(buf, offset + SEQ.size)
+            if SEQ.unpack_from(buf, offset)[0] != seq:
+                # The writer lapped us while we were copying.
+                self.overruns += 1
+                continue
+            self.frames_read += 1
+            return dataclasses.replace(frame, read_time=read_time)
@@ -0,0 +1,93 @@
+# rw_backend/simulators/lmu/garage_api_stub.py
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY_PATH = "/rest/garage/summary"
+OVERVIEW_PATH = "/rest/garage/UIScreen/CarSetupOverview"
+
+class GarageApiStub:
+    """
+    A stand-in for LMU's local REST server (localhost:6397) that serves the two
+    garage endpoints the SetupDetector reads. The active setup can be swapped
+    at any time, and `delay` makes every response slow, like the game's server
+    while the car is leaving the pits. Hits are counted per path.
+    """
+    def __init__(self, host: str = "localhost", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.hits = {SUMMARY_PATH: 0, OVERVIEW_PATH: 0}
+        self.set_setup("Baseline", {"frontWing": "5", "rearWing": "7", "brakeBias": "54.0:46.0"})
+        self.server = ThreadingHTTPServer((host, port), self._request_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_setup(self, name: str, settings: dict):
+        self.summary = {
+            "activeSetup": name,
+            "settingSummaries": {key: {"value": value} for key, value in settings.items()},
+        }
+        self.overview = {
+            "carSetup": {"garageValues": {key: {"stringValue": value} for key, value in settings.items()}},
+            "currentWeather": {"ambientTemp": 22.0, "trackTemp": 31.0, "rain": 0.0},
+        }
+
+    def _request_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = {SUMMARY_PATH: stub.summary, OVERVIEW_PATH: stub.overview}.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                stub.hits[self.path] += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="GarageApiStub")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stub of the LMU garage REST API.")
+    parser.add_argument("--port", type=int, default=6397)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each response")
+    args = parser.parse_args()
+
+    stub = GarageApiStub(port=args.port, delay=args.delay)
+    print(f"[GarageApiStub] Serving {stub.url}{SUMMARY_PATH}", flush=True)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+if __name__ == '__main__':
+    main()
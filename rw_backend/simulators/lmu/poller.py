@@ -0,0 +1,60 @@
+# rw_backend/simulators/lmu/poller.py
+
+class BufferWatch:
+    """
+    Follows one shared memory buffer's mVersionUpdateEnd counter at its own cadence.
+    The sim bumps the counter once per write, so a jump of more than one between
+    two polls means updates were published that we never saw.
+    """
+    def __init__(self, name: str, live, interval: float):
+        self.name = name
+        self.live = live
+        self.interval = interval
+        self.version = None
+        self.next_poll = 0.0
+        self.updates = 0
+        self.duplicates = 0
+        self.missed = 0
+
+    def poll(self, now: float) -> bool:
+        """Returns True if the buffer has been rewritten since the last poll."""
+        self.next_poll = now + self.interval
+        version = self.live.mVersionUpdateEnd
+        if version == self.version:
+            self.duplicates += 1
+            return False
+
+        # A counter that went backwards means the plugin was restarted, not that we missed anything.
+        if self.version is not None and version > self.version + 1:
+            self.missed += version - self.version - 1
+        self.version = version
+        self.updates += 1
+        return True
+
+class ChangePoller:
+    """
+    Polls a set of BufferWatches, each only when it is due, and reports which
+    buffers changed so the collector emits a frame only when there is new data.
+    """
+    def __init__(self, watches: list[BufferWatch]):
+        self.watches = watches
+        self.started_at = None
+
+    def poll(self, now: float) -> set[str]:
+        if self.started_at is None:
+            self.started_at = now
+        return {w.name for w in self.watches if now >= w.next_poll and w.poll(now)}
+
+    def next_due(self) -> float:
+        return min(w.next_poll for w in self.watches)
+
+    def stats(self, now: float) -> dict:
+        elapsed = (now - self.started_at) if self.started_at is not None else 0.0
+        return {
+            w.name: {
+                'hz': w.updates / elapsed if elapsed > 0 else 0.0,
+                'updates': w.updates,
+                'duplicates': w.duplicates,
+                'missed': w.missed,
+            } for w in self.watches
+        }
@@ -0,0 +1,220 @@
+# rw_backend/simulators/lmu/recording.py
+
+import bisect
+import os
+import struct
+import threading
+import zlib
+from queue import Queue
+from rw_backend.core.frame import FrameContext
+from .frame_codec import FRAME_SIZE, pack_frame, unpack_frame_from
+
+try:
+    import zstandard
+except ImportError:  # optional: recordings fall back to zlib
+    zstandard = None
+
+# A .rwrec file is a header, a sequence of compressed chunks of packed frames
+# (see frame_codec), then a seek index and a footer pointing at it. Within a
+# chunk every frame after the first is stored XORed with the one before it,
+# so the bytes that did not change between frames compress to almost nothing.
+#
+# The bytes that do change are mostly the low bits of doubles, which no
+# lossless codec shrinks much. On synthetic frames where every telemetry
+# channel moves each frame, a frame takes about 1.2 kB with zlib, so 24 hours
+# at 60 Hz come to about 6 GB (10 GB at 100 Hz). Frames where only a few
+# channels move take a few hundred bytes. close() logs the bytes per frame
+# of each recording.
+MAGIC = b'RWREC'
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct('=5sBBI')   # magic, format version, codec, frame size
+CHUNK_HEADER = struct.Struct('=IIdd')   # compressed size, frame count, first/last collected_at
+INDEX_ENTRY = struct.Struct('=QQd')     # chunk file offset, first frame number, first collected_at
+FOOTER = struct.Struct('=QI5s')         # index offset, chunk count, magic
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+def _compressor(codec: int):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress
+    return lambda data: zlib.compress(data, 6)
+
+def _decompressor(codec: int):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This recording is zstd-compressed; install the 'zstandard' package to read it.")
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(FRAME_SIZE, 'little')
+
+class SessionRecorder:
+    """
+    Appends frames to a .rwrec file. write() only packs and deltas the frame;
+    full chunks are compressed and written on a background thread so the
+    collector never waits on the disk. Thread-safe, and write() after close()
+    is ignored, so it can be closed while the collector is winding down.
+    """
+    FRAMES_PER_CHUNK = 500
+
+    def __init__(self, path: str, frames_per_chunk: int = FRAMES_PER_CHUNK):
+        self.path = path
+        self.frames_per_chunk = frames_per_chunk
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self._compress = _compressor(self.codec)
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, self.codec, FRAME_SIZE))
+        self._chunk = []
+        self._previous = None
+        self._first_at = self._last_at = 0.0
+        self._closed = False
+        self._pending = Queue()
+        self._writer = threading.Thread(target=self._write_chunks, name="SessionRecorder", daemon=True)
+        self._writer.start()
+        self.index = []
+        self.frames_written = 0
+
+    def write(self, frame: FrameContext):
+        packed = pack_frame(frame)
+        with self._lock:
+            if self._closed:
+                return
+            if not self._chunk:
+                self._chunk.append(packed)
+                self._first_at = frame.collected_at
+            else:
+                self._chunk.append(_xor(packed, self._previous))
+            self._previous = packed
+            self._last_at = frame.collected_at
+            self.frames_written += 1
+            if len(self._chunk) >= self.frames_per_chunk:
+                self._end_chunk()
+
+    def _end_chunk(self):
+        if self._chunk:
+            first_frame = self.frames_written - len(self._chunk)
+            self._pending.put((self._chunk, first_frame, self._first_at, self._last_at))
+            self._chunk = []
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._pending.get()
+            if chunk is None:
+                return
+            frames, first_frame, first_at, last_at = chunk
+            data = self._compress(b''.join(frames))
+            self.index.append((self._file.tell(), first_frame, first_at))
+            self._file.write(CHUNK_HEADER.pack(len(data), len(frames), first_at, last_at))
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._end_chunk()
+        self._pending.put(None)
+        self._writer.join()
+        index_offset = self._file.tell()
+        for entry in self.index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(FOOTER.pack(index_offset, len(self.index), MAGIC))
+        size = self._file.tell()
+        self._file.close()
+        print(f"[Recorder] Wrote {self.frames_written} frames to {self.path} ({size / 1e6:.1f} MB, "
+              f"{size / max(self.frames_written, 1):.0f} bytes/frame).", flush=True)
+
+class RecordingReader:
+    """
+    Reads a .rwrec file. Files cut short by a crash have no footer; their
+    index is rebuilt by walking the chunk headers, up to the last whole chunk.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, self.codec, frame_size = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} recording")
+            if frame_size != FRAME_SIZE:
+                raise ValueError(f"{path} was recorded with a different frame layout")
+            self.index = self._read_index(f) or self._rebuild_index(f)
+        self._decompress = _decompressor(self.codec)
+        self.frame_count = self._count_frames()
+
+    def _read_index(self, f):
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < FILE_HEADER.size + FOOTER.size:
+            return None
+        f.seek(size - FOOTER.size)
+        index_offset, chunk_count, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic != MAGIC or index_offset + chunk_count * INDEX_ENTRY.size + FOOTER.size != size:
+            return None
+        f.seek(index_offset)
+        data = f.read(chunk_count * INDEX_ENTRY.size)
+        return [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(chunk_count)]
+
+    def _rebuild_index(self, f):
+        index = []
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        offset = FILE_HEADER.size
+        first_frame = 0
+        while offset + CHUNK_HEADER.size <= size:
+            f.seek(offset)
+            length, count, first_at, _ = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            if offset + CHUNK_HEADER.size + length > size:
+                break
+            index.append((offset, first_frame, first_at))
+            first_frame += count
+            offset += CHUNK_HEADER.size + length
+        return index
+
+    def _count_frames(self) -> int:
+        if not self.index:
+            return 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.index[-1][0])
+            _, count, _, _ = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+        return self.index[-1][1] + count
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame_at_time(self, collected_at: float) -> int:
+        """Number of the first frame in the chunk covering collected_at."""
+        i = bisect.bisect_right([entry[2] for entry in self.index], collected_at) - 1
+        return self.index[max(i, 0)][1] if self.index else 0
+
+    def frames(self, start: int = 0):
+        """Yields FrameContexts from frame number `start` to the end of the recording."""
+        starts = [entry[1] for entry in self.index]
+        first_chunk = max(bisect.bisect_right(starts, start) - 1, 0)
+        with open(self.path, 'rb') as f:
+            for offset, first_frame, _ in self.index[first_chunk:]:
+                f.seek(offset)
+                length, count, _, _ = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+                data = self._decompress(f.read(length))
+                previous = None
+                for i in range(count):
+                    packed = data[i * FRAME_SIZE:(i + 1) * FRAME_SIZE]
+                    if previous is not None:
+                        packed = _xor(packed, previous)
+                    previous = packed
+                    if first_frame + i >= start:
+                        yield unpack_frame_from(packed)
+
+class RecordingTee:
+    """Queue-like wrapper for the collector: records each frame, then passes it on."""
+    def __init__(self, downstream, recorder: SessionRecorder):
+        self.downstream = downstream
+        self.recorder = recorder
+
+    def put(self, frame):
+        if frame is not None:
+            self.recorder.write(frame)
+        self.downstream.put(frame)
@@ -0,0 +1,57 @@
+# rw_backend/simulators/lmu/replay.py
+
+import dataclasses
+import threading
+import time
+from queue import Queue
+from .recording import RecordingReader
+
+class ReplayCollector(threading.Thread):
+    """
+    A drop-in replacement for LMUCollector that plays a .rwrec recording
+    into raw_data_queue, so the EventGenerator, detectors and handlers run
+    exactly as they do live, without the sim.
+
+    `speed` is a multiple of real time (1.0 = as recorded); None replays as
+    fast as the queue accepts frames. Frames are re-stamped with the
+    current perf_counter time as they are sent, as if they had just been collected.
+    """
+    def __init__(self, raw_data_queue: Queue, path: str, speed: float | None = 1.0, start_frame: int = 0):
+        super().__init__(daemon=True)
+        self.raw_data_queue = raw_data_queue
+        self.path = path
+        self.speed = speed
+        self.start_frame = start_frame
+        self._running = threading.Event()
+        self.finished = threading.Event()
+        self.frames_sent = 0
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def run(self):
+        reader = RecordingReader(self.path)
+        speed = f"{self.speed:g}x" if self.speed else "max speed"
+        print(f"[Replay] Replaying {len(reader) - self.start_frame} frames from {self.path} at {speed}.", flush=True)
+        self._running.set()
+        self.started_at = time.monotonic()
+        first_recorded_at = None
+
+        for frame in reader.frames(self.start_frame):
+            if not self._running.is_set():
+                break
+            if self.speed:
+                if first_recorded_at is None:
+                    first_recorded_at = frame.collected_at
+                delay = self.started_at + (frame.collected_at - first_recorded_at) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.raw_data_queue.put(dataclasses.replace(frame, collected_at=time.perf_counter()))
+            self.frames_sent += 1
+
+        self.elapsed = time.monotonic() - self.started_at
+        rate = self.frames_sent / self.elapsed if self.elapsed > 0 else 0.0
+        print(f"[Replay] Sent {self.frames_sent} frames in {self.elapsed:.1f}s ({rate:.0f} frames/s).", flush=True)
+        self.finished.set()
+
+    def stop(self):
+        self._running.clear()
@@ -0,0 +1,101 @@
+# rw_backend/simulators/lmu/snapshot.py
+
+import time
+from dataclasses import dataclass
+from rw_backend.core.frame import FrameContext
+from rw_backend.pyRfactor2SharedMemory.rF2data import (
+    rF2VehicleTelemetry, rF2VehicleScoring, rF2ScoringInfo, rF2Extended
+)
+from rw_backend.pyRfactor2SharedMemory.sharedMemoryAPI import PlayerVehicleIndex
+
+@dataclass(frozen=True)
+class ScoringSnapshot:
+    """
+    A private copy of the scoring buffer, reduced to the player's vehicle.
+    Keeps the `mScoringInfo` / `mVehicles` shape of rF2Scoring so consumers
+    can read it exactly like the live structure.
+    """
+    mScoringInfo: rF2ScoringInfo
+    mVehicles: tuple
+
+class TornReadError(Exception):
+    """Raised when a buffer kept changing underneath every copy attempt."""
+    pass
+
+class SnapshotReader:
+    """
+    Copies the live shared memory views into per-frame snapshots that nothing
+    else writes to. Each copy is guarded by the buffer's
+    mVersionUpdateBegin/mVersionUpdateEnd counters (the same block rF2MMap's
+    copy access relies on) and retried if the sim was writing at the time.
+    The player's slot is resolved here, once per frame, and handed on in
+    the FrameContext.
+    """
+    MAX_ATTEMPTS = 4
+
+    def __init__(self, telemetry, scoring, extended):
+        self.telemetry = telemetry
+        self.scoring = scoring
+        self.extended = extended
+        self.frames_read = 0
+        self.torn_reads = 0      # individual copies discarded due to a version mismatch
+        self.frames_dropped = 0  # frames given up on after MAX_ATTEMPTS
+        self.player_index = PlayerVehicleIndex()
+        self._last_scoring = None
+
+    def read(self, refresh_scoring=True) -> FrameContext | None:
+        """
+        Returns a consistent frame, or None if the frame could not be copied.
+        With refresh_scoring=False the previous scoring snapshot is reused, which
+        is safe because snapshots are never written to.
+        """
+        read_started = time.perf_counter()
+        try:
+            if refresh_scoring or self._last_scoring is None:
+                self._last_scoring = self._copy_consistent(self.scoring, self._copy_scoring)
+            scoring, player_index = self._last_scoring
+            telemetry = None
+            if player_index is not None:
+                telemetry = self._copy_consistent(self.telemetry, lambda: self._copy_telemetry(player_index))
+            extended = self._copy_consistent(self.extended, lambda: rF2Extended.from_buffer_copy(self.extended))
+        except TornReadError:
+            self.frames_dropped += 1
+            return None
+
+        self.frames_read += 1
+        collected_at = time.perf_counter()
+        return FrameContext(
+            telemetry=telemetry,
+            scoring=scoring,
+            extended=extended,
+            player_scoring=scoring.mVehicles[0] if scoring.mVehicles else None,
+            player_index=player_index,
+            collected_at=collected_at,
+            read_time=collected_at - read_started
+        )
+
+    def _copy_consistent(self, live, copy_fn):
+        for _ in range(self.MAX_ATTEMPTS):
+            version = live.mVersionUpdateBegin
+            # Begin != End means the sim is in the middle of writing this buffer.
+            if version == live.mVersionUpdateEnd:
+                data = copy_fn()
+                if live.mVersionUpdateBegin == version:
+                    return data
+            self.torn_reads += 1
+        raise TornReadError()
+
+    def _copy_scoring(self):
+        player_index = self.player_index.scoring(self.scoring)
+        vehicles = ()
+        if player_index is not None:
+            vehicles = (rF2VehicleScoring.from_buffer_copy(self.scoring.mVehicles[player_index]),)
+        snapshot = ScoringSnapshot(
+            mScoringInfo=rF2ScoringInfo.from_buffer_copy(self.scoring.mScoringInfo),
+            mVehicles=vehicles
+        )
+        return snapshot, player_index
+
+    def _copy_telemetry(self, player_index):
+        telemetry_index = self.player_index.telemetry(self.telemetry, player_index)
+        return rF2VehicleTelemetry.from_buffer_copy(self.telemetry.mVehicles[telemetry_index])
@@ -0,0 +1,355 @@
+# rw_backend/simulators/lmu/synthetic.py
+
+import argparse
+import ctypes
+import math
+import random
+import time
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Telemetry, rF2Scoring, rF2Extended, rFactor2Constants
+from rw_backend.pyRfactor2SharedMemory.rF2MMap import linux_mmap
+
+# A scenario is a list of steps for the player's car:
+#   ("garage", seconds)    parked in the garage stall
+#   ("out_lap",)           pit box to the start/finish line
+#   ("laps", n)            n flying laps
+#   ("pit_stop", seconds)  in-lap into the pit box, stationary for `seconds`, stop completed
+DEFAULT_SCENARIO = [("garage", 5.0), ("out_lap",), ("laps", 3), ("pit_stop", 10.0), ("garage", 5.0)]
+
+PLUGIN_VERSION = b"3.7.15.1"
+PIT_BOX = 0.03          # fractions of a lap
+PIT_EXIT = 0.06
+PIT_ENTRY = 0.95
+
+class SyntheticCar:
+    """One car's position and timing, advanced in fixed time steps."""
+    def __init__(self, slot: int, track_length: float, lap_time: float, rng: random.Random, scenario=None):
+        self.slot = slot
+        self.track_length = track_length
+        self.lap_time = lap_time
+        self.rng = rng
+        self.steps = list(scenario) if scenario is not None else None
+        self.step_elapsed = 0.0
+        self.step_start_laps = 0
+        self.finished = False
+
+        self.elapsed = 0.0
+        self.lap_dist = PIT_BOX * track_length if self.steps else rng.uniform(0, track_length)
+        self.speed = 0.0
+        self.total_laps = 0
+        self.lap_start_et = 0.0
+        self.cur_sector1 = self.cur_sector2 = -1.0
+        self.last_sector1 = self.last_sector2 = self.last_lap_time = -1.0
+        self.best_lap_time = -1.0
+        self.in_pits = bool(self.steps)
+        self.in_garage = bool(self.steps)
+        self.pit_state = 0
+        self.num_pitstops = 0
+        self.count_lap_flag = 2
+        self._new_lap_pace()
+
+    @property
+    def sector(self) -> int:
+        # rF2 numbering: 1 = sector 1, 2 = sector 2, 0 = sector 3
+        fraction = self.lap_dist / self.track_length
+        return 1 if fraction < 1 / 3 else 2 if fraction < 2 / 3 else 0
+
+    def _new_lap_pace(self):
+        self.average_speed = self.track_length / (self.lap_time * self.rng.uniform(0.99, 1.01))
+
+    def advance(self, dt: float):
+        self.elapsed += dt
+        if self.steps is None:
+            self._drive(dt)
+            return
+        if not self.steps:
+            self.finished = True
+            return
+
+        step = self.steps[0]
+        kind = step[0]
+        self.step_elapsed += dt
+        done = False
+        if kind == "garage":
+            self._park(in_garage=True)
+            done = self.step_elapsed >= step[1]
+        elif kind == "out_lap":
+            if self.in_garage:
+                self.in_garage = False
+                self.lap_start_et = self.elapsed
+                self.count_lap_flag = 1
+            self.in_pits = self.lap_dist < PIT_EXIT * self.track_length
+            done = self._drive(dt)
+        elif kind == "laps":
+            self.count_lap_flag = 2
+            self.in_pits = False
+            done = self._drive(dt) and self.total_laps - self.step_start_laps >= step[1]
+        elif kind == "pit_stop":
+            done = self._pit_stop(dt, step[1])
+
+        if done:
+            self.steps.pop(0)
+            self.step_elapsed = 0.0
+            self.step_start_laps = self.total_laps
+
+    def _park(self, in_garage: bool):
+        self.speed = 0.0
+        self.in_pits = True
+        self.in_garage = in_garage
+        self.lap_dist = PIT_BOX * self.track_length
+
+    def _pit_stop(self, dt: float, duration: float) -> bool:
+        if self.pit_state == 3:
+            # Stationary in the box.
+            if self.step_elapsed >= duration:
+                self.num_pitstops += 1
+                self.pit_state = 0
+                return True
+            return False
+
+        # The in-lap, then down the pit lane and across the line to the box.
+        if self.pit_state == 0 and self.lap_dist >= PIT_ENTRY * self.track_length:
+            self.in_pits = True
+            self.pit_state = 2
+        self._drive(dt)
+        if self.pit_state == 2 and PIT_BOX * self.track_length <= self.lap_dist < PIT_ENTRY * self.track_length:
+            self._park(in_garage=False)
+            self.pit_state = 3
+            self.step_elapsed = 0.0
+        return False
+
+    def _drive(self, dt: float) -> bool:
+        """Moves the car along the track. Returns True when it crossed the line."""
+        fraction = self.lap_dist / self.track_length
+        self.speed = self.average_speed * (1 + 0.3 * math.sin(2 * math.pi * 3 * fraction))
+        if self.in_pits:
+            self.speed = min(self.speed, 22.0)
+        self.lap_dist += self.speed * dt
+
+        lap_time = self.elapsed - self.lap_start_et
+        if self.cur_sector1 < 0 and self.lap_dist >= self.track_length / 3:
+            self.cur_sector1 = lap_time
+        if self.cur_sector2 < 0 and self.lap_dist >= 2 * self.track_length / 3:
+            self.cur_sector2 = lap_time
+        if self.lap_dist < self.track_length:
+            return False
+
+        self.lap_dist -= self.track_length
+        self.total_laps += 1
+        self.last_lap_time = lap_time
+        self.last_sector1, self.last_sector2 = self.cur_sector1, self.cur_sector2
+        if self.count_lap_flag == 2 and (self.best_lap_time < 0 or lap_time < self.best_lap_time):
+            self.best_lap_time = lap_time
+        self.cur_sector1 = self.cur_sector2 = -1.0
+        self.lap_start_et = self.elapsed
+        self._new_lap_pace()
+        return True
+
+class SyntheticPublisher:
+    """
+    Writes a scripted session into the rF2 telemetry, scoring and extended
+    buffers the way the shared memory plugin does: every write is wrapped in
+    mVersionUpdateBegin/End, telemetry at `telemetry_hz` and scoring at
+    `scoring_hz`. With map_shared_buffers() the buffers are the /dev/shm
+    files SimInfoAPI maps on Linux, so the unmodified collector can be
+    load-tested end to end without the game.
+    """
+    def __init__(self, telemetry: rF2Telemetry, scoring: rF2Scoring, extended: rF2Extended,
+                 scenario=DEFAULT_SCENARIO, telemetry_hz: float = 100.0, scoring_hz: float = 5.0,
+                 cars: int = 20, lap_time: float = 90.0, track_length: float = 5000.0,
+                 track_name: str = "Synthetic Raceway", vehicle_name: str = "Synthetic GT3", seed: int = 0):
+        if not 1 <= cars <= rFactor2Constants.MAX_MAPPED_VEHICLES:
+            raise ValueError(f"cars must be between 1 and {rFactor2Constants.MAX_MAPPED_VEHICLES}")
+        self.telemetry = telemetry
+        self.scoring = scoring
+        self.extended = extended
+        self.telemetry_hz = telemetry_hz
+        self.track_length = track_length
+        self.track_name = track_name.encode()
+        self.vehicle_name = vehicle_name.encode()
+
+        rng = random.Random(seed)
+        # The player is put in the middle of the array, as it rarely is in slot 0.
+        self.player_slot = cars // 2
+        self.cars = [
+            SyntheticCar(slot, track_length, lap_time * rng.uniform(1.0, 1.05), rng,
+                         scenario=scenario if slot == self.player_slot else None)
+            for slot in range(cars)
+        ]
+        self.player = self.cars[self.player_slot]
+        self.elapsed = 0.0
+        # Scoring goes out every Nth telemetry update, like the plugin's ~5 Hz scoring.
+        self._scoring_every = max(1, round(telemetry_hz / scoring_hz))
+        self.telemetry_updates = 0
+        self.scoring_updates = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.player.finished
+
+    def start_session(self):
+        ext = self.extended
+        self._begin(ext)
+        ext.mVersion = PLUGIN_VERSION
+        ext.is64bit = 1
+        ext.mSessionStarted = 1
+        ext.mInRealtimeFC = 1
+        ext.mTicksSessionStarted = int(time.time() * 1000) & 0x7FFFFFFF
+        self._end(ext)
+
+    def end_session(self):
+        self._begin(self.extended)
+        self.extended.mSessionStarted = 0
+        self.extended.mInRealtimeFC = 0
+        self._end(self.extended)
+
+    def tick(self):
+        """Advances the session by one telemetry interval and publishes it."""
+        dt = 1 / self.telemetry_hz
+        self.elapsed += dt
+        for car in self.cars:
+            car.advance(dt)
+        if self.telemetry_updates % self._scoring_every == 0:
+            self._publish_scoring()
+        self._publish_telemetry(dt)
+
+    def run(self, realtime: bool = True):
+        """Plays the scenario from session start to session end."""
+        self.start_session()
+        started = time.monotonic()
+        while not self.finished:
+            self.tick()
+            if realtime:
+                delay = started + self.elapsed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        self.end_session()
+
+    @staticmethod
+    def _begin(buffer):
+        buffer.mVersionUpdateBegin += 1
+
+    @staticmethod
+    def _end(buffer):
+        buffer.mVersionUpdateEnd = buffer.mVersionUpdateBegin
+
+    def _publish_telemetry(self, dt: float):
+        tele = self.telemetry
+        self._begin(tele)
+        tele.mNumVehicles = len(self.cars)
+        for car in self.cars:
+            v = tele.mVehicles[car.slot]
+            angle = 2 * math.pi * car.lap_dist / self.track_length
+            radius = self.track_length / (2 * math.pi)
+            v.mID = 10 + car.slot
+            v.mDeltaTime = dt
+            v.mElapsedTime = car.elapsed
+            v.mLapNumber = car.total_laps
+            v.mLapStartET = car.lap_start_et
+            v.mPos.x = radius * math.cos(angle)
+            v.mPos.z = radius * math.sin(angle)
+            v.mLocalVel.z = -car.speed
+            if car is self.player:
+                self._publish_player_telemetry(v, car)
+        tele.mBytesUpdatedHint = rF2Telemetry.mVehicles.offset + len(self.cars) * ctypes.sizeof(tele.mVehicles[0])
+        self._end(tele)
+        self.telemetry_updates += 1
+
+    def _publish_player_telemetry(self, v, car: SyntheticCar):
+        v.mVehicleName = self.vehicle_name
+        v.mTrackName = self.track_name
+        v.mGear = 0 if car.speed == 0 else min(6, 1 + int(car.speed / 12))
+        v.mEngineRPM = 1200.0 if car.speed == 0 else 4000.0 + (car.speed % 12) * 300
+        v.mFilteredThrottle = 0.0 if car.speed == 0 else min(1.0, car.speed / car.average_speed)
+        v.mFilteredBrake = 0.0 if v.mFilteredThrottle > 0.5 else 0.5
+        v.mFilteredSteering = math.sin(2 * math.pi * 5 * car.lap_dist / self.track_length) * 0.3
+        v.mFuel = max(0.0, 90.0 - car.elapsed * 0.02)
+        for wheel in v.mWheels:
+            wheel.mTireLoad = 4000.0 + car.speed * 20
+            wheel.mPressure = 170.0
+            for i in range(3):
+                wheel.mTemperature[i] = 273.15 + 80 + car.speed * 0.1 + i
+
+    def _publish_scoring(self):
+        scor = self.scoring
+        self._begin(scor)
+        info = scor.mScoringInfo
+        info.mTrackName = self.track_name
+        info.mSession = 1
+        info.mGamePhase = 5
+        info.mCurrentET = self.elapsed
+        info.mEndET = 3600.0
+        info.mNumVehicles = len(self.cars)
+        info.mLapDist = self.track_length
+        info.mTrackTemp = 30.0
+        info.mAmbientTemp = 22.0
+
+        order = sorted(self.cars, key=lambda c: (-c.total_laps, -c.lap_dist))
+        places = {car.slot: place for place, car in enumerate(order, start=1)}
+        for car in self.cars:
+            v = scor.mVehicles[car.slot]
+            v.mID = 10 + car.slot
+            v.mIsPlayer = car is self.player
+            v.mControl = 0 if car is self.player else 1
+            v.mDriverName = b"Synthetic Driver" if car is self.player else f"AI {car.slot}".encode()
+            v.mVehicleName = self.vehicle_name
+            v.mVehicleClass = b"GT3"
+            v.mTotalLaps = car.total_laps
+            v.mSector = car.sector
+            v.mLapDist = car.lap_dist
+            v.mLapStartET = car.lap_start_et
+            v.mLastLapTime = car.last_lap_time
+            v.mLastSector1 = car.last_sector1
+            v.mLastSector2 = car.last_sector2
+            v.mBestLapTime = car.best_lap_time
+            v.mCurSector1 = car.cur_sector1
+            v.mCurSector2 = car.cur_sector2
+            v.mNumPitstops = car.num_pitstops
+            v.mInPits = car.in_pits
+            v.mInGarageStall = car.in_garage
+            v.mPitState = car.pit_state
+            v.mCountLapFlag = car.count_lap_flag
+            v.mPlace = places[car.slot]
+            v.mTimeIntoLap = car.elapsed - car.lap_start_et
+            v.mEstimatedLapTime = car.lap_time
+        self._end(scor)
+        self.scoring_updates += 1
+
+def map_shared_buffers():
+    """Maps the three buffers at the /dev/shm paths SimInfoAPI reads on Linux."""
+    maps = []
+    buffers = []
+    for name, data_struct in (
+        (rFactor2Constants.MM_TELEMETRY_FILE_NAME, rF2Telemetry),
+        (rFactor2Constants.MM_SCORING_FILE_NAME, rF2Scoring),
+        (rFactor2Constants.MM_EXTENDED_FILE_NAME, rF2Extended),
+    ):
+        mapped = linux_mmap(name, ctypes.sizeof(data_struct))
+        maps.append(mapped)
+        buffers.append(data_struct.from_buffer(mapped))
+    return maps, buffers
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a synthetic LMU session to shared memory.")
+    parser.add_argument("--hz", type=float, default=100.0, help="telemetry rate (60-400)")
+    parser.add_argument("--scoring-hz", type=float, default=5.0)
+    parser.add_argument("--cars", type=int, default=20)
+    parser.add_argument("--laps", type=int, default=3)
+    parser.add_argument("--lap-time", type=float, default=90.0)
+    parser.add_argument("--repeat", type=int, default=1, help="number of sessions to publish")
+    args = parser.parse_args()
+
+    scenario = [("garage", 5.0), ("out_lap",), ("laps", args.laps), ("pit_stop", 10.0), ("garage", 5.0)]
+    maps, (telemetry, scoring, extended) = map_shared_buffers()
+    for session in range(args.repeat):
+        publisher = SyntheticPublisher(telemetry, scoring, extended, scenario=scenario, telemetry_hz=args.hz,
+                                       scoring_hz=args.scoring_hz, cars=args.cars, lap_time=args.lap_time, seed=session)
+        print(f"[Synthetic] Session {session + 1}: {args.cars} cars, {args.hz:g} Hz telemetry, {args.laps} laps.", flush=True)
+        publisher.run()
+        print(f"[Synthetic] Published {publisher.telemetry_updates} telemetry and {publisher.scoring_updates} scoring updates.", flush=True)
+        time.sleep(2)
+    del telemetry, scoring, extended
+    for mapped in maps:
+        mapped.close()
+
+if __name__ == '__main__':
+    main()
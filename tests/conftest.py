@@ -5,7 +5,17 @@ from queue import Queue
 from types import SimpleNamespace
 import time
 
+from rw_backend.core.frame import FrameContext
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2VehicleTelemetry, rF2VehicleScoring, rF2ScoringInfo, rF2Extended
+from rw_backend.simulators.lmu.snapshot import ScoringSnapshot
 from rw_backend.generators.event_generator import EventGenerator
+from rw_backend.database.manager import prepare_new_database
+from rw_backend.api.telemetry_cache import telemetry_cache
+from datetime import datetime
+from rw_backend.database.models import (
+    db, DB_PRAGMAS, Simulator, Track, Car, Driver, Setup, Session, Stint, Lap, LapTelemetry, LapChannels,
+    LapRetention
+)
 
 @pytest.fixture
 def event_system():
@@ -22,7 +32,7 @@ def event_system():
 
 @pytest.fixture
 def create_mock_bundle():
-    """A fixture that returns a factory function for creating mock raw_data bundles."""
+    """A fixture that returns a factory function for creating mock frames."""
     def _create_mock_bundle(**kwargs):
         player_scoring_data = {
             'mIsPlayer': True, 'mTotalLaps': 0, 'mSector': 1, 'mInPits': False,
@@ -38,11 +48,8 @@ def create_mock_bundle():
 
         player_scoring_data.update(kwargs)
 
-        mock_player_scoring = SimpleNamespace(**player_scoring_data)
-        mock_player_scoring._fields_ = [(key,) for key in player_scoring_data.keys()]
-
-        mock_extended = SimpleNamespace(**extended_data)
-        mock_extended._fields_ = [(key,) for key in extended_data.keys()]
+        mock_player_scoring = rF2VehicleScoring(**player_scoring_data)
+        mock_extended = rF2Extended(**extended_data)
         
         mock_scoring = SimpleNamespace(
             mVehicles=[mock_player_scoring],
@@ -50,6 +57,66 @@ def create_mock_bundle():
         )
         mock_telemetry = SimpleNamespace(**telemetry_data)
         
-        return {'scoring': mock_scoring, 'telemetry': mock_telemetry, 'extended': mock_extended}
+        return FrameContext(
+            telemetry=mock_telemetry, scoring=mock_scoring, extended=mock_extended,
+            player_scoring=mock_player_scoring, player_index=0
+        )
     
-    return _create_mock_bundle
\ No newline at end of file
+    return _create_mock_bundle
+
+@pytest.fixture
+def create_frame():
+    """
+    A factory for frames made of the real rF2 structs, as the collector
+    produces them, so they can be packed, ringed and recorded.
+    """
+    def _create_frame(laps=0, elapsed_time=0.0, collected_at=0.0):
+        player_scoring = rF2VehicleScoring(mIsPlayer=True, mTotalLaps=laps)
+        return FrameContext(
+            telemetry=rF2VehicleTelemetry(mElapsedTime=elapsed_time),
+            scoring=ScoringSnapshot(mScoringInfo=rF2ScoringInfo(mNumVehicles=1), mVehicles=(player_scoring,)),
+            extended=rF2Extended(mSessionStarted=True),
+            player_scoring=player_scoring,
+            player_index=0,
+            collected_at=collected_at
+        )
+
+    return _create_frame
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """Points the models at an empty database file for the duration of a test."""
+    original = db.database
+    db.init(str(tmp_path / "scratch.db"), pragmas=DB_PRAGMAS)
+    prepare_new_database()
+    # Lap ids repeat across scratch databases; cached responses must not.
+    telemetry_cache.clear()
+    yield db
+    db.close()
+    db.init(original, pragmas=DB_PRAGMAS)
+
+@pytest.fixture
+def make_lap(scratch_db):
+    """
+    Creates the schema in the scratch database and returns a factory for Lap
+    records. Laps go into one stint per session start time (default: now).
+    """
+    scratch_db.create_tables([Simulator, Track, Car, Driver, Setup, Session, Stint, Lap, LapTelemetry, LapChannels,
+                              LapRetention])
+    now = datetime.now()
+    track = Track.create(id="track", internal_name="Track", display_name="Track", short_name="TRK", length_m=5000.0,
+                         type="circuit", image_path="", thumbnail_path="", updated_at=now)
+    car = Car.create(id="car", internal_name="Car", display_name="Car", model="Car", car_class="GT3", season="2024",
+                     manufacturer="Maker", engine="V8", thumbnail_url="", manufacturer_thumbnail_url="", updated_at=now)
+    simulator = Simulator.create(name="LMU", updated_at=now)
+    driver = Driver.create(name="Driver", updated_at=now)
+    stints = {}
+
+    def _make_lap(lap_number=1, lap_time=90.0, is_valid=True, started_at=now):
+        if started_at not in stints:
+            session = Session.create(simulator=simulator, track=track, car=car, driver=driver, session_type="Practice",
+                                     started_at=started_at, updated_at=now)
+            stints[started_at] = Stint.create(session=session, stint_number=1, started_on_lap=0, updated_at=now)
+        return Lap.create(stint=stints[started_at], lap_number=lap_number, lap_time=lap_time, is_valid=is_valid,
+                          updated_at=now)
+    return _make_lap
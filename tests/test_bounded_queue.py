@@ -0,0 +1,118 @@
+# tests/test_bounded_queue.py
+
+import threading
+import time
+from queue import Full
+
+import pytest
+
+from rw_backend.core.bounded_queue import BoundedQueue, DROP_OLDEST, COALESCE_LATEST, BLOCK
+from rw_backend.core.events import TelemetryUpdate, LapStarted
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get())
+    return items
+
+def test_drop_oldest_keeps_newest_frames():
+    queue = BoundedQueue(3, policy=DROP_OLDEST)
+    for i in range(5):
+        queue.put(i)
+
+    assert drain(queue) == [2, 3, 4]
+    assert queue.dropped == 2
+    assert queue.high_water == 3
+
+def test_coalesce_latest_replaces_newest_frame():
+    queue = BoundedQueue(3, policy=COALESCE_LATEST)
+    for i in range(5):
+        queue.put(i)
+
+    assert drain(queue) == [0, 1, 4]
+    assert queue.dropped == 2
+
+def test_shutdown_sentinel_is_never_dropped():
+    queue = BoundedQueue(2, policy=COALESCE_LATEST)
+    queue.put(1)
+    queue.put(2)
+    queue.put(None)
+
+    assert drain(queue) == [1, 2, None]
+
+def test_lifecycle_events_are_never_dropped():
+    """Only TelemetryUpdates make room; lifecycle events may exceed the bound."""
+    queue = BoundedQueue(2, droppable=lambda event: isinstance(event, TelemetryUpdate))
+    first = TelemetryUpdate(payload=1, player_state="RUNNING")
+    second = TelemetryUpdate(payload=2, player_state="RUNNING")
+    lap_started = LapStarted(lap_number=3)
+    queue.put(first)
+    queue.put(lap_started)
+    queue.put(second)
+    queue.put(LapStarted(lap_number=4))
+
+    items = drain(queue)
+    assert items[0] is lap_started
+    assert items[1] is second
+    assert isinstance(items[2], LapStarted)
+    assert queue.dropped == 1
+
+def test_coalesce_does_not_reorder_around_lifecycle_events():
+    """A frame queued after a lifecycle event must not jump ahead of it."""
+    queue = BoundedQueue(2, policy=COALESCE_LATEST, droppable=lambda event: isinstance(event, TelemetryUpdate))
+    old = TelemetryUpdate(payload=1, player_state="RUNNING")
+    lap_started = LapStarted(lap_number=3)
+    new = TelemetryUpdate(payload=2, player_state="RUNNING")
+    queue.put(old)
+    queue.put(lap_started)
+    queue.put(new)
+
+    assert drain(queue) == [lap_started, new]
+
+def test_block_policy_waits_for_room_but_not_for_lifecycle_events():
+    queue = BoundedQueue(1, policy=BLOCK, droppable=lambda event: isinstance(event, TelemetryUpdate))
+    queue.put(TelemetryUpdate(payload=1, player_state="RUNNING"))
+    queue.put(LapStarted(lap_number=3))
+
+    producer = threading.Thread(target=queue.put, args=(TelemetryUpdate(payload=2, player_state="RUNNING"),))
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+
+    queue.get()
+    queue.get()
+    producer.join(timeout=1)
+    assert not producer.is_alive()
+    assert queue.get().payload == 2
+    assert queue.dropped == 0
+
+def test_block_policy_honours_block_and_timeout():
+    queue = BoundedQueue(1, policy=BLOCK)
+    queue.put(1)
+
+    with pytest.raises(Full):
+        queue.put_nowait(2)
+    started = time.monotonic()
+    with pytest.raises(Full):
+        queue.put(2, timeout=0.05)
+    assert 0.04 <= time.monotonic() - started < 1
+    assert drain(queue) == [1]
+
+def test_closing_releases_blocked_producers():
+    queue = BoundedQueue(1, policy=BLOCK, droppable=lambda event: isinstance(event, TelemetryUpdate))
+    first = TelemetryUpdate(payload=1, player_state="RUNNING")
+    queue.put(first)
+    producer = threading.Thread(target=queue.put, args=(TelemetryUpdate(payload=2, player_state="RUNNING"),))
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+
+    queue.close()
+    producer.join(timeout=1)
+    assert not producer.is_alive()
+    # Lifecycle events still get through.
+    lap_started = LapStarted(lap_number=3)
+    queue.put(lap_started)
+    assert drain(queue) == [first, lap_started]
+    assert queue.dropped == 1
+
@@ -0,0 +1,51 @@
+# tests/test_change_poller.py
+
+from types import SimpleNamespace
+
+from rw_backend.simulators.lmu.poller import BufferWatch, ChangePoller
+
+def test_unchanged_buffer_is_skipped_as_duplicate():
+    buffer = SimpleNamespace(mVersionUpdateEnd=10)
+    watch = BufferWatch('telemetry', buffer, interval=0.01)
+
+    assert watch.poll(0.0) is True
+    assert watch.poll(0.01) is False
+    assert watch.updates == 1 and watch.duplicates == 1
+
+def test_version_jump_counts_missed_updates():
+    buffer = SimpleNamespace(mVersionUpdateEnd=10)
+    watch = BufferWatch('telemetry', buffer, interval=0.01)
+    watch.poll(0.0)
+
+    buffer.mVersionUpdateEnd = 14
+    assert watch.poll(0.01) is True
+    assert watch.missed == 3
+
+def test_counter_reset_is_not_counted_as_missed():
+    buffer = SimpleNamespace(mVersionUpdateEnd=500)
+    watch = BufferWatch('scoring', buffer, interval=0.05)
+    watch.poll(0.0)
+
+    buffer.mVersionUpdateEnd = 1
+    assert watch.poll(0.05) is True
+    assert watch.missed == 0
+
+def test_each_buffer_is_polled_at_its_own_cadence():
+    telemetry = SimpleNamespace(mVersionUpdateEnd=1)
+    scoring = SimpleNamespace(mVersionUpdateEnd=1)
+    poller = ChangePoller([
+        BufferWatch('telemetry', telemetry, interval=0.01),
+        BufferWatch('scoring', scoring, interval=0.2),
+    ])
+    assert poller.poll(0.0) == {'telemetry', 'scoring'}
+
+    telemetry.mVersionUpdateEnd = 2
+    scoring.mVersionUpdateEnd = 2
+    # Scoring is not due yet, so only the telemetry change is reported.
+    assert poller.poll(0.01) == {'telemetry'}
+    assert poller.next_due() == 0.02
+    assert poller.poll(0.2) == {'scoring'}
+
+    stats = poller.stats(1.0)
+    assert stats['telemetry']['hz'] == 2.0
+    assert stats['telemetry']['duplicates'] == 1
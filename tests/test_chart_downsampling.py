@@ -0,0 +1,81 @@
+# tests/test_chart_downsampling.py
+
+import json
+import math
+from array import array
+
+from rw_backend.api.telemetry_api import TelemetryApi
+from rw_backend.database.lap_channels import CHANNEL_NAMES, save_lap_channels
+from rw_backend.services.chart_downsampling import lttb_indices, minmax_indices, stride_indices, window_bounds
+
+def _dist(count):
+    return array('f', (i * 2.0 for i in range(count)))
+
+def test_lttb_keeps_endpoints_and_spikes():
+    xs = _dist(10000)
+    ys = array('f', (math.sin(i / 300) for i in range(10000)))
+    ys[4321] = 50.0
+    picked = lttb_indices(xs, ys, 0, len(xs), 500)
+
+    assert len(picked) == 500 and picked == sorted(picked)
+    assert picked[0] == 0 and picked[-1] == 9999
+    assert 4321 in picked
+
+def test_minmax_keeps_each_buckets_extremes():
+    gears = array('b', [3] * 1000)
+    gears[500:503] = array('b', [2, 1, 2])
+    gears[900:] = array('b', [4] * 100)
+    picked = minmax_indices(gears, 0, 1000, 20)
+
+    assert len(picked) <= 20 and picked == sorted(picked)
+    # The one-sample drop to first survives, as does the last upshift.
+    assert {gears[i] for i in picked} == {1, 3, 4}
+    assert gears[picked[-1]] == 4
+
+def test_short_ranges_are_returned_whole():
+    assert lttb_indices(_dist(10), _dist(10), 2, 8, 100) == [2, 3, 4, 5, 6, 7]
+    assert stride_indices(0, 101, 11) == list(range(0, 101, 10))
+
+def test_window_includes_one_sample_beyond_each_edge():
+    dist = _dist(100)
+    assert window_bounds(dist, 10.0, 20.0) == (4, 12)
+    assert window_bounds(dist, None, 1.0) == (0, 2)
+    assert window_bounds(dist, 500.0, None) == (99, 100)
+
+def _lap(make_lap, count):
+    lap = make_lap()
+    save_lap_channels(lap.id, [dict({name: math.sin(i / 50) for name in CHANNEL_NAMES}, lap_dist=i * 2.0,
+                                    gear=3 + (i // 1000) % 3) for i in range(count)])
+    return lap
+
+def test_point_budget_bounds_the_response(make_lap):
+    lap = _lap(make_lap, 8000)
+    api = TelemetryApi()
+    full = api.getLapTelemetry(lap.id)
+    thinned = json.loads(api.getLapTelemetry(lap.id, {'points': 300}))
+
+    assert len(thinned['telemetry']['speed']['data']) == 300
+    assert len(thinned['telemetry']['gear']['data']) <= 300
+    assert {p['y'] for p in thinned['telemetry']['gear']['data']} == {3, 4, 5}
+    assert len(thinned['trackpath']) == 300
+    assert len(json.dumps(thinned)) * 10 < len(full)
+
+def test_zoom_window_returns_a_finer_slice(make_lap):
+    lap = _lap(make_lap, 8000)
+    response = json.loads(TelemetryApi().getLapTelemetry(lap.id, {'version': 2, 'points': 300, 'window': [1000, 1400]}))
+
+    assert response['window'] == [1000.0, 1400.0]
+    lap_columns = response['laps'][0]
+    speed_dist = lap_columns['distances']['speed']
+    # 201 samples plus one either side fit the budget, so nothing is dropped.
+    assert len(speed_dist) == 203 and speed_dist[0] == 998.0 and speed_dist[-1] == 1402.0
+    assert len(lap_columns['channels']['speed']) == len(lap_columns["trackpath"]["distance"]) == 203
+    assert 'distance' not in lap_columns
+
+def test_window_without_points_keeps_one_shared_distance(make_lap):
+    lap = _lap(make_lap, 1000)
+    response = json.loads(TelemetryApi().getLapTelemetry(lap.id, {'version': 2, 'window': [100, None]}))
+
+    lap_columns = response['laps'][0]
+    assert lap_columns['distance'][0] == 98.0 and len(lap_columns['distance']) == 951
+    assert len(lap_columns['channels']['speed']) == 951
@@ -0,0 +1,97 @@
+# tests/test_db_profile.py
+
+import sqlite3
+import threading
+import time
+
+import peewee as pw
+import pytest
+
+from rw_backend.database import manager
+from rw_backend.database.manager import configure_database, writable, write_transaction, READER, WRITER
+from rw_backend.database.models import db, DB_PROFILES
+from rw_backend.database.writer import PersistenceWriter
+
+def _pragma(name):
+    return db.execute_sql(f"PRAGMA {name}").fetchone()[0]
+
+@pytest.fixture
+def profiled_db(scratch_db):
+    """The scratch database with the tuned profile and a single 'rows' table."""
+    db.init(db.database, pragmas=DB_PROFILES['tuned'])
+    db.execute_sql("CREATE TABLE rows (value INTEGER)")
+    yield db
+    db.close()
+
+def _count():
+    return db.execute_sql("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+def _hold_write_lock(path, seconds):
+    """Holds the write lock from another connection for `seconds`; returns once it is taken."""
+    locked = threading.Event()
+
+    def hold():
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        connection.execute("ROLLBACK")
+        connection.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait()
+    return thread
+
+def test_tuned_profile_uses_wal_and_keeps_incremental_vacuum(profiled_db):
+    assert _pragma("journal_mode") == "wal"
+    assert _pragma("synchronous") == 1  # NORMAL
+    assert _pragma("temp_store") == 2   # MEMORY
+    assert _pragma("auto_vacuum") == 2  # INCREMENTAL
+    assert _pragma("foreign_keys") == 1
+
+def test_reader_connections_refuse_writes_outside_writable(profiled_db):
+    configure_database(READER)
+    with pytest.raises(pw.OperationalError):
+        db.execute_sql("INSERT INTO rows (value) VALUES (1)")
+
+    with writable():
+        db.execute_sql("INSERT INTO rows (value) VALUES (1)")
+    assert _count() == 1
+    assert _pragma("query_only") == 1
+
+    configure_database(WRITER)
+    assert _pragma("query_only") == 0
+
+def test_readers_are_not_blocked_by_a_writer_in_wal_mode(profiled_db):
+    db.execute_sql("INSERT INTO rows (value) VALUES (1)")
+    holder = _hold_write_lock(db.database, 0.5)
+    started = time.perf_counter()
+    assert _count() == 1
+    assert time.perf_counter() - started < 0.1
+    holder.join()
+
+def test_write_lock_waits_are_measured(profiled_db, capsys):
+    count = manager.lock_waits.count
+    holder = _hold_write_lock(db.database, 0.2)
+    with write_transaction():
+        db.execute_sql("INSERT INTO rows (value) VALUES (1)")
+    holder.join()
+
+    assert manager.lock_waits.count == count + 1
+    assert manager.lock_waits.max_us >= 150_000
+    assert "for the write lock" in capsys.readouterr().out
+
+def test_writer_fails_a_batch_that_cannot_get_the_lock(profiled_db):
+    db.init(db.database, pragmas=DB_PROFILES['tuned'], timeout=0.05)
+    timeouts = manager.lock_timeouts
+    writer = PersistenceWriter()
+    holder = _hold_write_lock(db.database, 0.5)
+    writer.start()
+    future = writer.submit(_count)
+    with pytest.raises(pw.OperationalError):
+        future.result(timeout=5)
+    writer.stop()
+    holder.join()
+
+    assert manager.lock_timeouts == timeouts + 1
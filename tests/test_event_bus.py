@@ -0,0 +1,53 @@
+# tests/test_event_bus.py
+
+from queue import Queue
+
+from rw_backend.core.event_bus import EventBus
+from rw_backend.core.events import TelemetryUpdate, LapStarted, LapCompleted, SessionEnded
+from rw_backend.handlers.session_handler import SessionHandler
+from rw_backend.handlers.stint_handler import StintHandler
+from rw_backend.handlers.lap_handler import LapHandler
+from rw_backend.handlers.live_data_handler import LiveDataHandler
+from rw_backend.handlers.telemetry_handler import TelemetryHandler
+from rw_backend.database.writer import PersistenceWriter
+
+def test_events_reach_only_their_subscribers_in_order():
+    bus = EventBus()
+    calls = []
+    bus.subscribe(LapStarted, lambda e: calls.append(("first", e.lap_number)), name="first")
+    bus.subscribe(LapStarted, lambda e: calls.append(("second", e.lap_number)), name="second")
+    bus.subscribe(SessionEnded, lambda e: calls.append(("ended", None)), name="ended")
+
+    bus.publish(LapStarted(lap_number=2))
+    bus.publish(TelemetryUpdate(payload=None, player_state="ON_TRACK"))
+
+    assert calls == [("first", 2), ("second", 2)]
+
+def test_dispatch_is_timed_per_callback():
+    bus = EventBus()
+    bus.subscribe(LapStarted, lambda e: None, name="lap")
+    bus.subscribe(SessionEnded, lambda e: None, name="session")
+    for lap in range(3):
+        bus.publish(LapStarted(lap_number=lap))
+
+    stats = {s['handler']: s for s in bus.stats()}
+    assert stats['lap']['calls'] == 3 and stats['lap']['event'] == 'LapStarted'
+    assert stats['session']['calls'] == 0
+    assert stats['lap']['max_ms'] >= stats['lap']['avg_ms'] >= 0
+
+def test_daemon_handlers_subscribe_in_dependency_order():
+    queue = Queue()
+    writer = PersistenceWriter()
+    session_handler = SessionHandler(writer)
+    stint_handler = StintHandler(session_handler, queue, writer)
+    lap_handler = LapHandler(stint_handler, queue, writer)
+    bus = EventBus()
+    for handler in (session_handler, stint_handler, lap_handler,
+                    LiveDataHandler(None, session_handler, lap_handler), TelemetryHandler(lap_handler, writer)):
+        bus.register(handler)
+
+    # The hot path touches only the two handlers that consume telemetry.
+    assert bus.subscribers(TelemetryUpdate) == ['LiveDataHandler.on_telemetry_update', 'TelemetryHandler._on_telemetry_update']
+    # The lap record is written before the live view formats it.
+    assert bus.subscribers(LapCompleted) == ['LapHandler.on_lap_completed', 'LiveDataHandler.on_lap_completed']
+    assert bus.subscribers(SessionEnded)[0] == 'SessionHandler.on_session_ended'
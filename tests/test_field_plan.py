@@ -0,0 +1,39 @@
+# tests/test_field_plan.py
+
+import ctypes
+import pytest
+
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Scoring, rF2VehicleScoring, rF2VehicleTelemetry
+from rw_backend.pyRfactor2SharedMemory.rF2Fields import FieldPlan
+
+def test_plan_extracts_declared_fields_only():
+    plan = FieldPlan(rF2VehicleScoring, ('mTotalLaps', 'mSector', 'mCountLapFlag'))
+    record = plan.extract(rF2VehicleScoring(mTotalLaps=7, mSector=2, mCountLapFlag=2, mPlace=3))
+
+    assert (record.mTotalLaps, record.mSector, record.mCountLapFlag) == (7, 2, 2)
+    assert not hasattr(record, 'mPlace')
+    assert not hasattr(record, '__dict__')
+
+def test_plan_resolves_nested_paths_and_aliases():
+    telemetry = rF2VehicleTelemetry(mGear=4)
+    telemetry.mLocalVel.z = -55.5
+    telemetry.mWheels[3].mTemperature[2] = 350.0
+    plan = FieldPlan(rF2VehicleTelemetry, {
+        'gear': 'mGear', 'vel_z': 'mLocalVel.z', 'tire_temp_rr': 'mWheels[3].mTemperature[2]'
+    })
+
+    record = plan.extract(telemetry)
+    assert (record.gear, record.vel_z, record.tire_temp_rr) == (4, -55.5, 350.0)
+
+def test_plan_reads_a_slot_in_place_by_offset():
+    """A plan can read a vehicle straight out of the full buffer without copying the slot."""
+    scoring = rF2Scoring()
+    scoring.mVehicles[5].mTotalLaps = 12
+    plan = FieldPlan(rF2VehicleScoring, ('mTotalLaps',))
+    offset = rF2Scoring.mVehicles.offset + 5 * ctypes.sizeof(rF2VehicleScoring)
+
+    assert plan.extract(scoring, offset).mTotalLaps == 12
+
+def test_plan_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        FieldPlan(rF2VehicleScoring, ('mNotAField',))
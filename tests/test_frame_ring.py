@@ -0,0 +1,74 @@
+# tests/test_frame_ring.py
+
+import dataclasses
+
+import pytest
+
+from rw_backend.core.frame import FrameContext
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Extended
+from rw_backend.simulators.lmu.frame_codec import pack_frame, unpack_frame_from
+from rw_backend.simulators.lmu.frame_ring import FrameRing, FrameRingWriter, FrameRingReader
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=4)
+    yield ring
+    ring.close()
+
+def test_packed_frame_round_trips(create_frame):
+    frame = unpack_frame_from(pack_frame(create_frame(laps=3, elapsed_time=42.5, collected_at=7.0)))
+
+    assert frame.player_scoring.mTotalLaps == 3
+    assert frame.scoring.mVehicles[0].mTotalLaps == 3
+    assert frame.scoring_info.mNumVehicles == 1
+    assert frame.telemetry.mElapsedTime == 42.5
+    assert frame.extended.mSessionStarted
+    assert frame.collected_at == 7.0 and frame.player_index == 0
+
+def test_missing_sections_stay_missing():
+    frame = FrameContext(telemetry=None, scoring=None, extended=rF2Extended(), player_scoring=None)
+    unpacked = unpack_frame_from(pack_frame(frame))
+
+    assert unpacked.telemetry is None and unpacked.player_scoring is None and unpacked.scoring is None
+    assert unpacked.player_index is None
+
+def test_reader_receives_frames_in_order(ring, create_frame):
+    writer, reader = FrameRingWriter(ring), FrameRingReader(ring)
+    for lap in range(3):
+        writer.put(create_frame(laps=lap))
+
+    assert [reader.get().player_scoring.mTotalLaps for _ in range(3)] == [0, 1, 2]
+    assert reader.overruns == 0
+
+def test_read_time_crosses_the_ring(ring, create_frame):
+    """The daemon records the collector process's read times, which travel beside each frame."""
+    writer, reader = FrameRingWriter(ring), FrameRingReader(ring)
+    writer.put(dataclasses.replace(create_frame(collected_at=5.0), read_time=0.00025))
+
+    frame = reader.get()
+    assert (frame.read_time, frame.collected_at) == (0.00025, 5.0)
+
+def test_slow_reader_counts_overruns(ring, create_frame):
+    """When the writer laps the reader, the overwritten frames are skipped and counted."""
+    writer, reader = FrameRingWriter(ring), FrameRingReader(ring)
+    for lap in range(10):
+        writer.put(create_frame(laps=lap))
+
+    assert reader.get().player_scoring.mTotalLaps == 6
+    assert reader.overruns == 6
+
+def test_put_none_wakes_reader(ring):
+    reader = FrameRingReader(ring)
+    reader.put(None)
+    assert reader.get() is None
+
+def test_frames_cross_separate_handles(ring, create_frame):
+    """The collector process attaches to the ring by name; the reader sees what it writes."""
+    reader = FrameRingReader(ring)
+    attached = FrameRing(ring.name, create=False)
+    try:
+        FrameRingWriter(attached).put(create_frame(laps=9))
+        assert attached.slots == 4
+        assert reader.get().player_scoring.mTotalLaps == 9
+    finally:
+        attached.close()
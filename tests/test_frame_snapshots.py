@@ -0,0 +1,93 @@
+# tests/test_frame_snapshots.py
+
+import pytest
+
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Telemetry, rF2Scoring, rF2Extended
+from rw_backend.simulators.lmu.snapshot import SnapshotReader
+
+@pytest.fixture
+def live_buffers():
+    """In-memory stand-ins for the three mapped buffers, with the player in slot 2."""
+    telemetry, scoring, extended = rF2Telemetry(), rF2Scoring(), rF2Extended()
+    scoring.mScoringInfo.mNumVehicles = 3
+    telemetry.mNumVehicles = 3
+    for slot in range(3):
+        scoring.mVehicles[slot].mID = 10 + slot
+        telemetry.mVehicles[slot].mID = 10 + slot
+    scoring.mVehicles[2].mIsPlayer = True
+    scoring.mVehicles[2].mTotalLaps = 4
+    telemetry.mVehicles[2].mElapsedTime = 123.0
+    extended.mSessionStarted = True
+    return telemetry, scoring, extended
+
+def test_snapshot_is_independent_of_live_buffer(live_buffers):
+    """Writes by the sim after the read must not leak into the snapshot."""
+    telemetry, scoring, extended = live_buffers
+    reader = SnapshotReader(telemetry, scoring, extended)
+
+    frame = reader.read()
+    scoring.mVehicles[2].mTotalLaps = 5
+    telemetry.mVehicles[2].mElapsedTime = 200.0
+    extended.mSessionStarted = False
+
+    assert frame.scoring.mVehicles[0].mTotalLaps == 4
+    assert frame.telemetry.mElapsedTime == 123.0
+    assert frame.extended.mSessionStarted
+    assert reader.frames_read == 1 and reader.torn_reads == 0
+
+def test_snapshot_only_copies_player_vehicle(live_buffers):
+    telemetry, scoring, extended = live_buffers
+    frame = SnapshotReader(telemetry, scoring, extended).read()
+
+    assert len(frame.scoring.mVehicles) == 1
+    assert frame.scoring.mVehicles[0].mIsPlayer
+
+def test_write_in_progress_is_retried_then_dropped(live_buffers):
+    """A buffer stuck mid-write (Begin != End) counts as torn and the frame is dropped."""
+    telemetry, scoring, extended = live_buffers
+    scoring.mVersionUpdateBegin = 8
+    scoring.mVersionUpdateEnd = 7
+    reader = SnapshotReader(telemetry, scoring, extended)
+
+    assert reader.read() is None
+    assert reader.torn_reads == SnapshotReader.MAX_ATTEMPTS
+    assert reader.frames_dropped == 1
+
+def test_write_during_copy_is_retried(live_buffers):
+    """A write that starts while copying invalidates that copy, and the next attempt succeeds."""
+    telemetry, scoring, extended = live_buffers
+    reader = SnapshotReader(telemetry, scoring, extended)
+    original_copy = reader._copy_scoring
+    calls = []
+
+    def copy_while_sim_writes():
+        calls.append(1)
+        if len(calls) == 1:
+            scoring.mVersionUpdateBegin += 1
+            scoring.mVersionUpdateEnd += 1
+        return original_copy()
+
+    reader._copy_scoring = copy_while_sim_writes
+    frame = reader.read()
+
+    assert frame is not None
+    assert len(calls) == 2
+    assert reader.torn_reads == 1
+
+def test_frame_carries_resolved_player(live_buffers):
+    telemetry, scoring, extended = live_buffers
+    frame = SnapshotReader(telemetry, scoring, extended).read()
+
+    assert frame.player_index == 2
+    assert frame.player_scoring.mID == 12
+    assert frame.telemetry.mID == 12
+    assert 0 < frame.read_time < 1
+
+def test_telemetry_slot_is_matched_by_id(live_buffers):
+    """The telemetry array may be ordered differently from scoring."""
+    telemetry, scoring, extended = live_buffers
+    telemetry.mVehicles[0].mID, telemetry.mVehicles[2].mID = 12, 10
+    telemetry.mVehicles[0].mElapsedTime = 456.0
+
+    frame = SnapshotReader(telemetry, scoring, extended).read()
+    assert frame.telemetry.mElapsedTime == 456.0
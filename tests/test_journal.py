@@ -0,0 +1,78 @@
+# tests/test_journal.py
+
+import time
+
+import pytest
+
+from rw_backend.database.journal import LapJournal, read_journal, replay_journals
+from rw_backend.database.lap_channels import CHANNELS, load_lap_channels
+
+@pytest.fixture
+def journals(tmp_path):
+    directory = tmp_path / "journal"
+    directory.mkdir()
+    return directory
+
+def _sample(i):
+    return tuple(i if typecode == 'b' else float(i) for _, typecode in CHANNELS)
+
+def test_samples_and_lap_id_round_trip_and_the_file_grows(journals):
+    journal = LapJournal(lap_number=7, expected_samples=4, directory=str(journals))
+    for i in range(10):
+        journal.append(_sample(i))
+    journal.set_lap_id(42)
+    journal.close()
+
+    lap_number, lap_id, buffer = read_journal(journal.path)
+    assert (lap_number, lap_id, len(buffer)) == (7, 42, 10)
+    assert list(buffer.columns()['speed']) == [float(i) for i in range(10)]
+    assert list(buffer.columns()['gear']) == list(range(10))
+
+def test_replay_stops_at_a_torn_record(journals):
+    journal = LapJournal(lap_number=1, directory=str(journals))
+    for i in range(3):
+        journal.append(_sample(i))
+    journal.close()
+    # Flip a byte in the last sample, as if the write never completed.
+    with open(journal.path, 'r+b') as f:
+        f.seek(journal.offset - 1)
+        f.write(b'\xff')
+
+    assert len(read_journal(journal.path)[2]) == 2
+
+def test_journal_of_an_unsaved_lap_is_dropped(journals, make_lap):
+    journal = LapJournal(lap_number=1, directory=str(journals))
+    journal.append(_sample(1))
+    journal.close()
+
+    assert replay_journals(str(journals)) == 0
+    assert not list(journals.iterdir())
+
+def test_unreadable_journal_is_set_aside(journals, make_lap):
+    (journals / "lap-1.rwj").write_bytes(b"garbage")
+
+    assert replay_journals(str(journals)) == 0
+    assert [p.name for p in journals.iterdir()] == ["lap-1.rwj.bad"]
+
+def test_replay_skips_a_lap_already_committed(journals, make_lap):
+    lap = make_lap()
+    for count in (5, 3):
+        journal = LapJournal(lap_number=1, directory=str(journals))
+        journal.set_lap_id(lap.id)
+        for i in range(count):
+            journal.append(_sample(i))
+        journal.close()
+
+    assert replay_journals(str(journals)) == 1
+    assert len(load_lap_channels(lap.id)['lap_dist']) == 5
+
+def test_append_costs_microseconds(journals):
+    journal = LapJournal(lap_number=1, expected_samples=20000, directory=str(journals))
+    sample = _sample(1)
+    started = time.perf_counter()
+    for _ in range(20000):
+        journal.append(sample)
+    per_sample = (time.perf_counter() - started) / 20000
+    journal.discard()
+
+    assert per_sample < 50e-6
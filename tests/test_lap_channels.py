@@ -0,0 +1,62 @@
+# tests/test_lap_channels.py
+
+import json
+import math
+import random
+
+import pytest
+
+from rw_backend.api.telemetry_api import TelemetryApi
+from rw_backend.database.models import LapTelemetry, LapChannels
+from rw_backend.database.lap_channels import (
+    CHANNEL_NAMES, columns_from_rows, pack_channels, unpack_channels, save_lap_channels, load_lap_channels
+)
+from rw_backend.database.migrate_lap_channels import migrate
+from rw_backend.database.shards import shard_lap_ids
+
+def _samples(count, seed=1):
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        sample = {name: rng.uniform(0, 300) for name in CHANNEL_NAMES}
+        sample.update(lap_dist=i * 3.0, gear=rng.randint(-1, 7), elapsed_time=80000.0 + i * 0.05)
+        samples.append(sample)
+    return samples
+
+def test_channels_round_trip_as_typed_arrays():
+    samples = _samples(500)
+    samples[10]['pos_x'] = None
+    columns = unpack_channels(pack_channels(columns_from_rows(reversed(samples))))
+
+    assert set(columns) == set(CHANNEL_NAMES)
+    assert columns['gear'].typecode == 'b' and columns['speed'].typecode == 'f'
+    assert list(columns['lap_dist']) == [s['lap_dist'] for s in samples]
+    assert list(columns['gear']) == [s['gear'] for s in samples]
+    # Session time stays at full precision late into a long race.
+    assert list(columns['elapsed_time']) == [s['elapsed_time'] for s in samples]
+    assert math.isnan(columns['pos_x'][10])
+    assert columns['speed'][3] == pytest.approx(samples[3]['speed'], rel=1e-6)
+
+def test_lap_is_stored_as_one_record(make_lap):
+    lap = make_lap()
+    save_lap_channels(lap.id, _samples(1000))
+
+    assert shard_lap_ids(lap.stint.session_id) == {lap.id}
+    assert LapChannels.select().count() == LapTelemetry.select().count() == 0
+    assert len(load_lap_channels(lap.id)['speed']) == 1000
+
+def test_migration_keeps_the_api_response(make_lap):
+    laps = [make_lap(lap_number=n) for n in (1, 2)]
+    for lap in laps:
+        LapTelemetry.insert_many([dict(sample, lap=lap.id) for sample in _samples(300, seed=lap.id)]).execute()
+    api = TelemetryApi()
+    from_rows = json.loads(api.compareLaps(laps[0].id, laps[1].id))
+
+    assert migrate(drop_rows=True) == (2, 600)
+    assert migrate() == (0, 0)
+    assert LapTelemetry.select().count() == 0
+    from_channels = json.loads(api.compareLaps(laps[0].id, laps[1].id))
+
+    assert from_channels == from_rows
+    assert len(from_channels['lap1']['trackpath']) == 300
+    assert from_channels['lap2']['telemetry']['speed']['borderColor'] == '#FF6B35'
@@ -0,0 +1,100 @@
+# tests/test_lap_comparison.py
+
+import base64
+import json
+from array import array
+
+import pytest
+
+from rw_backend.api.telemetry_api import TelemetryApi
+from rw_backend.database.lap_channels import CHANNEL_NAMES, save_lap_channels
+from rw_backend.services.lap_comparison import common_grid, compare_laps
+
+def _lap(start, end, spacing, speed):
+    """Columns for a lap driven at a constant `speed` (m/s), sampled every `spacing` metres."""
+    count = int((end - start) / spacing) + 1
+    dist = [start + i * spacing for i in range(count)]
+    return {
+        'lap_dist': array('f', dist),
+        'elapsed_time': array('d', [100.0 + d / speed for d in dist]),
+        'speed': array('f', dist),   # a straight line in distance, so interpolation is exact
+        'gear': array('b', [int(d // 100) for d in dist]),
+    }
+
+def test_grid_covers_only_the_distance_every_lap_recorded():
+    laps = [_lap(0.0, 1000.0, 2.5, 50.0), _lap(4.0, 990.0, 3.0, 40.0), _lap(1.0, 996.0, 4.0, 45.0)]
+
+    # From the latest first sample (4 m) to the earliest last one (988 m).
+    assert common_grid(laps, points=5) == (4.0, 246.0, 5)
+    assert common_grid(laps, step=10.0) == (4.0, 10.0, 99)
+    assert common_grid(laps, points=3, window=(500.0, None)) == (500.0, 244.0, 3)
+    assert common_grid(laps, window=(2000.0, None))[2] == 0
+
+def test_channels_are_interpolated_onto_the_grid():
+    laps = [_lap(0.0, 1000.0, 2.5, 50.0), _lap(0.0, 999.0, 3.7, 40.0)]
+    comparison = compare_laps(laps, ('speed', 'gear'), stepped={'gear'}, points=101)
+
+    grid = [comparison['start'] + k * comparison['step'] for k in range(comparison['count'])]
+    for lap in comparison['channels']:
+        assert lap['speed'].tolist() == pytest.approx(grid, abs=1e-3)
+    # Stepped channels hold the last value reached instead of blending two gears.
+    assert set(comparison['channels'][1]['gear']) <= set(range(10))
+
+def test_delta_time_accumulates_against_the_reference():
+    laps = [_lap(0.0, 1000.0, 2.5, 50.0), _lap(0.0, 1000.0, 3.3, 40.0), _lap(0.0, 1000.0, 1.9, 50.0)]
+    comparison = compare_laps(laps, ('speed',), points=11)
+
+    reference, slower, same = comparison['deltas']
+    assert set(reference) == {0.0}
+    # 40 m/s against 50 m/s loses 5 ms per metre.
+    assert slower.tolist() == pytest.approx([k * comparison['step'] * 0.005 for k in range(11)], abs=1e-3)
+    assert same.tolist() == pytest.approx([0.0] * 11, abs=1e-3)
+    assert set(comparison['differences'][0]['speed']) == {0.0}
+
+    # Measured against the slower lap, the others gain time.
+    flipped = compare_laps(laps, ('speed',), reference=1, points=11)
+    assert flipped['deltas'][0][-1] == pytest.approx(-slower[-1], abs=1e-3)
+
+def _samples(count, spacing, speed):
+    return [dict({name: 1.0 for name in CHANNEL_NAMES}, lap_dist=i * spacing, elapsed_time=i * spacing / speed,
+                 speed=speed, gear=3) for i in range(count)]
+
+@pytest.fixture
+def laps(make_lap):
+    laps = [make_lap(lap_number=n, lap_time=90.0 + n) for n in (1, 2, 3, 4)]
+    save_lap_channels(laps[0].id, _samples(400, 2.5, 50.0))
+    save_lap_channels(laps[1].id, _samples(300, 3.3, 40.0))
+    save_lap_channels(laps[2].id, _samples(500, 2.0, 45.0))
+    return laps
+
+def test_api_aligns_any_number_of_laps(laps):
+    ids = [lap.id for lap in laps]
+    response = json.loads(TelemetryApi().compareLapsAligned(ids, {'points': 200, 'encoding': 'base64'}))
+
+    assert response['reference'] == ids[0]
+    assert response['missing'] == [ids[3]]
+    assert response['grid']['count'] == 200
+    assert response['grid']['start'] + 199 * response['grid']['step'] == pytest.approx(986.7, abs=0.1)
+    first, second, third = response['laps']
+    assert (second['lapId'], second['lapNumber'], second['lapTime']) == (ids[1], 2, 92.0)
+    assert first['delta'] is None and first['differences'] is None
+    assert set(second['channels']) == set(second['differences']) == {'speed', 'throttle', 'brake', 'gear', 'steering'}
+    assert array('f', base64.b64decode(second['differences']['speed'])).tolist() == [-10.0] * 200
+    assert array('f', base64.b64decode(second['delta']))[-1] == pytest.approx(986.7 * 0.005, abs=0.01)
+    assert [s['colors'] for s in response['series'] if s['channel'] == 'speed'] == [['#007BFF', '#FF6B35', '#20c997']]
+
+def test_api_rejects_a_reference_without_telemetry(laps):
+    ids = [lap.id for lap in laps]
+    response = json.loads(TelemetryApi().compareLapsAligned(json.dumps(ids), {'reference': ids[3], 'encoding': 'base64'}))
+
+    assert response['laps'] == [] and response['grid']['count'] == 0
+    # Still the declared shape, with the options asked for.
+    assert (response['encoding'], response['window'], response['reference']) == ('base64', None, None)
+    assert response['channels'] == ['speed', 'throttle', 'brake', 'gear', 'steering']
+
+def test_api_error_falls_back_to_default_options(laps):
+    response = json.loads(TelemetryApi().compareLapsAligned([laps[0].id], {'encoding': 'hex'}))
+
+    assert response['encoding'] == 'json' and response['laps'] == [] and response['missing'] == []
+    assert set(response) == {'version', 'encoding', 'reference', 'grid', 'window', 'channels', 'series', 'laps',
+                             'missing'}
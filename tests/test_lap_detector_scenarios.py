@@ -5,6 +5,8 @@ from queue import Queue
 from types import SimpleNamespace
 
 from rw_backend.generators.detectors.lap_detector import LapDetector
+from rw_backend.generators.frame_records import PLAYER_SCORING_FIELDS
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2VehicleScoring
 from rw_backend.core.events import LapCompleted, LapAborted
 
 # --- Fixtures and Helpers ---
@@ -26,7 +28,7 @@ def create_mock_scoring(laps=0, sector=1, lap_start_et=0.0, last_lap_time=-1.0,
     )
 
 def create_mock_last_data(laps=0, sector=0, count_lap_flag=0):
-    return {'mTotalLaps': laps, 'mSector': sector, 'mCountLapFlag': count_lap_flag}
+    return PLAYER_SCORING_FIELDS.extract(rF2VehicleScoring(mTotalLaps=laps, mSector=sector, mCountLapFlag=count_lap_flag))
 
 # --- Rigorous, Scenario-Based Tests ---
 
@@ -0,0 +1,61 @@
+# tests/test_latency.py
+
+import asyncio
+import random
+import socket
+import time
+
+import pytest
+
+from rw_backend.core.latency import LatencyHistogram, LatencyTracer, _request_snapshot, tracer
+from rw_backend.core.live_data_server import LiveDataServer
+
+def test_percentiles_stay_within_histogram_precision():
+    histogram = LatencyHistogram("stage")
+    rng = random.Random(7)
+    values = sorted(rng.uniform(0.00005, 0.5) for _ in range(20000))
+    for value in values:
+        histogram.record(value)
+
+    for percent in (50, 99):
+        exact = values[int(len(values) * percent / 100) - 1] * 1_000_000
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.02)
+    assert histogram.max_us == int(values[-1] * 1_000_000)
+    assert histogram.percentile(100) == histogram.max_us
+
+def test_small_and_out_of_range_values():
+    histogram = LatencyHistogram("stage")
+    for value in (0.000003, -1.0, 3600.0):
+        histogram.record(value)
+
+    assert histogram.count == 3
+    assert histogram.percentile(33) == 0
+    assert histogram.percentile(50) == 3
+    assert histogram.max_us == 1 << 26
+
+def test_disabled_tracer_records_nothing():
+    disabled = LatencyTracer(enabled=False)
+    disabled.record("detectors", 0.001)
+
+    assert disabled.snapshot()['stages']['detectors']['count'] == 0
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+def test_daemon_answers_the_latency_debug_command():
+    tracer.reset()
+    server = LiveDataServer(port=_free_port())
+    server.start()
+    server.push_data({"speed": 1}, collected_at=time.perf_counter())
+    deadline = time.monotonic() + 5
+    while tracer.snapshot()['stages']['end_to_end']['count'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    snapshot = asyncio.run(asyncio.wait_for(_request_snapshot(f"ws://localhost:{server.port}", reset=True), timeout=5))
+
+    assert snapshot['type'] == 'latency'
+    assert snapshot['stages']['json_encode']['count'] == 1
+    assert snapshot['stages']['end_to_end']['count'] == 1
+    assert tracer.snapshot()['stages']['json_encode']['count'] == 0
@@ -0,0 +1,123 @@
+# tests/test_persistence_writer.py
+
+import sqlite3
+from contextlib import contextmanager
+from queue import Queue
+
+import peewee as pw
+import pytest
+
+from rw_backend.database import writer as writer_module
+from rw_backend.database.models import db, Simulator, Track, Car, Driver, Session
+from rw_backend.database.writer import PersistenceWriter
+from rw_backend.generators.detectors.session_detector import SessionDetector
+from rw_backend.handlers.session_handler import SessionHandler
+
+@pytest.fixture
+def writer(scratch_db):
+    """A writer bound to a scratch database with a single 'rows' table."""
+    scratch_db.execute_sql("CREATE TABLE rows (value INTEGER UNIQUE)")
+    writer = PersistenceWriter()
+    yield writer
+    if writer.is_alive():
+        writer.stop()
+
+def _insert(value):
+    db.execute_sql("INSERT INTO rows (value) VALUES (?)", (value,))
+    return value
+
+def _count():
+    return db.execute_sql("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+def test_commands_queued_together_share_one_transaction(writer):
+    futures = [writer.submit(_insert, value) for value in range(50)]
+    count = writer.submit(_count)
+    writer.start()
+    writer.stop()
+
+    assert [f.result() for f in futures] == list(range(50))
+    assert count.result() == 50
+    assert writer.transactions == 1 and writer.largest_batch == 51
+
+def test_failing_command_does_not_undo_the_rest_of_its_batch(writer):
+    first = writer.submit(_insert, 1)
+    duplicate = writer.submit(_insert, 1)
+    second = writer.submit(_insert, 2)
+    writer.start()
+    count = writer.submit(_count)
+    writer.stop()
+
+    assert first.result() == 1 and second.result() == 2
+    with pytest.raises(Exception):
+        duplicate.result()
+    assert count.result() == 2
+    assert writer.commands_failed == 1
+
+def test_commands_can_chain_on_earlier_results(writer):
+    writer.start()
+    parent = writer.submit(_insert, 10)
+    child = writer.submit(lambda parent_future: _insert(parent_future.result() + 1), parent)
+    writer.stop()
+
+    assert child.result(timeout=1) == 11
+
+def test_chaining_within_one_batch_sees_the_staged_result(writer):
+    parent = writer.submit(_insert, 10)
+    child = writer.submit(lambda parent_future: _insert(parent_future.result() + 1), parent)
+    writer.start()
+    writer.stop()
+
+    assert child.result() == 11 and writer.transactions == 1
+
+def test_futures_resolve_only_after_the_commit(writer):
+    seen = []
+    def committed_rows(_):
+        other = sqlite3.connect(db.database)
+        seen.append(other.execute("SELECT COUNT(*) FROM rows").fetchone()[0])
+        other.close()
+
+    writer.submit(_insert, 1).add_done_callback(committed_rows)
+    writer.submit(_insert, 2)
+    after = writer.after_commit(_count)
+    writer.start()
+    writer.stop()
+
+    assert seen == [2]
+    assert after.result() == 2
+
+def test_a_failed_commit_fails_every_future_of_the_batch(writer, monkeypatch):
+    @contextmanager
+    def failing_commit():
+        with db.atomic():
+            yield
+            raise pw.OperationalError("disk I/O error")
+    monkeypatch.setattr(writer_module, "write_transaction", failing_commit)
+
+    futures = [writer.submit(_insert, value) for value in (1, 2)]
+    writer.start()
+    writer.stop()
+
+    for future in futures:
+        with pytest.raises(pw.OperationalError):
+            future.result()
+
+def test_session_start_does_not_wait_for_the_writer(scratch_db, create_mock_bundle):
+    scratch_db.create_tables([Simulator, Track, Car, Driver, Session])
+    writer = PersistenceWriter()
+    events = Queue()
+    # The writer is not running, so any wait on it would hang here.
+    frame = create_mock_bundle()
+    frame.scoring_info.mSession, frame.scoring_info.mLapDist = 1, 5200.0
+    SessionDetector(events, writer.submit).detect(frame, None, None, "UNKNOWN")
+    event = events.get_nowait()
+    assert event.uid == "Test Track-12345" and not event.records.done()
+
+    session = SessionHandler(writer)
+    session.on_session_started(event)
+    writer.start()
+    writer.stop()
+
+    simulator, driver, car, track = event.records.result()
+    record = session.current_session.result()
+    assert (record.driver_id, record.car_id, record.track_id) == (driver.id, car.id, track.id)
+    assert track.id == "unseeded-Test Track-5200"
@@ -0,0 +1,39 @@
+# tests/test_player_vehicle_index.py
+
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Scoring
+from rw_backend.pyRfactor2SharedMemory.sharedMemoryAPI import PlayerVehicleIndex
+
+def create_scoring(player_slot, num_vehicles=4):
+    scoring = rF2Scoring()
+    scoring.mScoringInfo.mNumVehicles = num_vehicles
+    for slot in range(num_vehicles):
+        scoring.mVehicles[slot].mID = 100 + slot
+    scoring.mVehicles[player_slot].mIsPlayer = True
+    return scoring
+
+def test_cached_slot_is_reused_without_scanning():
+    index = PlayerVehicleIndex()
+    scoring = create_scoring(player_slot=3)
+
+    assert index.scoring(scoring) == 3
+    assert index.scoring(scoring) == 3
+    assert index.scans == 1
+
+def test_cached_slot_is_revalidated_by_id():
+    """If another car takes over the cached slot, the index rescans."""
+    index = PlayerVehicleIndex()
+    scoring = create_scoring(player_slot=3)
+    index.scoring(scoring)
+
+    scoring.mVehicles[3].mID = 999
+    scoring.mVehicles[3].mIsPlayer = False
+    scoring.mVehicles[1].mIsPlayer = True
+
+    assert index.scoring(scoring) == 1
+    assert index.player_id == 101
+    assert index.scans == 2
+
+def test_no_player_returns_none():
+    scoring = create_scoring(player_slot=0)
+    scoring.mVehicles[0].mIsPlayer = False
+    assert PlayerVehicleIndex().scoring(scoring) is None
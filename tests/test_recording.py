@@ -0,0 +1,57 @@
+# tests/test_recording.py
+
+import os
+
+import pytest
+
+from rw_backend.simulators.lmu.recording import SessionRecorder, RecordingReader
+
+@pytest.fixture
+def record(create_frame):
+    def _record(path, count, frames_per_chunk=4):
+        recorder = SessionRecorder(str(path), frames_per_chunk=frames_per_chunk)
+        for i in range(count):
+            recorder.write(create_frame(laps=i // 5, elapsed_time=i * 0.02, collected_at=100.0 + i))
+        recorder.close()
+        return recorder
+    return _record
+
+def test_recording_round_trips_every_frame(tmp_path, record):
+    path = tmp_path / "session.rwrec"
+    record(path, 10)
+
+    reader = RecordingReader(str(path))
+    frames = list(reader.frames())
+
+    assert len(reader) == 10 and len(frames) == 10
+    assert [f.collected_at for f in frames] == [100.0 + i for i in range(10)]
+    assert frames[7].player_scoring.mTotalLaps == 1
+    assert frames[7].telemetry.mElapsedTime == 7 * 0.02
+    assert frames[7].extended.mSessionStarted
+
+def test_frames_can_start_mid_chunk(tmp_path, record):
+    path = tmp_path / "session.rwrec"
+    record(path, 10)
+    reader = RecordingReader(str(path))
+
+    assert [f.collected_at for f in reader.frames(start=6)] == [106.0, 107.0, 108.0, 109.0]
+    # Frame 5 was recorded at 105.0 and lives in the chunk starting at frame 4.
+    assert reader.frame_at_time(105.0) == 4
+
+def test_truncated_recording_keeps_complete_chunks(tmp_path, record):
+    """A recording cut short by a crash has no index; whole chunks are still readable."""
+    path = tmp_path / "session.rwrec"
+    record(path, 10)
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 100)
+
+    reader = RecordingReader(str(path))
+    assert len(reader) == 8
+    assert len(list(reader.frames())) == 8
+
+def test_write_after_close_is_ignored(tmp_path, record, create_frame):
+    recorder = record(tmp_path / "session.rwrec", 3)
+    recorder.write(create_frame())
+
+    assert recorder.frames_written == 3
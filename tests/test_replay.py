@@ -0,0 +1,69 @@
+# tests/test_replay.py
+
+import time
+from queue import Queue
+
+import pytest
+
+from rw_backend.core.events import SessionStarted
+from rw_backend.database.models import Simulator, Track, Car, Driver
+from rw_backend.database.writer import PersistenceWriter
+from rw_backend.generators.event_generator import EventGenerator
+from rw_backend.simulators.lmu.recording import SessionRecorder
+from rw_backend.simulators.lmu.replay import ReplayCollector
+
+@pytest.fixture
+def record(create_frame):
+    def _record(path, recorded_at):
+        recorder = SessionRecorder(str(path))
+        for i, collected_at in enumerate(recorded_at):
+            recorder.write(create_frame(laps=i, collected_at=collected_at))
+        recorder.close()
+        return str(path)
+    return _record
+
+def test_max_speed_replays_every_frame_in_order(tmp_path, record):
+    path = record(tmp_path / "session.rwrec", [10.0, 20.0, 30.0])
+    queue = Queue()
+    replay = ReplayCollector(queue, path, speed=None)
+    replay.start()
+    assert replay.finished.wait(timeout=5)
+
+    frames = [queue.get() for _ in range(3)]
+    assert [f.player_scoring.mTotalLaps for f in frames] == [0, 1, 2]
+    assert replay.frames_sent == 3 and queue.empty()
+    # Frames are re-stamped as if they had just been collected.
+    assert frames[0].collected_at > 30.0
+
+def test_speed_scales_recorded_timing(tmp_path, record):
+    """0.2s of recording at 2x takes about 0.1s."""
+    path = record(tmp_path / "session.rwrec", [5.0, 5.1, 5.2])
+    replay = ReplayCollector(Queue(), path, speed=2.0)
+    started = time.monotonic()
+    replay.start()
+    assert replay.finished.wait(timeout=5)
+
+    assert 0.09 <= time.monotonic() - started < 0.5
+
+def test_replayed_frames_drive_the_event_generator(tmp_path, scratch_db, record):
+    # The replayed session's records go to the scratch database, not the user's.
+    scratch_db.create_tables([Simulator, Track, Car, Driver])
+    writer = PersistenceWriter()
+    writer.start()
+    path = record(tmp_path / "session.rwrec", [float(i) for i in range(20)])
+    raw_data_queue, event_queue = Queue(), Queue()
+    generator = EventGenerator(raw_data_queue, event_queue, writer)
+    generator.start()
+    replay = ReplayCollector(raw_data_queue, path, speed=None)
+    replay.start()
+    assert replay.finished.wait(timeout=5)
+
+    deadline = time.monotonic() + 5
+    while generator.frames_processed < replay.frames_sent and time.monotonic() < deadline:
+        time.sleep(0.01)
+    generator.stop()
+    writer.stop()
+    assert generator.frames_processed == 20
+    started = event_queue.get_nowait()
+    assert isinstance(started, SessionStarted)
+    assert started.records.result()[3] == Track.get()
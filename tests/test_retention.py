@@ -0,0 +1,126 @@
+# tests/test_retention.py
+
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from rw_backend.database.lap_channels import (
+    CHANNEL_NAMES, columns_from_rows, downsample_minmax, load_lap_channels, save_lap_channels
+)
+from rw_backend.database.models import Lap, LapRetention, LapTelemetry, Session
+from rw_backend.database.retention import (
+    DOWNSAMPLED, DROPPED, RetentionJob, RetentionPolicy, apply_tier, format_report, plan_retention, run_retention
+)
+from rw_backend.database.writer import PersistenceWriter
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+def _lap_samples(seed, count=1500):
+    """A lap with three braking zones: speed drops, brake spikes, plus some sensor noise."""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        dist = i * 3.0
+        corner = max(0.0, math.sin(dist / 700.0)) ** 8
+        sample = {name: rng.uniform(0, 1) for name in CHANNEL_NAMES}
+        sample.update(lap_dist=dist, gear=4, speed=250.0 - 170.0 * corner + rng.uniform(-1, 1),
+                      brake=corner, throttle=1.0 - corner, steering=0.3 * corner)
+        samples.append(sample)
+    return samples
+
+def _drive(make_lap, **kwargs):
+    lap = make_lap(**kwargs)
+    save_lap_channels(lap.id, _lap_samples(lap.id))
+    return lap.id
+
+def _history(make_lap):
+    old, older, recent = NOW - timedelta(days=20), NOW - timedelta(days=40), NOW - timedelta(days=2)
+    return {
+        'personal_best': _drive(make_lap, lap_number=1, lap_time=88.0, started_at=older),
+        'old_lap': _drive(make_lap, lap_number=2, lap_time=90.0, started_at=older),
+        'old_out_lap': _drive(make_lap, lap_number=0, lap_time=-1.0, is_valid=False, started_at=older),
+        'session_best': _drive(make_lap, lap_number=1, lap_time=89.0, started_at=old),
+        'lap': _drive(make_lap, lap_number=2, lap_time=91.0, started_at=old),
+        'out_lap': _drive(make_lap, lap_number=0, lap_time=-1.0, is_valid=False, started_at=old),
+        'recent_out_lap': _drive(make_lap, lap_number=0, lap_time=-1.0, is_valid=False, started_at=recent),
+    }
+
+def test_downsampling_keeps_each_buckets_extremes():
+    columns = columns_from_rows(_lap_samples(1))
+    thinned = downsample_minmax(columns, bucket_m=25)
+
+    assert len(thinned['lap_dist']) < len(columns['lap_dist']) / 2
+    assert (thinned['lap_dist'][0], thinned['lap_dist'][-1]) == (columns['lap_dist'][0], columns['lap_dist'][-1])
+    assert min(thinned['speed']) == min(columns['speed']) and max(thinned['brake']) == max(columns['brake'])
+    assert len(set(map(len, thinned.values()))) == 1
+
+def test_plan_protects_bests_and_recent_laps(make_lap):
+    laps = _history(make_lap)
+    plan = dict(plan_retention(RetentionPolicy(recent_days=14, invalid_days=30), now=NOW))
+
+    assert plan == {laps['old_lap']: DOWNSAMPLED, laps['old_out_lap']: DROPPED,
+                    laps['lap']: DOWNSAMPLED, laps['out_lap']: DOWNSAMPLED}
+
+def test_retention_pass_thins_drops_and_compacts(make_lap):
+    laps = _history(make_lap)
+    policy = RetentionPolicy(recent_days=14, invalid_days=30, bucket_m=25)
+    report = run_retention(policy, now=NOW)
+
+    assert (report[DOWNSAMPLED], report[DROPPED]) == (3, 1)
+    assert report['bytes_reclaimed'] > 0 and report['free_bytes'] == 0
+    assert load_lap_channels(laps['old_out_lap']) is None
+    assert len(load_lap_channels(laps['personal_best'])['lap_dist']) == 1500
+    thinned = LapRetention.get_by_id(laps['lap'])
+    assert thinned.tier == DOWNSAMPLED and thinned.samples_after == len(load_lap_channels(laps['lap'])['lap_dist'])
+
+    # Nothing left to do until the out-lap from 20 days ago ages past invalid_days.
+    assert run_retention(policy, now=NOW)[DOWNSAMPLED] == 0
+    later = run_retention(policy, now=NOW + timedelta(days=11))
+    assert (later[DOWNSAMPLED], later[DROPPED]) == (0, 1)
+    assert LapRetention.get_by_id(laps['out_lap']).tier == DROPPED
+
+def test_laps_deleted_or_failing_during_a_pass_do_not_stop_it(make_lap):
+    laps = _history(make_lap)
+    deleted_session = Lap.get_by_id(laps['old_lap']).stint.session_id
+
+    def submit(fn, lap_id, *args):
+        # The UI deletes a session after the plan was made.
+        Session.delete().where(Session.id == deleted_session).execute()
+        if lap_id == laps['lap']:
+            raise RuntimeError("database is locked")
+        return fn(lap_id, *args)
+    report = run_retention(RetentionPolicy(recent_days=14, invalid_days=30), submit=submit, now=NOW)
+
+    assert (report[DOWNSAMPLED], report[DROPPED], report['failed']) == (1, 0, 1)
+    assert LapRetention.get_by_id(laps['out_lap']).tier == DOWNSAMPLED
+    assert apply_tier(laps['old_lap'], DOWNSAMPLED, 25.0) is None
+    assert "1 failed" in format_report(report)
+
+def test_row_telemetry_is_moved_into_a_thinned_channel_record(make_lap):
+    lap = make_lap(started_at=NOW - timedelta(days=20))
+    make_lap(lap_number=2, lap_time=80.0, started_at=NOW - timedelta(days=20))
+    LapTelemetry.insert_many([dict(sample, lap=lap.id) for sample in _lap_samples(lap.id, count=300)]).execute()
+    run_retention(RetentionPolicy(recent_days=14), now=NOW)
+
+    assert LapTelemetry.select().count() == 0
+    assert 0 < len(load_lap_channels(lap.id)['lap_dist']) < 300
+
+def test_background_job_applies_changes_through_the_writer(make_lap):
+    laps = _history(make_lap)
+    writer = PersistenceWriter()
+    writer.start()
+    job = RetentionJob(writer, RetentionPolicy(recent_days=14, invalid_days=30, bucket_m=25),
+                       initial_delay=0, interval=3600)
+    job.start()
+    deadline = time.monotonic() + 10
+    while job.runs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    job.stop()
+    writer.stop()
+
+    # Measured against the real clock, all these sessions are months old.
+    assert job.runs == 1
+    assert job.last_report[DROPPED] == 3
+    assert writer.commands_run == job.last_report[DOWNSAMPLED] + job.last_report[DROPPED]
+    assert load_lap_channels(laps['personal_best']) is not None
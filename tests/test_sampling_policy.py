@@ -0,0 +1,89 @@
+# tests/test_sampling_policy.py
+
+import pytest
+
+from rw_backend.core.frame import FrameContext
+from rw_backend.handlers.sampling_policy import (
+    AdaptivePolicy, FixedDistancePolicy, FixedTimePolicy, evaluate, frame_lap_dist, make_sampling_policy
+)
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Scoring, rF2VehicleScoring, rF2VehicleTelemetry
+
+BRAKING_ZONES = ((800.0, 120.0), (1800.0, 80.0), (2600.0, 60.0))
+
+def _frame(lap_dist, elapsed, speed, throttle=1.0, brake=0.0, steering=0.0, scored_at=None, track_length=3000.0):
+    telemetry = rF2VehicleTelemetry(mElapsedTime=elapsed, mFilteredThrottle=throttle, mFilteredBrake=brake,
+                                    mFilteredSteering=steering, mGear=4)
+    telemetry.mLocalVel.z = -speed
+    scoring = rF2Scoring()
+    scoring.mScoringInfo.mLapDist = track_length
+    scoring.mScoringInfo.mCurrentET = elapsed if scored_at is None else scored_at
+    return FrameContext(telemetry=telemetry, scoring=scoring, extended=None,
+                        player_scoring=rF2VehicleScoring(mLapDist=lap_dist, mEstimatedLapTime=50.0))
+
+def _inputs(dist):
+    for start, length in BRAKING_ZONES:
+        if start <= dist < start + length:
+            return 0.0, min(1.0, (dist - start) / 8.0, (start + length - dist) / 8.0), 0.0
+        if start + length <= dist < start + length + 150:
+            return 0.6, 0.0, 0.4
+    return 1.0, 0.0, 0.0
+
+def _lap(track_length=3000.0, dt=0.01):
+    """A 100 Hz lap: long straights at full throttle and three braking zones, each followed by a corner."""
+    frames, dist, elapsed, speed = [], 0.0, 100.0, 70.0
+    while dist < track_length:
+        throttle, brake, steering = _inputs(dist)
+        speed = max(25.0, min(80.0, speed + (6.0 * throttle - 30.0 * brake) * dt))
+        frames.append(_frame(dist, elapsed, speed, throttle, brake, steering))
+        dist += speed * dt
+        elapsed += dt
+    return frames
+
+def _sampled(policy, frames):
+    return [frame.player_scoring.mLapDist for frame in frames if policy.should_sample(frame, frame.player_scoring.mLapDist)]
+
+def test_lap_dist_is_carried_forward_between_scoring_updates():
+    assert frame_lap_dist(_frame(100.0, 10.2, speed=50.0, scored_at=10.0)) == pytest.approx(110.0)
+    # Capped at the line, and stale scoring is not extrapolated at all.
+    assert frame_lap_dist(_frame(2995.0, 10.2, speed=50.0, scored_at=10.0)) == 3000.0
+    assert frame_lap_dist(_frame(100.0, 12.0, speed=50.0, scored_at=10.0)) == 100.0
+
+def test_distance_policy_rebases_after_a_rewind_and_samples_a_slow_car():
+    policy = FixedDistancePolicy(distance=3.0, max_interval=1.0)
+    frames = [_frame(d, t * 0.1, 30.0) for t, d in enumerate((100.0, 101.0, 104.0, 60.0, 61.0, 64.0))]
+    assert _sampled(policy, frames) == [100.0, 104.0, 60.0, 64.0]
+
+    # Crawling at 0.5 m/s: still one sample per second.
+    policy.reset()
+    crawl = [_frame(200.0 + i * 0.05, 50.0 + i * 0.1, 0.5) for i in range(31)]
+    assert len(_sampled(policy, crawl)) == 4
+
+def test_time_policy_samples_on_session_time():
+    frames = [_frame(i * 0.8, 20.0 + i * 0.01, 80.0) for i in range(100)]
+    assert len(_sampled(FixedTimePolicy(interval=0.05), frames)) == 20
+
+def test_adaptive_policy_is_dense_in_braking_zones_and_sparse_on_straights():
+    policy = AdaptivePolicy(min_distance=1.0, max_distance=12.0)
+    kept = _sampled(policy, _lap())
+    gaps = [(b - a, a) for a, b in zip(kept, kept[1:])]
+
+    in_zone = [gap for gap, at in gaps if 810 <= at < 910]
+    on_straight = [gap for gap, at in gaps if 100 <= at < 700]
+    assert max(in_zone) < 2.0
+    assert min(on_straight) >= 12.0
+
+def test_adaptive_policy_keeps_fewer_samples_without_losing_the_brake_trace():
+    frames = _lap()
+    distance = evaluate(FixedDistancePolicy(), frames)
+    adaptive = evaluate(AdaptivePolicy(), frames)
+
+    assert adaptive['samples'] < distance['samples'] * 0.6
+    assert adaptive['bytes'] < distance['bytes']
+    assert adaptive['rms']['brake'] <= distance['rms']['brake']
+
+def test_policy_is_chosen_by_name_or_environment(monkeypatch):
+    monkeypatch.setenv("RACEWORKSHOP_SAMPLING", "adaptive")
+    assert isinstance(make_sampling_policy(), AdaptivePolicy)
+    assert isinstance(make_sampling_policy("time"), FixedTimePolicy)
+    with pytest.raises(ValueError):
+        make_sampling_policy("every-frame")
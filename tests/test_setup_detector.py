@@ -0,0 +1,84 @@
+# tests/test_setup_detector.py
+
+import time
+from queue import Queue
+from types import SimpleNamespace
+
+import pytest
+
+from rw_backend.core.events import StintStarted
+from rw_backend.database.models import Car, Track, Setup
+from rw_backend.database.writer import PersistenceWriter
+from rw_backend.generators.detectors.setup_detector import SetupDetector
+from rw_backend.generators.detectors.stint_detector import StintDetector
+from rw_backend.simulators.lmu.garage_api_stub import GarageApiStub, SUMMARY_PATH, OVERVIEW_PATH
+
+@pytest.fixture
+def garage(scratch_db):
+    scratch_db.create_tables([Track, Car, Setup])
+    Track.create(id="track", internal_name="Track", display_name="Track", short_name="TRK",
+                 length_m=5000.0, type="circuit", image_path="", thumbnail_path="")
+    Car.create(id="car", internal_name="Car", display_name="Car", model="Car", car_class="GT3", season="2024",
+               manufacturer="Maker", engine="V8", thumbnail_url="", manufacturer_thumbnail_url="")
+    stub = GarageApiStub(delay=0.3).start()
+    detector = SetupDetector(stub.url)
+    yield stub, detector
+    detector.close()
+    stub.stop()
+
+def test_lookup_runs_in_the_background(garage):
+    stub, detector = garage
+    started = time.perf_counter()
+    setup = detector.request_setup("car", "track")
+
+    assert time.perf_counter() - started < 0.1
+    assert not setup.done()
+    setup_id = setup.result(timeout=5)
+    assert Setup.get_by_id(setup_id).name == "Baseline"
+
+def test_known_setups_are_cached_by_checksum(garage):
+    stub, detector = garage
+    stub.delay = 0
+    first = detector.request_setup("car", "track").result(timeout=5)
+    again = detector.request_setup("car", "track").result(timeout=5)
+    stub.set_setup("Qualifying", {"frontWing": "3", "rearWing": "5", "brakeBias": "55.0:45.0"})
+    changed = detector.request_setup("car", "track").result(timeout=5)
+
+    assert first == again != changed
+    # The summary is read on every lookup; details only for setups not seen before.
+    assert stub.hits == {SUMMARY_PATH: 3, OVERVIEW_PATH: 2}
+
+def test_unreachable_api_resolves_to_no_setup():
+    stub = GarageApiStub()
+    url = stub.url
+    stub.server.server_close()
+    detector = SetupDetector(url)
+
+    assert detector.request_setup("car", "track").result(timeout=5) is None
+    detector.close()
+
+def test_stint_starts_without_waiting_for_the_setup(garage):
+    stub, detector = garage
+    event_queue = Queue()
+    stint_detector = StintDetector(event_queue)
+
+    stint_detector.handle_state_transition(["IN_GARAGE", "IN_PITS", "ON_TRACK"], SimpleNamespace(mTotalLaps=0),
+                                           lambda: detector.request_setup("car", "track"))
+
+    event = event_queue.get_nowait()
+    assert isinstance(event, StintStarted) and event.setup_id is None
+    assert not event.setup.done()
+    assert event.setup.result(timeout=5) is not None
+
+def test_new_setups_are_stored_through_the_writer(garage):
+    stub, _ = garage
+    stub.delay = 0
+    writer = PersistenceWriter()
+    writer.start()
+    detector = SetupDetector(stub.url, write=lambda fn, *args: writer.submit(fn, *args).result())
+    setup_id = detector.request_setup("car", "track").result(timeout=5)
+    detector.close()
+    writer.stop()
+
+    assert writer.commands_run == 1
+    assert Setup.get_by_id(setup_id).name == "Baseline"
@@ -0,0 +1,92 @@
+# tests/test_shards.py
+
+import json
+import os
+from concurrent.futures import Future
+from types import SimpleNamespace
+from datetime import datetime
+
+from rw_backend.database import shards
+
+from rw_backend.api.session_api import SessionApi
+from rw_backend.database.lap_channels import CHANNEL_NAMES, columns_from_rows, load_lap_channels, pack_channels, save_lap_channels
+from rw_backend.database.models import Lap, LapChannels, Session
+from rw_backend.database.shards import migrate_to_shards, shard_lap_ids, shard_path, write_lap_blob
+from rw_backend.handlers.lap_handler import LapHandler
+from rw_backend.handlers.session_handler import SessionHandler
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _samples(count=200):
+    return [dict({name: 1.0 for name in CHANNEL_NAMES}, lap_dist=i * 3.0, gear=3, speed=float(i)) for i in range(count)]
+
+def test_each_session_gets_its_own_shard(make_lap):
+    first = make_lap(started_at=datetime(2026, 5, 1))
+    second = make_lap(started_at=datetime(2026, 5, 2))
+    save_lap_channels(first.id, _samples())
+    save_lap_channels(second.id, _samples(100))
+
+    assert shard_path(first.stint.session_id) != shard_path(second.stint.session_id)
+    assert shard_lap_ids(first.stint.session_id) == {first.id}
+    assert shard_lap_ids(second.stint.session_id) == {second.id}
+    assert len(load_lap_channels(second.id)['speed']) == 100
+
+def test_laps_in_the_main_database_are_read_and_moved(make_lap):
+    lap = make_lap()
+    LapChannels.create(lap=lap.id, sample_count=200, data=pack_channels(columns_from_rows(_samples())))
+    assert list(load_lap_channels(lap.id)['speed'])[:3] == [0.0, 1.0, 2.0]
+
+    assert migrate_to_shards() == 1
+    assert LapChannels.select().count() == 0
+    assert shard_lap_ids(lap.stint.session_id) == {lap.id}
+    assert len(load_lap_channels(lap.id)['speed']) == 200
+
+def test_deleting_a_session_unlinks_its_shard(make_lap):
+    kept, deleted = make_lap(started_at=datetime(2026, 5, 1)), make_lap(started_at=datetime(2026, 5, 2))
+    for lap in (kept, deleted):
+        save_lap_channels(lap.id, _samples())
+    path = shard_path(deleted.stint.session_id)
+    assert os.path.exists(path)
+
+    reply = json.loads(SessionApi().deleteSession(deleted.stint.session_id))
+
+    assert reply['deleted'] and reply['telemetryBytesFreed'] > 0
+    assert not os.path.exists(path)
+    assert Session.get_or_none(id=deleted.stint.session_id) is None
+    assert list(Lap.select()) == [kept]
+    assert load_lap_channels(kept.id) is not None
+
+def test_a_session_that_cannot_lose_its_shard_is_kept(make_lap, monkeypatch):
+    lap = make_lap()
+    save_lap_channels(lap.id, _samples())
+    path = shard_path(lap.stint.session_id)
+
+    def locked(source, target):
+        raise PermissionError(f"{source} is open in another process")
+    monkeypatch.setattr(shards.os, "replace", locked)
+    reply = json.loads(SessionApi().deleteSession(lap.stint.session_id))
+
+    assert not reply['deleted']
+    assert os.path.exists(path) and Session.get_or_none(id=lap.stint.session_id) is not None
+
+def test_new_records_do_not_inherit_telemetry_left_under_their_id(make_lap):
+    lap = make_lap()
+    stale_session_id = lap.stint.session_id + 1
+    os.makedirs(os.path.dirname(shard_path(stale_session_id)), exist_ok=True)
+    open(shard_path(stale_session_id), "wb").close()
+    # A blob whose lap record was rolled back, under the id the next lap gets.
+    write_lap_blob(lap.id, 1, b"stale")
+    Lap.delete_by_id(lap.id)
+
+    session = SessionHandler._get_or_create_session(SimpleNamespace(
+        uid="reused", records=_resolved((lap.stint.session.simulator, lap.stint.session.driver,
+                                         lap.stint.session.car, lap.stint.session.track)),
+        session_type="Practice", track_temp=20.0, air_temp=20.0))
+    reused = LapHandler._create_lap(_resolved(lap.stint), lap.lap_number)
+
+    assert session.id == stale_session_id and not os.path.exists(shard_path(stale_session_id))
+    assert reused.id == lap.id and load_lap_channels(reused.id) is None
+
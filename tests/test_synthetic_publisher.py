@@ -0,0 +1,53 @@
+# tests/test_synthetic_publisher.py
+
+import pytest
+
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Telemetry, rF2Scoring, rF2Extended
+from rw_backend.simulators.lmu.snapshot import SnapshotReader
+from rw_backend.simulators.lmu.synthetic import SyntheticPublisher
+
+SCENARIO = [("garage", 1.0), ("out_lap",), ("laps", 2), ("pit_stop", 1.0), ("garage", 1.0)]
+
+@pytest.fixture
+def publisher():
+    publisher = SyntheticPublisher(
+        rF2Telemetry(), rF2Scoring(), rF2Extended(),
+        scenario=SCENARIO, telemetry_hz=50, scoring_hz=5, cars=8, lap_time=5.0, track_length=500.0
+    )
+    publisher.start_session()
+    return publisher
+
+def test_every_write_leaves_a_consistent_version_block(publisher):
+    for _ in range(20):
+        publisher.tick()
+    for buffer in (publisher.telemetry, publisher.scoring, publisher.extended):
+        assert buffer.mVersionUpdateBegin == buffer.mVersionUpdateEnd
+    assert publisher.telemetry.mVersionUpdateEnd == 20
+    assert publisher.scoring.mVersionUpdateEnd == publisher.scoring_updates == 2
+
+def test_scenario_runs_garage_to_garage(publisher):
+    reader = SnapshotReader(publisher.telemetry, publisher.scoring, publisher.extended)
+    states = []
+    while not publisher.finished:
+        publisher.tick()
+        player = reader.read().player_scoring
+        state = ("garage" if player.mInGarageStall else "pits" if player.mInPits else "track", player.mNumPitstops)
+        if not states or states[-1] != state:
+            states.append(state)
+
+    assert states == [("garage", 0), ("pits", 0), ("track", 0), ("pits", 0), ("garage", 1)]
+    # Out-lap, two flying laps and the in-lap.
+    assert publisher.player.total_laps == 4
+    assert 0 < publisher.player.best_lap_time < 6.0
+
+def test_player_is_found_by_the_collector(publisher):
+    publisher.tick()
+    frame = SnapshotReader(publisher.telemetry, publisher.scoring, publisher.extended).read()
+
+    assert frame.player_index == publisher.player_slot
+    assert frame.telemetry.mID == frame.player_scoring.mID
+    assert frame.extended.mSessionStarted
+
+def test_car_count_is_limited_to_mapped_vehicles():
+    with pytest.raises(ValueError):
+        SyntheticPublisher(rF2Telemetry(), rF2Scoring(), rF2Extended(), cars=129)
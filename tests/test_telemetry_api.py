@@ -0,0 +1,109 @@
+# tests/test_telemetry_api.py
+
+import base64
+import json
+from array import array
+
+import pytest
+
+from rw_backend.api.telemetry_api import TelemetryApi, SERIES_CHANNELS
+from rw_backend.database.lap_channels import CHANNEL_NAMES, save_lap_channels
+
+def _samples(count):
+    return [dict({name: float(i % 50) for name in CHANNEL_NAMES}, lap_dist=i * 3.0, gear=i % 7, pos_x=float(i))
+            for i in range(count)]
+
+@pytest.fixture
+def laps(make_lap):
+    laps = [make_lap(lap_number=n) for n in (1, 2)]
+    save_lap_channels(laps[0].id, _samples(400))
+    save_lap_channels(laps[1].id, _samples(300))
+    return laps
+
+def _decode(buffer):
+    return array('f', base64.b64decode(buffer)).tolist()
+
+def test_default_response_is_unchanged(laps):
+    response = json.loads(TelemetryApi().getLapTelemetry(laps[0].id))
+
+    assert 'version' not in response
+    assert response['telemetry']['speed']['data'][3] == {'x': 9.0, 'y': 3.0}
+    assert response['trackpath'][3] == {'distance': 9.0, 'x': -3.0, 'y': 3.0}
+
+def test_default_response_keeps_stored_values_short(make_lap):
+    lap = make_lap()
+    save_lap_channels(lap.id, [dict(sample, speed=0.1, pos_x=-12.3) for sample in _samples(10)])
+    response = TelemetryApi().getLapTelemetry(lap.id)
+
+    # Not the float32 value widened to 0.10000000149011612.
+    assert json.loads(response)['telemetry']['speed']['data'][3] == {'x': 9.0, 'y': 0.1}
+    assert json.loads(response)['trackpath'][3]['x'] == 12.3
+    assert '0000000' not in response
+
+def test_columnar_response_carries_the_same_values(laps):
+    api = TelemetryApi()
+    rows = json.loads(api.getLapTelemetry(laps[0].id))
+    columns = json.loads(api.getLapTelemetry(laps[0].id, {'version': 2, 'channels': 'all'}))
+
+    assert columns['version'] == 2 and columns['encoding'] == 'json'
+    lap = columns['laps'][0]
+    assert lap['sampleCount'] == 400
+    assert lap['distance'] == [point['x'] for point in rows['telemetry']['speed']['data']]
+    assert lap['channels']['gear'] == [point['y'] for point in rows['telemetry']['gear']['data']]
+    assert lap['trackpath']['x'] == [point['x'] for point in rows['trackpath']]
+    pressure = next(s for s in columns['series'] if s['channel'] == 'tire_pressure_fl')
+    assert (pressure['key'], pressure['corner'], pressure['label']) == ('tirePressure', 'fl', 'Tire Pressure FL')
+    assert set(lap['channels']) == set(SERIES_CHANNELS) == {s['channel'] for s in columns['series']}
+
+def test_base64_buffers_decode_to_float32_and_are_smaller(laps):
+    api = TelemetryApi()
+    plain = api.compareLaps(laps[0].id, laps[1].id, {'version': 2})
+    packed = api.compareLaps(laps[0].id, laps[1].id, json.dumps({'version': 2, 'encoding': 'base64'}))
+    response = json.loads(packed)
+
+    assert [lap['sampleCount'] for lap in response['laps']] == [400, 300]
+    assert _decode(response['laps'][1]['channels']['speed']) == json.loads(plain)['laps'][1]['channels']['speed']
+    assert _decode(response['laps'][0]['distance'])[-1] == 399 * 3.0
+    speed = next(s for s in response['series'] if s['channel'] == 'speed')
+    assert speed['colors'] == ['#007BFF', '#FF6B35']
+    assert len(packed) < len(plain) < len(api.compareLaps(laps[0].id, laps[1].id))
+
+def test_missing_values_are_sent_as_null(make_lap):
+    lap = make_lap()
+    samples = _samples(3)
+    samples[1]['speed'] = None
+    save_lap_channels(lap.id, samples)
+
+    response = json.loads(TelemetryApi().getLapTelemetry(lap.id, {'version': 2}))
+    assert response['laps'][0]['channels']['speed'] == [0.0, None, 2.0]
+
+def test_lap_without_telemetry_and_bad_options(make_lap):
+    lap = make_lap()
+    api = TelemetryApi()
+    empty = json.loads(api.getLapTelemetry(lap.id, {'version': 2, 'encoding': 'base64'}))
+
+    assert empty['laps'][0]['sampleCount'] == 0 and empty['laps'][0]['distance'] == ''
+    assert json.loads(api.getLapTelemetry(lap.id, {'version': 3})) == {'telemetry': {}, 'trackpath': []}
+
+def test_channel_subsets_read_and_build_only_what_was_asked(laps):
+    api = TelemetryApi()
+    overview = json.loads(api.getLapTelemetry(laps[0].id, {'version': 2}))
+    tires = json.loads(api.getLapTelemetry(laps[0].id, {'version': 2, 'channels': ['tires', 'rpm']}))
+    rows = json.loads(api.getLapTelemetry(laps[0].id, {'channels': ['brakes', 'speed']}))
+
+    assert overview['channels'] == ['speed', 'throttle', 'brake', 'gear', 'steering']
+    assert set(overview['laps'][0]['channels']) == set(overview['channels'])
+    assert overview['laps'][0]['trackpath']['x'][3] == -3.0
+    assert len(tires['channels']) == 13 and tires['laps'][0]['trackpath'] is None
+    assert {s['channel'] for s in tires['series']} == set(tires['laps'][0]['channels'])
+    assert set(rows['telemetry']) == {'speed', 'brakeTemp'} and rows['trackpath'] == []
+    assert set(rows['telemetry']['brakeTemp']) == {'fl', 'fr', 'rl', 'rr'}
+    assert json.loads(api.getLapTelemetry(laps[0].id, {'channels': ['nope']})) == {'telemetry': {}, 'trackpath': []}
+
+def test_loading_a_subset_decodes_only_those_channels(laps):
+    from rw_backend.database.lap_channels import load_lap_channels
+    full = load_lap_channels(laps[0].id)
+    subset = load_lap_channels(laps[0].id, ('speed', 'tire_temp_rr'))
+
+    assert set(subset) == {'lap_dist', 'speed', 'tire_temp_rr'}
+    assert all(subset[name] == full[name] for name in subset)
@@ -0,0 +1,79 @@
+# tests/test_telemetry_cache.py
+
+import json
+
+import pytest
+
+from rw_backend.api.session_api import SessionApi
+from rw_backend.api.telemetry_api import TelemetryApi
+from rw_backend.api.telemetry_cache import TelemetryCache, telemetry_cache
+from rw_backend.database.lap_channels import CHANNEL_NAMES, save_lap_channels
+from rw_backend.database.retention import apply_tier, DOWNSAMPLED
+
+def _samples(count):
+    return [dict({name: float(i % 50) for name in CHANNEL_NAMES}, lap_dist=i * 3.0, gear=i % 7) for i in range(count)]
+
+@pytest.fixture
+def laps(make_lap):
+    laps = [make_lap(lap_number=n) for n in (1, 2, 3)]
+    for lap in laps[:2]:
+        save_lap_channels(lap.id, _samples(400))
+    return laps
+
+class Builder:
+    """A build callback that counts its calls."""
+    def __init__(self, size=100):
+        self.calls = 0
+        self.size = size
+
+    def __call__(self):
+        self.calls += 1
+        return f"{self.calls:0{self.size}d}"
+
+def test_repeated_requests_are_served_from_the_cache(laps):
+    api = TelemetryApi()
+    first = api.getLapTelemetry(laps[0].id, {'version': 2})
+    hits = telemetry_cache.hits
+
+    assert api.getLapTelemetry(laps[0].id, {'version': 2}) is first
+    assert telemetry_cache.hits == hits + 1
+    # Other options are another response.
+    assert api.getLapTelemetry(laps[0].id, {'version': 2, 'points': 100}) != first
+    assert json.loads(api.getTelemetryCacheStats())['entries'] == 2
+
+def test_least_recently_used_responses_go_first(laps):
+    cache = TelemetryCache(max_bytes=250)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get(key, [laps[0].id], Builder())
+
+    assert set(cache._entries) == {'a', 'c'}
+    assert cache.bytes == 200
+    assert cache.stats()['evictions'] == 1 and cache.stats()['hits'] == 1
+
+def test_oversized_and_unfinished_laps_are_not_kept(laps):
+    cache = TelemetryCache(max_bytes=250)
+    cache.get('big', [laps[0].id], Builder(size=300))
+    # The third lap has no telemetry yet; its response could still change.
+    cache.get('pending', [laps[2].id], Builder())
+    cache.get('missing', [9999], Builder())
+
+    assert cache.stats()['entries'] == 0
+
+def test_retention_changes_are_noticed_without_invalidation(laps):
+    cache = TelemetryCache()
+    build = Builder()
+    cache.get('lap', [laps[0].id], build)
+    apply_tier(laps[0].id, DOWNSAMPLED, 25.0)
+
+    assert int(cache.get('lap', [laps[0].id], build)) == 2
+    assert build.calls == 2 and cache.stats()['invalidations'] == 1
+
+def test_deleting_a_session_drops_its_responses(laps):
+    api = TelemetryApi()
+    api.compareLaps(laps[0].id, laps[1].id, {'version': 2})
+    api.getLapTelemetry(laps[1].id)
+    assert telemetry_cache.stats()['entries'] == 2
+
+    session_id = laps[0].stint.session_id
+    assert json.loads(SessionApi().deleteSession(session_id))['deleted']
+    assert telemetry_cache.stats()['entries'] == 0
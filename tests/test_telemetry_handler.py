@@ -0,0 +1,125 @@
+# tests/test_telemetry_handler.py
+
+import os
+from concurrent.futures import Future
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import peewee as pw
+import pytest
+
+from rw_backend.core.events import LapStarted, SessionEnded, TelemetryUpdate
+from rw_backend.core.frame import FrameContext
+from rw_backend.database.journal import journal_dir
+from rw_backend.database.lap_channels import CHANNELS, ChannelBuffer, load_lap_channels, read_row_channels
+from rw_backend.database import writer as writer_module
+from rw_backend.database.models import db, LapTelemetry
+from rw_backend.database.shards import shard_lap_ids
+from rw_backend.database.writer import PersistenceWriter
+from rw_backend.handlers.telemetry_handler import TelemetryHandler
+from rw_backend.pyRfactor2SharedMemory.rF2data import rF2Scoring, rF2VehicleScoring, rF2VehicleTelemetry
+
+def _frame(track_length, lap_dist):
+    telemetry = rF2VehicleTelemetry(mGear=3, mFuel=50.0 - lap_dist / 1000, mElapsedTime=1000.0 + lap_dist / 50)
+    telemetry.mLocalVel.z = -50.0
+    telemetry.mPos.x, telemetry.mPos.z = lap_dist, -lap_dist
+    telemetry.mWheels[0].mTemperature[2] = 373.15
+    scoring = rF2Scoring()
+    scoring.mScoringInfo.mLapDist = track_length
+    return FrameContext(telemetry=telemetry, scoring=scoring, extended=None,
+                        player_scoring=rF2VehicleScoring(mLapDist=lap_dist, mTimeIntoLap=lap_dist / 50))
+
+def _drive_lap(storage, lap, track_length, driven):
+    lap_future = Future()
+    lap_future.set_result(lap)
+    writer = PersistenceWriter()
+    writer.start()
+    handler = TelemetryHandler(SimpleNamespace(current_lap=lap_future, current_lap_number=1), writer, storage=storage)
+    handler._on_lap_started(LapStarted(lap_number=1))
+    for dist in range(driven):
+        handler._on_telemetry_update(TelemetryUpdate(payload=_frame(track_length, float(dist)), player_state="ON_TRACK"))
+    capacity = handler.lap_buffer.capacity
+    handler._on_session_ended(SessionEnded())
+    writer.stop()
+    return capacity
+
+def test_snapshot_covers_every_channel():
+    assert len(TelemetryHandler._snapshot_values(_frame(3000.0, 12.0), 12.0)) == len(CHANNELS)
+
+def test_buffer_grows_and_keeps_samples():
+    buffer = ChannelBuffer(2)
+    for i in range(5):
+        buffer.append([i] * len(CHANNELS))
+
+    assert (len(buffer), buffer.capacity) == (5, 8)
+    assert list(buffer.columns()['speed']) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert list(buffer.rows(3, 5))[0][0] == 3.0
+
+def test_lap_is_buffered_by_index_and_stored_both_ways(make_lap):
+    lap = make_lap()
+    # Sized from a 900 m track, then driven further than that so the buffer has to grow.
+    capacity = _drive_lap("both", lap, track_length=900.0, driven=1500)
+
+    assert capacity == 301 * 2
+    channels = load_lap_channels(lap.id)
+    rows = read_row_channels(lap.id)
+    assert shard_lap_ids(lap.stint.session_id) == {lap.id}
+    assert LapTelemetry.select().count() == len(channels['lap_dist']) == 500
+    assert {name: list(values) for name, values in channels.items()} == {name: list(values) for name, values in rows.items()}
+    assert channels['tire_temp_fl'][0] == pytest.approx(100.0)
+    assert channels['speed'][0] == pytest.approx(180.0)
+
+def test_columnar_mode_writes_no_rows(make_lap):
+    lap = make_lap()
+    _drive_lap("columnar", lap, track_length=3000.0, driven=300)
+
+    assert LapTelemetry.select().count() == 0
+    assert len(load_lap_channels(lap.id)['lap_dist']) == 100
+
+def test_journal_is_deleted_once_the_lap_is_committed(make_lap):
+    lap = make_lap()
+    _drive_lap("columnar", lap, track_length=3000.0, driven=300)
+
+    assert os.listdir(journal_dir()) == []
+
+def test_journal_is_kept_when_the_lap_fails_to_commit(make_lap, monkeypatch):
+    @contextmanager
+    def failing_commit():
+        with db.atomic():
+            yield
+            raise pw.OperationalError("disk I/O error")
+    monkeypatch.setattr(writer_module, "write_transaction", failing_commit)
+    lap_future = Future()
+    lap_future.set_result(make_lap())
+    writer = PersistenceWriter()
+    handler = TelemetryHandler(SimpleNamespace(current_lap=lap_future, current_lap_number=1), writer, storage="both")
+    handler._on_lap_started(LapStarted(lap_number=1))
+    for dist in range(300):
+        handler._on_telemetry_update(TelemetryUpdate(payload=_frame(3000.0, float(dist)), player_state="ON_TRACK"))
+    handler._on_session_ended(SessionEnded())
+    # The lap's writes and the journal's settling all land in one batch.
+    writer.start()
+    writer.stop()
+
+    assert LapTelemetry.select().count() == 0
+    assert [name.endswith(".rwj") for name in os.listdir(journal_dir())] == [True]
+
+def test_lap_of_a_killed_daemon_is_recovered_from_its_journal(make_lap):
+    lap = make_lap()
+    lap_future = Future()
+    lap_future.set_result(lap)
+    handler = TelemetryHandler(SimpleNamespace(current_lap=lap_future, current_lap_number=1), writer=None,
+                               storage="both", journal=True)
+    handler._on_lap_started(LapStarted(lap_number=1))
+    for dist in range(0, 900, 3):
+        handler._on_telemetry_update(TelemetryUpdate(payload=_frame(3000.0, float(dist)), player_state="ON_TRACK"))
+    # Killed mid-lap: nothing reached the writer, only the journal is on disk.
+    handler.lap_journal.close()
+
+    writer = PersistenceWriter()
+    writer.start()
+    TelemetryHandler(None, writer, storage="both", journal=True).recover()
+    writer.stop()
+
+    assert len(load_lap_channels(lap.id)['lap_dist']) == LapTelemetry.select().count() == 300
+    assert os.listdir(journal_dir()) == []